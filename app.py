@@ -7,17 +7,48 @@ Email: suportdeyvid@gmail.com
 """
 
 import os
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_from_directory
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Flask, Response, render_template, request, redirect, url_for, session, flash, jsonify, send_from_directory, g, has_request_context, stream_with_context
 import sqlite3
 import json
+import hmac
 from datetime import datetime, timedelta
 from functools import wraps
+from dataclasses import asdict
 import traceback
+import mimetypes
+import tempfile
+import queue
+import time
+
+from core.conexao import ConnectionManager
+from core.fragmentos import FragmentCacheExtension, bytecode_cache, warm_templates
+from core.estaticos import load_manifest, asset_paths, negotiate, DIST_DIR
+from core.compressao import ResponseCompressor
+from core.serializacao import FastJSONProvider, columnar, iso
+from core.senhas import PasswordHasher, AuthBusy, DEFAULT_METHOD
+from core.dinheiro import from_cents, to_cents, with_reais
+from core.resumo import UserSummary, get_user_summary
+from core.periodos import month_range, range_params
+from core.series import get_time_series
+from core.comparativos import compare_periods, growth_rate, DEFAULT_PERIODS
+from core.agregados import apply_transaction, ensure_rollups
+from core.cache import UserCache
+from core.versoes import DataVersions
+from core.eventos import EventBroker, StreamLimitReached, format_sse
+from core.notificacoes import NotificationWriter, insert_notification, fetch_notifications, acknowledge, unread_count, ensure_counters, MAX_ACK_IDS
+from core.categorias import merged_categories, customize_category
+from core.transacoes import fetch_transactions_page, iter_transactions, parse_filters, serialize_transaction, DEFAULT_PAGE_SIZE
+from core.exportador import ExportadorStream
+from core.consultas import registry
+from core.migracoes import migrate
+from core.importador import import_transactions, iter_csv, TooManyRows, MAX_ROWS
 
 # ===== CONFIGURAÇÃO PARA RENDER =====
 app = Flask(__name__)
 
+# JSON das APIs: orjson se instalado (JSON_ENCODER=stdlib força o json padrão)
+app.json = FastJSONProvider(app, encoder=os.environ.get('JSON_ENCODER', 'auto'))
+
 # Configuração da secret key
 app.secret_key = os.environ.get('SECRET_KEY', 'contasmart-executivo-2026-secret-dev')
 app.config['SESSION_TYPE'] = 'filesystem'
@@ -36,6 +67,76 @@ else:
     DB_TYPE = 'sqlite'
     print("📁 Usando SQLite local")
 
+# Pool de conexões por processo: uma conexão por thread do gunicorn (gthread)
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', os.environ.get('GUNICORN_THREADS', 4)))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+
+db_pool = ConnectionManager(DB_TYPE, DATABASE,
+                            minconn=DB_POOL_MIN,
+                            maxconn=DB_POOL_MAX,
+                            timeout=DB_POOL_TIMEOUT)
+
+# Consultas nomeadas; no PostgreSQL como prepared statements por conexão
+# (DB_PREPARED=0 para poolers em modo transação, ex.: PgBouncer)
+queries = registry(DB_TYPE, prepare=os.environ.get('DB_PREPARED', '1') != '0')
+
+# Streams SSE por processo: cada um ocupa uma thread do gunicorn (gthread)
+SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', max(1, DB_POOL_MAX // 2)))
+SSE_HEARTBEAT = float(os.environ.get('SSE_HEARTBEAT', 15))
+SSE_MAX_SECONDS = float(os.environ.get('SSE_MAX_SECONDS', 300))
+event_broker = EventBroker(max_subscribers=SSE_MAX_STREAMS)
+
+# Versão dos dados por usuário (tabela do banco: a mesma para todos os workers e hosts)
+# lida uma vez por requisição e memorizada em g
+def request_versions():
+    if not has_request_context():
+        return None
+    return g.setdefault('data_versions', {})
+
+data_versions = DataVersions(DB_TYPE, db_pool.connection, memo=request_versions)
+
+# Cache de leituras por usuário (CACHE_SHARED_PATH ativa a camada entre workers)
+user_cache = UserCache(data_versions,
+                       maxsize=int(os.environ.get('CACHE_MAX_ENTRIES', 2048)),
+                       ttl=float(os.environ.get('CACHE_TTL', 60)),
+                       shared_path=os.environ.get('CACHE_SHARED_PATH') or None)
+
+# Notificações sem transação do chamador (ex.: login) são gravadas em lote
+notification_writer = NotificationWriter(DB_TYPE, db_pool.connection,
+                                         on_flushed=lambda batch: notifications_flushed(batch),
+                                         batch_size=int(os.environ.get('NOTIFY_BATCH_SIZE', 100)),
+                                         interval=float(os.environ.get('NOTIFY_FLUSH_INTERVAL', 1.0)))
+
+# Hash de senhas: método/custo configuráveis e verificação em executor limitado
+password_hasher = PasswordHasher(method=os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+                                 max_workers=int(os.environ.get('AUTH_MAX_WORKERS', 2)),
+                                 max_pending=int(os.environ.get('AUTH_MAX_PENDING', 16)),
+                                 wait=float(os.environ.get('AUTH_WAIT', 5)))
+
+# Templates: bytecode compartilhado entre workers e tag {% cache %} para fragmentos
+JINJA_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR',
+                                 os.path.join(tempfile.gettempdir(), 'contasmart', 'jinja'))
+app.jinja_env.bytecode_cache = bytecode_cache(JINJA_CACHE_DIR)
+app.jinja_env.add_extension(FragmentCacheExtension)
+
+EXECUTIVE_TEMPLATES = [
+    'base_executivo.html', 'dashboard_executivo.html', 'transacoes_executivo.html',
+    'metas_executivo.html', 'perfil_executivo.html', 'login_executivo.html',
+    'register_executivo.html', 'index_executivo.html', 'sobre_executivo.html',
+]
+
+# Estáticos: manifesto do build (python -m core.estaticos); vazio = arquivos originais
+STATIC_MANIFEST = load_manifest(app.static_folder)
+STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', 31536000))
+
+# Compressão de HTML/JSON/CSV (COMPRESS_RESPONSES=0 se o proxy já comprime)
+COMPRESS_RESPONSES = os.environ.get('COMPRESS_RESPONSES', '1') != '0'
+response_compressor = ResponseCompressor(min_size=int(os.environ.get('COMPRESS_MIN_SIZE', 500)),
+                                         level=int(os.environ.get('COMPRESS_LEVEL', 6)),
+                                         brotli_quality=int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4)),
+                                         stream=os.environ.get('COMPRESS_STREAMS', '1') != '0')
+
 # ===== SISTEMA PERSONALIZADO =====
 
 def get_system_info():
@@ -62,153 +163,71 @@ def get_developer_info():
 # ===== FUNÇÕES AUXILIARES =====
 
 def get_db_connection():
-    """Conectar ao banco de dados"""
-    if DB_TYPE == 'postgresql':
-        # PostgreSQL no Render
-        import psycopg2
-        from psycopg2.extras import DictCursor
-        
-        conn = psycopg2.connect(DATABASE, sslmode='require')
-        conn.cursor_factory = DictCursor
-        return conn
-    else:
-        # SQLite local
-        conn = sqlite3.connect(DATABASE)
-        conn.row_factory = sqlite3.Row
-        return conn
+    """Obter conexão do pool (close() devolve a conexão ao pool)"""
+    conn = db_pool.connection()
+    if has_request_context():
+        # Garante a devolução mesmo se a rota falhar antes do close()
+        g.setdefault('db_connections', []).append(conn)
+    return conn
+
+@app.after_request
+def compress_response(response):
+    """Comprime a resposta conforme o Accept-Encoding (core.compressao)"""
+    if not COMPRESS_RESPONSES:
+        return response
+    return response_compressor.compress(response, request.headers.get('Accept-Encoding'),
+                                        request.endpoint or 'unknown')
+
+@app.teardown_request
+def release_db_connections(exc=None):
+    """Devolver ao pool as conexões esquecidas pela requisição"""
+    for conn in g.pop('db_connections', []):
+        conn.close()
 
-def sql_placeholder():
-    """Retorna placeholder correto para o banco"""
-    return '%s' if DB_TYPE == 'postgresql' else '?'
+def execute_sql(cursor, name, params=None):
+    """Executa uma instrução do registro de consultas (core.consultas) pelo nome"""
+    return queries.execute(cursor, name, params)
 
-def execute_sql(cursor, sql, params=None):
-    """Executa SQL com placeholders corretos"""
-    if params is None:
-        params = []
-    cursor.execute(sql, params)
+def migrate_database():
+    """Aplicar migrações pendentes do esquema (no-op se já estiver em dia)"""
+    if DB_TYPE == 'sqlite':
+        os.makedirs('database', exist_ok=True)
+    
+    conn = get_db_connection()
+    try:
+        for version, name, duration in migrate(conn, DB_TYPE):
+            print(f"🗄️  Migração {version} aplicada: {name} ({duration} ms)")
+    finally:
+        conn.close()
 
 def init_db():
     """Inicializar banco de dados"""
     print("🔄 Inicializando banco de dados...")
     
-    # Criar diretório database se for SQLite
-    if DB_TYPE == 'sqlite':
-        os.makedirs('database', exist_ok=True)
+    # Esquema e índices (core/migracoes.py)
+    migrate_database()
     
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Tabela de usuários
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS users (
-                id {'SERIAL PRIMARY KEY' if DB_TYPE == 'postgresql' else 'INTEGER PRIMARY KEY AUTOINCREMENT'},
-                username VARCHAR(100) UNIQUE NOT NULL,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                full_name VARCHAR(255),
-                avatar VARCHAR(255) DEFAULT 'default.png',
-                theme VARCHAR(50) DEFAULT 'executive',
-                currency VARCHAR(10) DEFAULT 'BRL',
-                language VARCHAR(10) DEFAULT 'pt_BR',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de categorias
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS categories (
-                id {'SERIAL PRIMARY KEY' if DB_TYPE == 'postgresql' else 'INTEGER PRIMARY KEY AUTOINCREMENT'},
-                user_id INTEGER NOT NULL,
-                name VARCHAR(100) NOT NULL,
-                type VARCHAR(10) CHECK(type IN ('income', 'expense')) NOT NULL,
-                color VARCHAR(20) DEFAULT '#0066ff',
-                icon VARCHAR(50) DEFAULT 'fas fa-tag',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de transações
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS transactions (
-                id {'SERIAL PRIMARY KEY' if DB_TYPE == 'postgresql' else 'INTEGER PRIMARY KEY AUTOINCREMENT'},
-                user_id INTEGER NOT NULL,
-                type VARCHAR(10) CHECK(type IN ('income', 'expense')) NOT NULL,
-                category_id INTEGER,
-                amount DECIMAL(10, 2) NOT NULL,
-                description TEXT,
-                transaction_date DATE NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de metas
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS goals (
-                id {'SERIAL PRIMARY KEY' if DB_TYPE == 'postgresql' else 'INTEGER PRIMARY KEY AUTOINCREMENT'},
-                user_id INTEGER NOT NULL,
-                title VARCHAR(255) NOT NULL,
-                description TEXT,
-                target_amount DECIMAL(10, 2) NOT NULL,
-                current_amount DECIMAL(10, 2) DEFAULT 0,
-                deadline DATE,
-                priority VARCHAR(10) CHECK(priority IN ('low', 'medium', 'high')),
-                is_completed BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de notificações
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS notifications (
-                id {'SERIAL PRIMARY KEY' if DB_TYPE == 'postgresql' else 'INTEGER PRIMARY KEY AUTOINCREMENT'},
-                user_id INTEGER NOT NULL,
-                title VARCHAR(255) NOT NULL,
-                message TEXT,
-                type VARCHAR(20) DEFAULT 'info',
-                is_read BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        if ensure_rollups(cursor, DB_TYPE):
+            print("📊 Agregados mensais reconstruídos a partir das transações")
+        ensure_counters(cursor, DB_TYPE)
         
         conn.commit()
         
         # Verificar usuário admin
-        placeholder = sql_placeholder()
-        execute_sql(cursor, f'SELECT * FROM users WHERE username = {placeholder}', ('admin',))
+        execute_sql(cursor, 'users.by_username', ('admin',))
         admin = cursor.fetchone()
         
         if not admin:
-            hashed_password = generate_password_hash('admin2026')
-            
-            execute_sql(cursor, f'''
-                INSERT INTO users (username, email, password, full_name, theme)
-                VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
-                {'RETURNING id' if DB_TYPE == 'postgresql' else ''}
-            ''', ('admin', 'admin@contasmart.com', hashed_password, 'Administrador', 'executive'))
-            
-            if DB_TYPE == 'postgresql':
-                user_id = cursor.fetchone()['id']
-            else:
-                user_id = cursor.lastrowid
-            
-            # Categorias padrão
-            default_categories = [
-                ('Salário', 'income', '#00ff88', 'fas fa-money-check-alt'),
-                ('Freelance', 'income', '#00ffff', 'fas fa-laptop-code'),
-                ('Investimentos', 'income', '#9d00ff', 'fas fa-chart-line'),
-                ('Alimentação', 'expense', '#ff3366', 'fas fa-utensils'),
-                ('Transporte', 'expense', '#ff9900', 'fas fa-car'),
-                ('Moradia', 'expense', '#ff0066', 'fas fa-home'),
-                ('Lazer', 'expense', '#00ccff', 'fas fa-gamepad')
-            ]
+            hashed_password = password_hasher.hash('admin2026')
             
-            for name, type, color, icon in default_categories:
-                execute_sql(cursor, f'''
-                    INSERT INTO categories (user_id, name, type, color, icon)
-                    VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
-                ''', (user_id, name, type, color, icon))
+            execute_sql(cursor, 'users.insert',
+                       ('admin', 'admin@contasmart.com', hashed_password, 'Administrador', 'executive'))
             
+            # Categorias padrão são globais (migração 6): nada a copiar
             conn.commit()
             print("✅ Banco de dados inicializado com sucesso!")
         
@@ -229,6 +248,23 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Métricas internas: token em METRICS_TOKEN (Authorization: Bearer) ou sessão do admin
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+ADMIN_USERNAME = 'admin'
+
+def metrics_required(f):
+    """Decorator para rotas de monitoramento (token de métricas ou admin logado)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        auth = request.headers.get('Authorization', '')
+        token = auth[7:].strip() if auth.startswith('Bearer ') else ''
+        if METRICS_TOKEN and token and hmac.compare_digest(token, METRICS_TOKEN):
+            return f(*args, **kwargs)
+        if session.get('username') == ADMIN_USERNAME:
+            return f(*args, **kwargs)
+        return jsonify({'success': False, 'error': 'Acesso restrito'}), 403
+    return decorated_function
+
 def format_currency(value):
     """Formatar valor como moeda"""
     if value is None:
@@ -238,22 +274,148 @@ def format_currency(value):
     except:
         return f"R$ {float(value or 0):.2f}"
 
-def create_notification(user_id, title, message, type='info'):
-    """Criar nova notificação"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    placeholder = sql_placeholder()
+def create_notification(user_id, title, message, type='info', cursor=None):
+    """Criar nova notificação
+
+    Com `cursor`, a notificação entra na transação do chamador e o payload
+    é retornado para publish_notification() depois do commit. Sem cursor,
+    vai para a fila gravada em lote em segundo plano.
+    """
+    if cursor is not None:
+        return insert_notification(cursor, DB_TYPE, user_id, title, message, type)
+    notification_writer.enqueue(user_id, title, message, type)
+
+def publish_notification(notification):
+    """Avisar streams abertos sobre uma notificação já gravada"""
+    event_broker.publish(notification['user_id'], 'notification', {
+        'id': notification['id'],
+        'title': notification['title'],
+        'message': notification['message'],
+        'type': notification['type']
+    })
+
+def notifications_flushed(notifications):
+    """Após o commit de um lote da fila: nova versão, cache e eventos"""
+    for user_id in {n['user_id'] for n in notifications}:
+        invalidate_user_data(user_id, bumped=False)
+    for notification in notifications:
+        publish_notification(notification)
+
+def invalidate_user_data(user_id, bumped=True):
+    """Depois do commit: descarta o cache do usuário e avisa os streams
+
+    As rotas incrementam a versão no próprio cursor, antes do commit
+    (data_versions.bump); `bumped=False` incrementa aqui, para escritas
+    confirmadas fora de uma rota.
+    """
+    user_cache.invalidate(user_id, bump=not bumped)
+    event_broker.publish(user_id, 'changed')
+
+def versioned(f):
+    """Decorator para GETs com ETag derivado da versão dos dados do usuário
+
+    Se o cliente enviar If-None-Match com a versão atual, responde 304 sem
+    executar a rota: custa só a leitura da versão (uma consulta por chave
+    primária), que fica memorizada para o restante da requisição.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user_id = session['user_id']
+        # O mês entra no recurso: a virada do mês muda os totais sem escrita
+        resource = f"{request.full_path}|{datetime.now().strftime('%Y-%m')}"
+        etag = data_versions.etag(user_id, resource)
+        
+        # Comparação fraca: a compressão marca a ETag como W/
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+        else:
+            response = app.make_response(f(*args, **kwargs))
+            # Erros saem com status próprio e nunca recebem ETag
+            if response.status_code != 200:
+                return response
+        
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Cookie')
+        return response
+    return decorated_function
+
+def render_fragment(name, vary, render):
+    """Fragmento de template em cache por usuário e pelas variações da tag
+
+    Os fragmentos usam só a sessão e as variações, nunca os dados do
+    usuário: a chave não leva a versão e o cache não consulta o banco.
+    Visitantes (sem sessão) renderizam sempre.
+    """
+    user_id = session.get('user_id') if has_request_context() else None
+    if user_id is None:
+        return render()
+    key = 'fragment:' + ':'.join([name] + [str(value) for value in vary])
+    return user_cache.get_or_set(user_id, key, render, versioned=False)
+
+app.jinja_env.fragment_cache = render_fragment
+
+def wants_columnar():
+    """?format=columnar nas listagens: {columns, data} em vez de lista de objetos"""
+    response_format = request.args.get('format', 'rows')
+    if response_format not in ('rows', 'columnar'):
+        raise ValueError("format deve ser 'rows' ou 'columnar'")
+    return response_format == 'columnar'
+
+def asset_urls(name):
+    """URLs de um CSS/JS (ou bundle): versão com hash se houver build"""
+    return [url_for('static', filename=path) for path in asset_paths(STATIC_MANIFEST, name)]
+
+def asset_url(name):
+    return asset_urls(name)[0]
+
+app.jinja_env.globals.update(asset_url=asset_url, asset_urls=asset_urls)
+
+def load_user_summary(user_id, cursor=None):
+    """Resumo do usuário via cache (consulta o banco só em caso de falta)"""
+    month = datetime.now().strftime('%Y-%m')
     
-    execute_sql(cursor, f'''
-        INSERT INTO notifications (user_id, title, message, type)
-        VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder})
-    ''', (user_id, title, message, type))
+    def produce():
+        if cursor is not None:
+            return asdict(get_user_summary(cursor, DB_TYPE, user_id, month))
+        conn = get_db_connection()
+        try:
+            return asdict(get_user_summary(conn.cursor(), DB_TYPE, user_id, month))
+        finally:
+            conn.close()
     
-    conn.commit()
-    conn.close()
+    return UserSummary(**user_cache.get_or_set(user_id, f'summary:{month}', produce, cursor=cursor))
+
+def load_categories(user_id, cursor=None):
+    """Categorias padrão + personalizações + próprias do usuário via cache"""
+    def produce():
+        if cursor is not None:
+            return merged_categories(cursor, DB_TYPE, user_id)
+        conn = get_db_connection()
+        try:
+            return merged_categories(conn.cursor(), DB_TYPE, user_id)
+        finally:
+            conn.close()
+    
+    return user_cache.get_or_set(user_id, 'categories', produce, cursor=cursor)
 
 # ===== ROTAS PRINCIPAIS =====
 
+@app.route('/static/dist/<path:filename>')
+def dist_static(filename):
+    """Arquivos do build: variante pré-comprimida aceita pelo cliente e cache imutável"""
+    path, encoding = negotiate(app.static_folder, filename, request.headers.get('Accept-Encoding'))
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_from_directory(os.path.join(app.static_folder, DIST_DIR), path,
+                                   mimetype=mimetype, max_age=STATIC_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    # O nome muda a cada conteúdo novo: o arquivo nunca precisa ser revalidado
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
 @app.route('/')
 def index():
     """Página inicial"""
@@ -283,24 +445,41 @@ def login():
             return render_template('login_executivo.html', system_info=system_info)
         
         conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        placeholder = sql_placeholder()
-        execute_sql(cursor, 
-                   f'SELECT * FROM users WHERE username = {placeholder} OR email = {placeholder}', 
-                   (username, username))
-        
-        user = cursor.fetchone()
-        conn.close()
+        try:
+            cursor = conn.cursor()
+            execute_sql(cursor, 'users.by_login', (username, username))
+            user = cursor.fetchone()
+        finally:
+            # O scrypt (e a espera por vaga) roda sem segurar conexão do pool
+            conn.close()
         
-        if user and check_password_hash(user['password'], password):
+        try:
+            valid, rehash = password_hasher.verify(user['password'], password) if user else (False, False)
+        except AuthBusy as e:
+            flash(str(e), 'warning')
+            return render_template('login_executivo.html', system_info=system_info), 503
+        
+        if valid and rehash:
+            # Hash antigo (outro método ou custo): regrava com o configurado
+            new_hash = password_hasher.hash(password)
+            conn = get_db_connection()
+            try:
+                execute_sql(conn.cursor(), 'users.update_password', (new_hash, user['id']))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"⚠️  Não foi possível atualizar o hash da senha: {e}")
+            finally:
+                conn.close()
+        
+        if valid:
             session['user_id'] = user['id']
             session['username'] = user['username']
             session['full_name'] = user['full_name'] or user['username']
             session['theme'] = user['theme']
             session.permanent = True
             
-            # Criar notificação de login
+            # Notificação de login gravada em lote, fora da requisição
             create_notification(user['id'], 'Login realizado', f'Bem-vindo de volta, {user["username"]}!', 'success')
             
             flash(f'Bem-vindo, {session["full_name"]}!', 'success')
@@ -337,34 +516,19 @@ def register():
             flash('A senha deve ter pelo menos 6 caracteres.', 'danger')
             return render_template('register_executivo.html', system_info=system_info)
         
-        hashed_password = generate_password_hash(password)
+        try:
+            hashed_password = password_hasher.hash(password)
+        except AuthBusy as e:
+            flash(str(e), 'warning')
+            return render_template('register_executivo.html', system_info=system_info), 503
         
         conn = get_db_connection()
         cursor = conn.cursor()
         
         try:
-            placeholder = sql_placeholder()
-            execute_sql(cursor, f'''
-                INSERT INTO users (username, email, password, full_name, theme)
-                VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
-                {'RETURNING id' if DB_TYPE == 'postgresql' else ''}
-            ''', (username, email, hashed_password, full_name, 'executive'))
-            
-            if DB_TYPE == 'postgresql':
-                new_user_id = cursor.fetchone()['id']
-            else:
-                new_user_id = cursor.lastrowid
-            
-            # Copiar categorias padrão do admin (ID 1)
-            execute_sql(cursor, 'SELECT * FROM categories WHERE user_id = 1')
-            default_categories = cursor.fetchall()
-            
-            for cat in default_categories:
-                execute_sql(cursor, f'''
-                    INSERT INTO categories (user_id, name, type, color, icon)
-                    VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
-                ''', (new_user_id, cat['name'], cat['type'], cat['color'], cat['icon']))
+            execute_sql(cursor, 'users.insert', (username, email, hashed_password, full_name, 'executive'))
             
+            # Categorias padrão são globais: o novo usuário já as enxerga
             conn.commit()
             
             flash('Conta criada com sucesso! Faça login para acessar o sistema.', 'success')
@@ -392,92 +556,33 @@ def dashboard():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Estatísticas
-        placeholder = sql_placeholder()
-        
-        # Total receitas
-        execute_sql(cursor, 
-                   f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'income'", 
-                   (user_id,))
-        total_income = float(cursor.fetchone()['total'])
-        
-        # Total despesas
-        execute_sql(cursor, 
-                   f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'expense'", 
-                   (user_id,))
-        total_expense = float(cursor.fetchone()['total'])
-        
-        balance = total_income - total_expense
-        
-        # Este mês
-        current_month = datetime.now().strftime('%Y-%m')
-        
-        if DB_TYPE == 'postgresql':
-            execute_sql(cursor, 
-                       f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'income' AND TO_CHAR(transaction_date, 'YYYY-MM') = {placeholder}", 
-                       (user_id, current_month))
-        else:
-            execute_sql(cursor, 
-                       f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'income' AND strftime('%Y-%m', transaction_date) = {placeholder}", 
-                       (user_id, current_month))
-        month_income = float(cursor.fetchone()['total'])
-        
-        if DB_TYPE == 'postgresql':
-            execute_sql(cursor, 
-                       f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'expense' AND TO_CHAR(transaction_date, 'YYYY-MM') = {placeholder}", 
-                       (user_id, current_month))
-        else:
-            execute_sql(cursor, 
-                       f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'expense' AND strftime('%Y-%m', transaction_date) = {placeholder}", 
-                       (user_id, current_month))
-        month_expense = float(cursor.fetchone()['total'])
-        
-        month_balance = month_income - month_expense
+        # Estatísticas (totais, mês atual, metas e notificações em uma consulta)
+        summary = load_user_summary(user_id, cursor)
         
         # Transações recentes
-        execute_sql(cursor, f'''
-            SELECT t.*, c.name as category_name, c.color as category_color
-            FROM transactions t
-            LEFT JOIN categories c ON t.category_id = c.id
-            WHERE t.user_id = {placeholder}
-            ORDER BY t.transaction_date DESC, t.created_at DESC
-            LIMIT 10
-        ''', (user_id,))
+        execute_sql(cursor, 'transactions.recent', (user_id,))
         
         recent_transactions = cursor.fetchall()
-        recent_transactions_list = [dict(trans) for trans in recent_transactions]
+        recent_transactions_list = [with_reais(trans, 'amount') for trans in recent_transactions]
         
         # Metas ativas
-        execute_sql(cursor, f'''
-            SELECT * FROM goals 
-            WHERE user_id = {placeholder} AND is_completed = FALSE
-            ORDER BY deadline ASC
-            LIMIT 5
-        ''', (user_id,))
+        execute_sql(cursor, 'goals.active', (user_id,))
         
         goals = cursor.fetchall()
-        goals_list = [dict(goal) for goal in goals]
-        
-        # Notificações não lidas
-        execute_sql(cursor, f'''
-            SELECT COUNT(*) as count FROM notifications 
-            WHERE user_id = {placeholder} AND is_read = FALSE
-        ''', (user_id,))
-        
-        unread_notifications = cursor.fetchone()['count']
+        goals_list = [with_reais(goal, 'target_amount', 'current_amount') for goal in goals]
         
         conn.close()
         
         return render_template('dashboard_executivo.html',
-                             total_income=total_income,
-                             total_expense=total_expense,
-                             balance=balance,
-                             month_income=month_income,
-                             month_expense=month_expense,
-                             month_balance=month_balance,
+                             total_income=summary.total_income,
+                             total_expense=summary.total_expense,
+                             balance=summary.balance,
+                             month_income=summary.month_income,
+                             month_expense=summary.month_expense,
+                             month_balance=summary.month_balance,
                              recent_transactions=recent_transactions_list,
                              goals=goals_list,
-                             unread_notifications=unread_notifications,
+                             unread_notifications=summary.unread_notifications,
                              format_currency=format_currency,
                              system_info=system_info,
                              now=datetime.now())
@@ -510,34 +615,27 @@ def transactions():
         
         conn = get_db_connection()
         cursor = conn.cursor()
-        placeholder = sql_placeholder()
-        
-        # Todas as transações do usuário
-        execute_sql(cursor, f'''
-            SELECT t.*, c.name as category_name, c.color as category_color
-            FROM transactions t
-            LEFT JOIN categories c ON t.category_id = c.id
-            WHERE t.user_id = {placeholder}
-            ORDER BY t.transaction_date DESC
-        ''', (user_id,))
-        
-        transactions_list = cursor.fetchall()
-        transactions_dict = [dict(trans) for trans in transactions_list]
-        
-        # Categorias para filtro
-        execute_sql(cursor, f'''
-            SELECT * FROM categories 
-            WHERE user_id = {placeholder} 
-            ORDER BY type, name
-        ''', (user_id,))
-        
-        categories = cursor.fetchall()
-        categories_dict = [dict(cat) for cat in categories]
+        
+        # Apenas a primeira página; as seguintes vêm de /api/transactions
+        transactions_dict, next_cursor = fetch_transactions_page(cursor, DB_TYPE, user_id)
+        summary = load_user_summary(user_id, cursor)
+        
+        # Categorias para filtro (visão combinada em cache)
+        categories_dict = [with_reais(cat, 'budget_limit') for cat in load_categories(user_id, cursor)
+                           if not cat['is_hidden']]
         
         conn.close()
         
         return render_template('transacoes_executivo.html',
                              transactions=transactions_dict,
+                             next_cursor=next_cursor,
+                             summary=summary,
+                             total_income=summary.total_income,
+                             total_expense=summary.total_expense,
+                             balance=summary.balance,
+                             month_income=summary.month_income,
+                             month_expense=summary.month_expense,
+                             month_balance=summary.month_balance,
                              categories=categories_dict,
                              format_currency=format_currency,
                              system_info=system_info,
@@ -548,11 +646,96 @@ def transactions():
         flash(f'Erro ao carregar transações: {str(e)}', 'danger')
         return render_template('transacoes_executivo.html',
                              transactions=[],
+                             next_cursor=None,
+                             summary=None,
                              categories=[],
                              format_currency=format_currency,
                              system_info=get_system_info(),
                              now=datetime.now())
 
+@app.route('/api/categories')
+@login_required
+def api_categories():
+    """API de categorias do usuário (padrão + próprias); ?all=1 inclui as ocultas"""
+    include_hidden = request.args.get('all') == '1'
+    try:
+        as_columns = wants_columnar()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    categories = [cat for cat in load_categories(session['user_id'])
+                  if include_hidden or not cat['is_hidden']]
+    if as_columns:
+        return jsonify(columnar(categories, money=('budget_limit',)))
+    return jsonify([with_reais(cat, 'budget_limit') for cat in categories])
+
+@app.route('/api/categories/<int:category_id>', methods=['PUT'])
+@login_required
+def api_customize_category(category_id):
+    """API para personalizar categoria (nome, cor, ícone, orçamento, oculta)"""
+    user_id = session['user_id']
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Envie um objeto JSON'}), 400
+
+    changes = {}
+    try:
+        for key in ('name', 'color', 'icon'):
+            if key in data:
+                value = str(data[key] or '').strip()
+                if not value:
+                    raise ValueError(f'{key} não pode ser vazio')
+                changes[key] = value[:100]
+        if 'budget_limit' in data:
+            changes['budget_limit_cents'] = to_cents(data['budget_limit'] or 0)
+            if changes['budget_limit_cents'] < 0:
+                raise ValueError('orçamento não pode ser negativo')
+        if 'hidden' in data:
+            changes['is_hidden'] = bool(data['hidden'])
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if not customize_category(cursor, DB_TYPE, user_id, category_id, changes):
+        conn.rollback()
+        return jsonify({'success': False, 'error': 'Categoria não encontrada'}), 404
+    data_versions.bump(user_id, cursor)
+    conn.commit()
+    invalidate_user_data(user_id)
+
+    return jsonify({'success': True})
+
+@app.route('/api/transactions')
+@login_required
+def api_transactions():
+    """API de transações paginada por cursor (?format=columnar para gráficos)"""
+    try:
+        user_id = session['user_id']
+        filters = parse_filters(request.args)
+        after = request.args.get('cursor')
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        as_columns = wants_columnar()
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        rows, next_cursor = fetch_transactions_page(cursor, DB_TYPE, user_id, filters, after, limit,
+                                                    columnar=as_columns)
+        conn.close()
+        
+        return jsonify({
+            'success': True,
+            'count': len(rows['data']['id']) if as_columns else len(rows),
+            'transactions': rows,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        })
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/api/add_transaction', methods=['POST'])
 @login_required
 def add_transaction():
@@ -563,36 +746,127 @@ def add_transaction():
         data = request.get_json()
         
         trans_type = data.get('type')
-        amount = float(data.get('amount', 0))
+        amount_cents = to_cents(data.get('amount', 0))
         description = data.get('description', '').strip()
-        category_id = data.get('category_id')
+        category_id = int(data['category_id']) if data.get('category_id') else None
         transaction_date = data.get('transaction_date', datetime.now().strftime('%Y-%m-%d'))
         
-        if not trans_type or amount <= 0:
+        if not trans_type or amount_cents <= 0:
             return jsonify({'success': False, 'error': 'Dados inválidos'})
         
         conn = get_db_connection()
         cursor = conn.cursor()
-        placeholder = sql_placeholder()
         
-        execute_sql(cursor, f'''
-            INSERT INTO transactions (user_id, type, category_id, amount, description, transaction_date)
-            VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
-        ''', (user_id, trans_type, category_id, amount, description, transaction_date))
+        execute_sql(cursor, 'transactions.insert',
+                   (user_id, trans_type, category_id, amount_cents, description, transaction_date))
         
-        conn.commit()
-        conn.close()
+        # Atualiza os agregados mensais no mesmo commit
+        apply_transaction(cursor, DB_TYPE, user_id, trans_type, category_id, amount_cents, transaction_date)
         
-        # Criar notificação
+        # Notificação no mesmo commit da transação
         tipo = "Receita" if trans_type == 'income' else "Despesa"
-        create_notification(user_id, f'Nova {tipo} adicionada', 
-                          f'{tipo} de R$ {amount:.2f} registrada: {description}', 'info')
+        notification = create_notification(user_id, f'Nova {tipo} adicionada', 
+                                           f'{tipo} de R$ {from_cents(amount_cents):.2f} registrada: {description}', 'info',
+                                           cursor=cursor)
+        
+        data_versions.bump(user_id, cursor)
+        conn.commit()
+        conn.close()
+        invalidate_user_data(user_id)
+        publish_notification(notification)
         
         return jsonify({'success': True, 'message': 'Transação adicionada!'})
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/transactions/export')
+@login_required
+def export_transactions():
+    """API para exportar transações em CSV (streaming; ?gzip=1 compacta)"""
+    user_id = session['user_id']
+    
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    compress = request.args.get('gzip') in ('1', 'true')
+    
+    def generate():
+        conn = get_db_connection()
+        try:
+            rows = iter_transactions(conn, DB_TYPE, user_id, filters)
+            yield from ExportadorStream.gerar_csv(rows, ExportadorStream.COLUNAS_TRANSACOES, compactar=compress)
+        finally:
+            conn.close()
+    
+    filename = f"transacoes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv" + ('.gz' if compress else '')
+    response = Response(stream_with_context(generate()),
+                        mimetype='application/gzip' if compress else 'text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/transactions/bulk', methods=['POST'])
+@login_required
+def bulk_transactions():
+    """API para importar transações em lote (array JSON ou CSV)"""
+    user_id = session['user_id']
+    strict = request.args.get('strict') in ('1', 'true')
+    
+    try:
+        if request.mimetype in ('text/csv', 'application/csv'):
+            # CSV lido do corpo em streaming, bloco a bloco
+            rows = iter_csv(request.stream, request.mimetype_params.get('charset', 'utf-8-sig'))
+        else:
+            data = request.get_json(silent=True)
+            if isinstance(data, dict):
+                data = data.get('transactions')
+            if not isinstance(data, list):
+                return jsonify({'success': False, 'error': 'Envie um array JSON de transações ou um CSV'}), 400
+            if len(data) > MAX_ROWS:
+                return jsonify({'success': False, 'error': f'Máximo de {MAX_ROWS} linhas por requisição'}), 413
+            rows = data
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            result = import_transactions(cursor, DB_TYPE, user_id, rows, strict=strict)
+        except Exception:
+            conn.rollback()
+            conn.close()
+            raise
+        
+        notification = None
+        if result.inserted:
+            # Uma notificação-resumo para o lote inteiro
+            notification = create_notification(
+                user_id, 'Importação concluída',
+                f'{result.inserted} transações importadas '
+                f'(receitas R$ {from_cents(result.income_cents):.2f}, despesas R$ {from_cents(result.expense_cents):.2f})'
+                + (f', {result.error_count} rejeitadas' if result.error_count else ''),
+                'success' if not result.error_count else 'warning',
+                cursor=cursor)
+            data_versions.bump(user_id, cursor)
+            conn.commit()
+        else:
+            conn.rollback()
+        conn.close()
+        
+        if notification is not None:
+            invalidate_user_data(user_id)
+            publish_notification(notification)
+        
+        return jsonify(dict(result.to_dict(), success=result.inserted > 0 or not result.error_count))
+        
+    except TooManyRows as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/goals')
 @login_required
 def goals():
@@ -603,16 +877,11 @@ def goals():
         
         conn = get_db_connection()
         cursor = conn.cursor()
-        placeholder = sql_placeholder()
         
-        execute_sql(cursor, f'''
-            SELECT * FROM goals 
-            WHERE user_id = {placeholder}
-            ORDER BY deadline ASC
-        ''', (user_id,))
+        execute_sql(cursor, 'goals.by_user', (user_id,))
         
         goals_list = cursor.fetchall()
-        goals_dict = [dict(goal) for goal in goals_list]
+        goals_dict = [with_reais(goal, 'target_amount', 'current_amount') for goal in goals_list]
         
         conn.close()
         
@@ -642,21 +911,13 @@ def profile():
         
         conn = get_db_connection()
         cursor = conn.cursor()
-        placeholder = sql_placeholder()
         
-        execute_sql(cursor, f'SELECT * FROM users WHERE id = {placeholder}', (user_id,))
+        execute_sql(cursor, 'users.by_id', (user_id,))
         user = cursor.fetchone()
         user_dict = dict(user) if user else {}
         
-        # Estatísticas do usuário
-        execute_sql(cursor, f'''
-            SELECT 
-                COUNT(*) as total_transactions,
-                SUM(CASE WHEN type = 'income' THEN amount ELSE 0 END) as total_income,
-                SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END) as total_expense
-            FROM transactions 
-            WHERE user_id = {placeholder}
-        ''', (user_id,))
+        # Estatísticas do usuário (agregados mensais)
+        execute_sql(cursor, 'rollups.user_totals', (user_id,))
         
         stats = cursor.fetchone()
         
@@ -664,7 +925,7 @@ def profile():
         
         return render_template('perfil_executivo.html',
                              user=user_dict,
-                             stats=dict(stats) if stats else {},
+                             stats=with_reais(stats, 'total_income', 'total_expense') if stats else {},
                              format_currency=format_currency,
                              system_info=system_info,
                              developer_info=developer_info,
@@ -683,93 +944,61 @@ def profile():
     
 @app.route('/api/monthly_data')
 @login_required
+@versioned
 def api_monthly_data():
     """API para dados mensais dos gráficos"""
     try:
         user_id = session['user_id']
+        granularity = request.args.get('granularity', 'month')
+        periods = request.args.get('periods', request.args.get('months', 6), type=int)
+        month = datetime.now().strftime('%Y-%m')
+        
+        payload = user_cache.get_or_set(
+            user_id, f'monthly_data:{granularity}:{periods}:{month}',
+            lambda: build_monthly_data(user_id, granularity, periods))
         
+        return jsonify(dict(payload, success=True))
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def build_monthly_data(user_id, granularity, periods, cursor=None):
+    """Série temporal e despesas por categoria do mês atual"""
+    conn = None
+    if cursor is None:
         conn = get_db_connection()
         cursor = conn.cursor()
-        placeholder = sql_placeholder()
-        
-        # Dados dos últimos 6 meses
-        months = []
-        income_data = []
-        expense_data = []
-        
-        for i in range(5, -1, -1):
-            date = datetime.now() - timedelta(days=30*i)
-            month_year = date.strftime('%Y-%m')
-            month_name = date.strftime('%b')
-            months.append(month_name)
-            
-            if DB_TYPE == 'postgresql':
-                execute_sql(cursor, 
-                           f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'income' AND TO_CHAR(transaction_date, 'YYYY-MM') = {placeholder}", 
-                           (user_id, month_year))
-            else:
-                execute_sql(cursor, 
-                           f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'income' AND strftime('%Y-%m', transaction_date) = {placeholder}", 
-                           (user_id, month_year))
-            income = float(cursor.fetchone()['total'])
-            income_data.append(income)
-            
-            if DB_TYPE == 'postgresql':
-                execute_sql(cursor, 
-                           f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'expense' AND TO_CHAR(transaction_date, 'YYYY-MM') = {placeholder}", 
-                           (user_id, month_year))
-            else:
-                execute_sql(cursor, 
-                           f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'expense' AND strftime('%Y-%m', transaction_date) = {placeholder}", 
-                           (user_id, month_year))
-            expense = float(cursor.fetchone()['total'])
-            expense_data.append(expense)
-        
-        # Dados por categoria (este mês)
-        current_month = datetime.now().strftime('%Y-%m')
-        categories_data = []
-        
-        if DB_TYPE == 'postgresql':
-            execute_sql(cursor, f'''
-                SELECT c.name, c.color, COALESCE(SUM(t.amount), 0) as total
-                FROM transactions t
-                JOIN categories c ON t.category_id = c.id
-                WHERE t.user_id = {placeholder} AND t.type = 'expense'
-                AND TO_CHAR(t.transaction_date, 'YYYY-MM') = {placeholder}
-                GROUP BY c.id, c.name, c.color
-                ORDER BY total DESC
-                LIMIT 5
-            ''', (user_id, current_month))
-        else:
-            execute_sql(cursor, f'''
-                SELECT c.name, c.color, COALESCE(SUM(t.amount), 0) as total
-                FROM transactions t
-                JOIN categories c ON t.category_id = c.id
-                WHERE t.user_id = {placeholder} AND t.type = 'expense'
-                AND strftime('%Y-%m', t.transaction_date) = {placeholder}
-                GROUP BY c.id
-                ORDER BY total DESC
-                LIMIT 5
-            ''', (user_id, current_month))
-        
-        categories = cursor.fetchall()
+    
+    try:
+        # Série mensal (ou semana/trimestre/ano) em uma única consulta agrupada
+        series = get_time_series(cursor, DB_TYPE, user_id, granularity, periods)
         
-        conn.close()
+        # Dados por categoria (este mês, a partir dos agregados mensais)
+        month_start, _ = range_params(*month_range())
         
-        return jsonify({
-            'success': True,
-            'months': months,
-            'income': income_data,
-            'expense': expense_data,
-            'categories': {
-                'labels': [cat['name'] for cat in categories],
-                'colors': [cat['color'] for cat in categories],
-                'data': [float(cat['total']) for cat in categories]
-            }
-        })
+        execute_sql(cursor, 'rollups.top_expense_categories', (user_id, month_start))
         
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})    
+        top_categories = cursor.fetchall()
+        by_id = {cat['id']: cat for cat in load_categories(user_id, cursor)}
+    finally:
+        if conn is not None:
+            conn.close()
+    
+    # Nome e cor vêm da visão combinada (personalização do usuário incluída)
+    categories = [dict(by_id.get(row['category_id'], {'name': 'Outros', 'color': '#636e72'}),
+                       total_cents=row['total_cents']) for row in top_categories]
+    
+    return {
+        'months': series.labels(),
+        'income': series.income,
+        'expense': series.expense,
+        'series': series.to_dict(),
+        'categories': {
+            'labels': [cat['name'] for cat in categories],
+            'colors': [cat['color'] for cat in categories],
+            'data': [from_cents(cat['total_cents']) for cat in categories]
+        }
+    }
 
 @app.route('/analytics')
 @login_required
@@ -826,111 +1055,364 @@ def health():
         'database': DB_TYPE
     })
 
+@app.route('/api/metrics')
+@metrics_required
+def metrics():
+    """API de métricas internas (pool, consultas, cache, compressão e streams)"""
+    return jsonify({
+        'pool': db_pool.stats(),
+        'queries': queries.stats(),
+        'auth': password_hasher.stats(),
+        'cache': user_cache.stats(),
+        'compression': response_compressor.stats(),
+        'json_encoder': app.json.encoder,
+        'data_versions': data_versions.stats(),
+        'streams': event_broker.stats(),
+        'notifications': notification_writer.stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
 @app.route('/api/quick_stats')
 @login_required
+@versioned
 def quick_stats():
     """API para estatísticas rápidas"""
     try:
         user_id = session['user_id']
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        placeholder = sql_placeholder()
+        return jsonify(dict(build_quick_stats(user_id), success=True))
         
-        # Receitas do mês
-        current_month = datetime.now().strftime('%Y-%m')
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def build_quick_stats(user_id, cursor=None):
+    """Estatísticas rápidas do usuário (rota, dashboard_data e stream SSE)"""
+    summary = load_user_summary(user_id, cursor)
+    return {
+        'balance': summary.balance,
+        'total_income': summary.total_income,
+        'total_expense': summary.total_expense,
+        'month_income': summary.month_income,
+        'month_expense': summary.month_expense,
+        'month_balance': summary.month_balance,
+        'active_goals': summary.active_goals,
+        'unread_notifications': summary.unread_notifications,
+        'formatted': {
+            'month_income': format_currency(summary.month_income),
+            'month_expense': format_currency(summary.month_expense),
+            'month_balance': format_currency(summary.month_balance)
+        }
+    }
+
+@app.route('/api/dashboard_data')
+@login_required
+@versioned
+def api_dashboard_data():
+    """API do dashboard em uma chamada (polling de executive-dashboard.js)"""
+    try:
+        user_id = session['user_id']
+        month = datetime.now().strftime('%Y-%m')
         
-        if DB_TYPE == 'postgresql':
-            execute_sql(cursor, 
-                       f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'income' AND TO_CHAR(transaction_date, 'YYYY-MM') = {placeholder}", 
-                       (user_id, current_month))
-        else:
-            execute_sql(cursor, 
-                       f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'income' AND strftime('%Y-%m', transaction_date) = {placeholder}", 
-                       (user_id, current_month))
-        month_income = float(cursor.fetchone()['total'])
-        
-        # Despesas do mês
-        if DB_TYPE == 'postgresql':
-            execute_sql(cursor, 
-                       f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'expense' AND TO_CHAR(transaction_date, 'YYYY-MM') = {placeholder}", 
-                       (user_id, current_month))
-        else:
-            execute_sql(cursor, 
-                       f"SELECT COALESCE(SUM(amount), 0) as total FROM transactions WHERE user_id = {placeholder} AND type = 'expense' AND strftime('%Y-%m', transaction_date) = {placeholder}", 
-                       (user_id, current_month))
-        month_expense = float(cursor.fetchone()['total'])
+        payload = user_cache.get_or_set(user_id, f'dashboard_data:{month}',
+                                        lambda: build_dashboard_data(user_id, month))
         
-        # Metas ativas
-        execute_sql(cursor, f'''
-            SELECT COUNT(*) as count FROM goals 
-            WHERE user_id = {placeholder} AND is_completed = FALSE
-        ''', (user_id,))
-        active_goals = cursor.fetchone()['count']
-        
-        # Notificações não lidas
-        execute_sql(cursor, f'''
-            SELECT COUNT(*) as count FROM notifications 
-            WHERE user_id = {placeholder} AND is_read = FALSE
-        ''', (user_id,))
-        unread_notifications = cursor.fetchone()['count']
+        return jsonify(dict(payload, success=True))
         
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def build_dashboard_data(user_id, month):
+    """Estatísticas, série, categorias, transações recentes e metas com uma conexão
+
+    Resumo e série mensal reaproveitam as entradas de cache de
+    /api/quick_stats e /api/monthly_data. O cursor é repassado a todas as
+    leituras (inclusive da versão nas chaves de cache): o payload inteiro
+    ocupa uma única conexão do pool.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        stats = build_quick_stats(user_id, cursor)
+        monthly = user_cache.get_or_set(user_id, f'monthly_data:month:6:{month}',
+                                        lambda: build_monthly_data(user_id, 'month', 6, cursor),
+                                        cursor=cursor)
+        
+        execute_sql(cursor, 'transactions.recent', (user_id,))
+        recent = [serialize_transaction(row) for row in cursor.fetchall()]
+        
+        # Todas as metas: contagens do card e as 5 ativas mais próximas do prazo
+        execute_sql(cursor, 'goals.by_user', (user_id,))
+        goals = cursor.fetchall()
+    finally:
         conn.close()
+    
+    progress = [min(100.0, round(goal['current_amount_cents'] * 100 / goal['target_amount_cents'], 1))
+                if goal['target_amount_cents'] else 0.0 for goal in goals]
+    active = [(goal, pct) for goal, pct in zip(goals, progress) if not goal['is_completed']][:5]
+    
+    categories = monthly['categories']
+    return dict(
+        stats,
+        total_goals=len(goals),
+        completed_goals=sum(1 for goal in goals if goal['is_completed']),
+        avg_progress=round(sum(progress) / len(progress), 1) if progress else 0.0,
+        trend_data=[{'month': label, 'income': income, 'expense': expense}
+                    for label, income, expense in zip(monthly['months'], monthly['income'], monthly['expense'])],
+        category_data=[{'name': name, 'value': value, 'color': color}
+                       for name, value, color in zip(categories['labels'], categories['data'], categories['colors'])],
+        recent_transactions=recent,
+        goals=[dict(with_reais(goal, 'target_amount', 'current_amount'), progress=pct,
+                    deadline=iso(goal['deadline']) if goal['deadline'] else None)
+               for goal, pct in active],
+        goals_data=[{'title': goal['title'], 'progress': pct} for goal, pct in active],
+    )
+
+@app.route('/api/trend')
+@login_required
+@versioned
+def api_trend():
+    """API de tendência: períodos consecutivos com deltas e crescimento (?compare=mom|qoq|yoy&periods=N)"""
+    try:
+        user_id = session['user_id']
+        kind = request.args.get('compare', 'mom')
+        periods = request.args.get('periods', DEFAULT_PERIODS.get(kind, 12), type=int)
+        
+        return jsonify(dict(load_comparison(user_id, kind, periods), success=True))
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/comparative-analysis')
+@login_required
+@versioned
+def api_comparative_analysis():
+    """API de análise comparativa: período atual x anterior (?compare=mom|qoq|yoy)"""
+    try:
+        user_id = session['user_id']
+        kind = request.args.get('compare', 'mom')
+        comparison = load_comparison(user_id, kind, 2)
         
         return jsonify({
             'success': True,
-            'month_income': month_income,
-            'month_expense': month_expense,
-            'month_balance': month_income - month_expense,
-            'active_goals': active_goals,
-            'unread_notifications': unread_notifications,
-            'formatted': {
-                'month_income': format_currency(month_income),
-                'month_expense': format_currency(month_expense),
-                'month_balance': format_currency(month_income - month_expense)
-            }
+            'compare': kind,
+            'current_period': comparison['labels'][-1],
+            'previous_period': comparison['labels'][-2],
+            'rows': build_comparative_rows(comparison),
+            'categories': comparison['categories'],
         })
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def load_comparison(user_id, kind, periods):
+    """Comparação entre períodos (core.comparativos) via cache, com nome e cor das categorias"""
+    month = datetime.now().strftime('%Y-%m')
+    
+    def produce():
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            comparison = compare_periods(cursor, DB_TYPE, user_id, kind, periods).to_dict()
+            by_id = {cat['id']: cat for cat in load_categories(user_id, cursor)}
+        finally:
+            conn.close()
+        
+        for item in comparison['categories']:
+            category = by_id.get(item['category_id'], {'name': 'Outros', 'color': '#636e72'})
+            item.update(name=category['name'], color=category['color'])
+        return comparison
+    
+    return user_cache.get_or_set(user_id, f'comparison:{kind}:{periods}:{month}', produce)
+
+def comparative_row(indicator, change, lower_is_better=False, formatter=format_currency):
+    """Linha da tabela comparativa (insights.js): atual, anterior e variação"""
+    delta, growth = change['delta'], change['growth']
+    if growth is None:
+        difference = 'novo' if change['current'] else '—'
+    else:
+        difference = f"{growth:+.1f}%".replace('.', ',')
+    
+    if not delta:
+        difference_class = 'text-muted'
+    elif (delta < 0) == lower_is_better:
+        difference_class = 'text-success'
+    else:
+        difference_class = 'text-danger'
+    
+    return {
+        'indicator': indicator,
+        'your_value': formatter(change['current']),
+        'average_value': formatter(change['previous']),
+        'difference': difference,
+        'difference_class': difference_class,
+        'current': change['current'],
+        'previous': change['previous'],
+        'growth': growth,
+    }
+
+def build_comparative_rows(comparison):
+    """Indicadores gerais e as categorias que mais variaram"""
+    current = comparison['current']
+    series = comparison['series']
+    
+    def savings_rate(i):
+        income = series['income']['values'][i]
+        return round(series['balance']['values'][i] * 100 / income, 1) if income else 0.0
+    
+    rate_now, rate_before = savings_rate(-1), savings_rate(-2)
+    rate_change = {'current': rate_now, 'previous': rate_before,
+                   'delta': round(rate_now - rate_before, 1), 'growth': None}
+    rate_row = comparative_row('Taxa de poupança', rate_change,
+                               formatter=lambda value: f"{value:.1f}%".replace('.', ','))
+    rate_row['difference'] = f"{rate_change['delta']:+.1f}".replace('.', ',') + ' p.p.'
+    
+    count_now, count_before = series['transactions'][-1], series['transactions'][-2]
+    count_change = {'current': count_now, 'previous': count_before,
+                    'delta': count_now - count_before, 'growth': growth_rate(count_now, count_before)}
+    
+    rows = [
+        comparative_row('Receitas', current['income']),
+        comparative_row('Despesas', current['expense'], lower_is_better=True),
+        comparative_row('Saldo', current['balance']),
+        rate_row,
+        comparative_row('Transações', count_change, formatter=str),
+    ]
+    for item in comparison['categories'][:5]:
+        label = 'Receita' if item['type'] == 'income' else 'Despesa'
+        rows.append(comparative_row(f"{item['name']} ({label})", item,
+                                    lower_is_better=item['type'] == 'expense'))
+    return rows
+
+@app.route('/api/stream')
+@login_required
+def api_stream():
+    """Stream SSE com variações das estatísticas e novas notificações"""
+    user_id = session['user_id']
+    
+    # Worker síncrono: o stream prenderia o único processo; o cliente faz polling
+    if not request.environ.get('wsgi.multithread'):
+        return jsonify({'success': False, 'error': 'Stream indisponível'}), 503
+    
+    try:
+        subscription = event_broker.subscribe(user_id)
+    except StreamLimitReached:
+        # O cliente volta ao polling
+        return jsonify({'success': False, 'error': 'Stream indisponível'}), 503
+    
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            last_stats = build_quick_stats(user_id)
+            last_version = data_versions.get(user_id, fresh=True)
+            yield format_sse('stats', last_stats)
+            
+            deadline = time.monotonic() + SSE_MAX_SECONDS
+            while time.monotonic() < deadline:
+                try:
+                    event, data = subscription.get(timeout=SSE_HEARTBEAT)
+                except queue.Empty:
+                    event, data = None, None
+                
+                if event == 'notification':
+                    yield format_sse('notification', data)
+                    continue
+                
+                # Escritas feitas em outro worker só aparecem pela versão compartilhada
+                version = data_versions.get(user_id, fresh=True)
+                if version == last_version:
+                    yield ': keepalive\n\n'
+                    continue
+                last_version = version
+                
+                stats = build_quick_stats(user_id)
+                delta = {key: value for key, value in stats.items() if last_stats.get(key) != value}
+                last_stats = stats
+                if delta:
+                    yield format_sse('stats', delta)
+            
+            # Encerrar periodicamente libera a thread; o EventSource reconecta sozinho
+            yield format_sse('reconnect', {})
+        finally:
+            event_broker.unsubscribe(subscription)
+    
+    response = Response(stream_with_context(generate()),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Libera a vaga mesmo se o cliente desconectar antes do primeiro evento
+    response.call_on_close(lambda: event_broker.unsubscribe(subscription))
+    return response
 
 @app.route('/api/notifications')
 @login_required
+@versioned
 def api_notifications():
-    """API para notificações"""
+    """API para notificações (incremental com ?since=<último id>)
+
+    As notificações saem em colunas ({columns, data}), direto do cursor.
+    """
     try:
         user_id = session['user_id']
+        since = request.args.get('since', type=int)
+        limit = request.args.get('limit', 10, type=int)
+        unread_only = request.args.get('unread') in ('1', 'true')
         
         conn = get_db_connection()
         cursor = conn.cursor()
-        placeholder = sql_placeholder()
+        notifications_table, has_more = fetch_notifications(cursor, DB_TYPE, user_id, since, limit, unread_only)
+        unread = unread_count(cursor, DB_TYPE, user_id)
+        conn.close()
         
-        execute_sql(cursor, f'''
-            SELECT * FROM notifications 
-            WHERE user_id = {placeholder}
-            ORDER BY created_at DESC
-            LIMIT 10
-        ''', (user_id,))
+        ids = notifications_table['data']['id']
+        last_id = max(ids, default=since)
         
-        notifications = cursor.fetchall()
-        notifications_list = [dict(n) for n in notifications]
+        return jsonify({
+            'success': True,
+            'count': len(ids),
+            'notifications': notifications_table,
+            'unread': unread,
+            'last_id': last_id,
+            'has_more': has_more
+        })
         
-        # Marcar como lidas
-        execute_sql(cursor, f'''
-            UPDATE notifications 
-            SET is_read = TRUE 
-            WHERE user_id = {placeholder} AND is_read = FALSE
-        ''', (user_id,))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/notifications/ack', methods=['POST'])
+@login_required
+def api_notifications_ack():
+    """API para marcar notificações como lidas ({"ids": [...]} ou {"all": true})"""
+    try:
+        user_id = session['user_id']
+        data = request.get_json(silent=True) or {}
         
+        ids = None
+        if not data.get('all'):
+            ids = data.get('ids')
+            if not isinstance(ids, list) or len(ids) > MAX_ACK_IDS:
+                return jsonify({'success': False, 'error': f'Informe "ids" (até {MAX_ACK_IDS}) ou "all"'}), 400
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        marked = acknowledge(cursor, DB_TYPE, user_id, ids)
+        unread = unread_count(cursor, DB_TYPE, user_id)
+        if marked > 0:
+            data_versions.bump(user_id, cursor)
         conn.commit()
         conn.close()
+        if marked > 0:
+            invalidate_user_data(user_id)
         
-        return jsonify({
-            'success': True,
-            'count': len(notifications_list),
-            'notifications': notifications_list
-        })
+        return jsonify({'success': True, 'acknowledged': marked, 'unread': unread})
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -944,12 +1426,9 @@ def api_system_report():
         
         conn = get_db_connection()
         cursor = conn.cursor()
-        placeholder = sql_placeholder()
         
         # Estatísticas do usuário
-        execute_sql(cursor, 
-                   f"SELECT COUNT(*) as total FROM transactions WHERE user_id = {placeholder}", 
-                   (user_id,))
+        execute_sql(cursor, 'rollups.user_totals', (user_id,))
         
         user_stats = cursor.fetchone()
         conn.close()
@@ -957,7 +1436,7 @@ def api_system_report():
         report = {
             'system': system_info,
             'user_stats': {
-                'total_transactions': user_stats['total'] if user_stats else 0
+                'total_transactions': user_stats['total_transactions'] if user_stats else 0
             },
             'generated_at': datetime.now().isoformat(),
             'report_id': f"CS-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
@@ -969,6 +1448,14 @@ def api_system_report():
 
 # ===== INICIALIZAÇÃO =====
 
+# Gunicorn importa o módulo sem passar por __main__: aplica migrações pendentes
+if __name__ != '__main__' and os.environ.get('AUTO_MIGRATE', '1') != '0':
+    migrate_database()
+
+# Workers novos já começam com os templates carregados (do bytecode em disco)
+if os.environ.get('TEMPLATE_WARMUP', '1') != '0':
+    warm_templates(app.jinja_env, EXECUTIVE_TEMPLATES)
+
 if __name__ == '__main__':
     # Garantir diretórios
     os.makedirs('templates', exist_ok=True)
@@ -0,0 +1,95 @@
+"""
+Agregados mensais de transações mantidos incrementalmente
+
+A tabela transaction_rollups guarda soma (em centavos) e quantidade por
+(user_id, month, type, category_id). Toda escrita em transactions deve
+aplicar o delta correspondente no mesmo commit; rebuild_rollups()
+reconstrói tudo a partir da tabela crua.
+"""
+
+from collections import defaultdict
+
+from core.consultas import placeholder, register, run_many
+from core.periodos import bucket_start
+
+# Mês da transação como 'YYYY-MM-01' (mesmo formato da coluna month)
+MONTH_EXPRESSIONS = {
+    'sqlite': "strftime('%Y-%m-01', transaction_date)",
+    'postgresql': "DATE_TRUNC('month', transaction_date)::date",
+}
+
+NO_CATEGORY = 0
+
+
+def rollup_key(user_id, trans_type, category_id, transaction_date):
+    """Chave do agregado para uma transação"""
+    month = bucket_start(transaction_date, 'month').isoformat()
+    return (int(user_id), month, trans_type, int(category_id or NO_CATEGORY))
+
+
+register({
+    'rollups.upsert': '''
+        INSERT INTO transaction_rollups (user_id, month, type, category_id, total_cents, tx_count)
+        VALUES ({p}, {p}, {p}, {p}, {p}, {p})
+        ON CONFLICT (user_id, month, type, category_id) DO UPDATE SET
+            total_cents = transaction_rollups.total_cents + excluded.total_cents,
+            tx_count = transaction_rollups.tx_count + excluded.tx_count
+    ''',
+})
+
+
+def apply_deltas(cursor, db_type, deltas):
+    """Aplica deltas {chave: (centavos, quantidade)} em lote
+
+    Não faz commit: o chamador confirma junto com a escrita em transactions.
+    """
+    rows = [key + (amount, count) for key, (amount, count) in deltas.items() if count or amount]
+    if rows:
+        run_many(cursor, db_type, 'rollups.upsert', rows)
+
+
+def apply_transaction(cursor, db_type, user_id, trans_type, category_id, amount_cents,
+                      transaction_date, sign=1):
+    """Soma (sign=1) ou remove (sign=-1) uma transação dos agregados"""
+    key = rollup_key(user_id, trans_type, category_id, transaction_date)
+    apply_deltas(cursor, db_type, {key: (sign * int(amount_cents), sign)})
+
+
+def collect_deltas(transactions, sign=1):
+    """Agrupa transações (dicts) em deltas por chave de agregado"""
+    deltas = defaultdict(lambda: [0, 0])
+    for trans in transactions:
+        key = rollup_key(trans['user_id'], trans['type'], trans.get('category_id'),
+                         trans['transaction_date'])
+        deltas[key][0] += sign * int(trans['amount_cents'])
+        deltas[key][1] += sign
+    return {key: tuple(value) for key, value in deltas.items()}
+
+
+def rebuild_rollups(cursor, db_type, user_id=None):
+    """Reconstrói os agregados a partir de transactions (todos ou de um usuário)"""
+    p = placeholder(db_type)
+    where = f'WHERE user_id = {p}' if user_id is not None else ''
+    params = (user_id,) if user_id is not None else ()
+
+    cursor.execute(f'DELETE FROM transaction_rollups {where}', params)
+    cursor.execute(f'''
+        INSERT INTO transaction_rollups (user_id, month, type, category_id, total_cents, tx_count)
+        SELECT user_id, {MONTH_EXPRESSIONS[db_type]}, type, COALESCE(category_id, {NO_CATEGORY}),
+               SUM(amount_cents), COUNT(*)
+        FROM transactions
+        {where}
+        GROUP BY 1, 2, 3, 4
+    ''', params)
+
+
+def ensure_rollups(cursor, db_type):
+    """Popula os agregados na primeira execução sobre uma base existente"""
+    cursor.execute('SELECT COUNT(*) AS total FROM transaction_rollups')
+    if cursor.fetchone()['total']:
+        return False
+    cursor.execute('SELECT COUNT(*) AS total FROM transactions')
+    if not cursor.fetchone()['total']:
+        return False
+    rebuild_rollups(cursor, db_type)
+    return True
@@ -0,0 +1,200 @@
+"""
+Cache de leituras por usuário com invalidação na escrita
+
+Camada 1: LRU em memória com TTL (por processo).
+Camada 2 (opcional): arquivo SQLite local compartilhado entre os workers
+do gunicorn. As chaves incluem a versão dos dados do usuário
+(core.versoes); invalidar incrementa a versão, o que torna inalcançáveis
+todas as entradas antigas dele nas duas camadas.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """LRU thread-safe com expiração por entrada"""
+
+    def __init__(self, maxsize=2048):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Retorna (encontrado, valor)"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return False, None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SharedStore:
+    """Armazenamento chave/valor em SQLite local, visível a todos os workers"""
+
+    CLEANUP_EVERY = 500
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires REAL NOT NULL
+            )
+        ''')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT value, expires FROM cache_entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return False, None
+        return True, json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)',
+            (key, json.dumps(value, default=str), time.time() + ttl)
+        )
+        self._writes += 1
+        if self._writes % self.CLEANUP_EVERY == 0:
+            conn.execute('DELETE FROM cache_entries WHERE expires < ?', (time.time(),))
+
+    def delete_user(self, user_id):
+        self._conn().execute('DELETE FROM cache_entries WHERE key LIKE ?', (f'u{int(user_id)}:%',))
+
+
+class UserCache:
+    """Cache de modelos de leitura por usuário com contadores de uso"""
+
+    def __init__(self, versions, maxsize=2048, ttl=60, shared_path=None):
+        self.ttl = ttl
+        self.versions = versions
+        self.local = LRUCache(maxsize)
+        self.shared = SharedStore(shared_path) if shared_path else None
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'shared_hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+            'errors': 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _key(self, user_id, name, cursor=None, versioned=True):
+        if not versioned:
+            return f'u{int(user_id)}:{name}'
+        return f'u{int(user_id)}:v{self.versions.get(user_id, cursor)}:{name}'
+
+    def get_or_set(self, user_id, name, producer, ttl=None, cursor=None, versioned=True):
+        """Retorna o valor em cache ou calcula com producer() e guarda
+
+        `cursor` é o da rota: a versão é lida nele, sem outra conexão do pool.
+        `versioned=False` para valores que não dependem dos dados do usuário:
+        a chave fica sem a versão e não há leitura no banco.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        key = self._key(user_id, name, cursor, versioned)
+
+        found, value = self.local.get(key)
+        if found:
+            self._count('hits')
+            return value
+
+        if self.shared is not None:
+            try:
+                found, value = self.shared.get(key)
+            except sqlite3.Error:
+                found = False
+                self._count('errors')
+            if found:
+                self._count('shared_hits')
+                self.local.set(key, value, ttl)
+                return value
+
+        self._count('misses')
+        value = producer()
+        self.local.set(key, value, ttl)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value, ttl)
+            except sqlite3.Error:
+                self._count('errors')
+        return value
+
+    def invalidate(self, user_id, bump=True):
+        """Descarta tudo o que foi guardado para o usuário (nova versão dos dados)
+
+        `bump=False` quando a versão já foi incrementada na transação da escrita.
+        """
+        if bump:
+            self.versions.bump(user_id)
+        self._count('invalidations')
+        if self.shared is not None:
+            try:
+                self.shared.delete_user(user_id)
+            except sqlite3.Error:
+                self._count('errors')
+
+    def stats(self):
+        """Contadores de acerto/erro/remoção para monitoramento"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['shared_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['shared_hits']) / lookups, 4) if lookups else 0.0
+        stats['evictions'] = self.local.evictions
+        stats['expirations'] = self.local.expirations
+        stats['size'] = len(self.local)
+        stats['maxsize'] = self.local.maxsize
+        stats['ttl'] = self.ttl
+        stats['shared'] = self.shared.path if self.shared is not None else None
+        return stats
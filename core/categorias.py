@@ -0,0 +1,96 @@
+"""
+Categorias padrão globais com personalização por usuário
+
+As categorias padrão existem uma única vez (user_id = GLOBAL_USER_ID) e
+valem para todos os usuários. Personalizar uma delas cria uma linha do
+usuário com overrides_id apontando para a padrão, que sobrepõe nome, cor,
+ícone, orçamento ou a oculta. A personalização guarda só os campos que o
+usuário mudou (os demais ficam NULL e seguem a padrão); o tipo é copiado
+porque não é editável. As transações sempre referenciam o id da
+padrão. As categorias próprias do usuário ficam ao lado.
+
+A visão combinada sai de uma única consulta e o app a guarda no cache
+por usuário.
+"""
+
+from core.consultas import placeholder, register, run
+
+GLOBAL_USER_ID = 0
+
+EDITABLE_FIELDS = ('name', 'color', 'icon', 'budget_limit_cents', 'is_hidden')
+
+
+register({
+    # Padrões com a personalização do usuário aplicada, mais as categorias dele
+    'categories.merged': f'''
+        SELECT c.id, c.type,
+               COALESCE(o.name, c.name) AS name,
+               COALESCE(o.color, c.color) AS color,
+               COALESCE(o.icon, c.icon) AS icon,
+               COALESCE(o.budget_limit_cents, c.budget_limit_cents, 0) AS budget_limit_cents,
+               COALESCE(o.is_hidden, c.is_hidden, FALSE) AS is_hidden,
+               c.user_id = {GLOBAL_USER_ID} AS is_default
+        FROM categories c
+        LEFT JOIN categories o ON o.overrides_id = c.id AND o.user_id = {{p}}
+        WHERE c.user_id IN ({GLOBAL_USER_ID}, {{p}}) AND c.overrides_id IS NULL
+        ORDER BY c.type, COALESCE(o.name, c.name)
+    ''',
+})
+
+
+def merged_categories(cursor, db_type, user_id):
+    """Visão combinada do usuário (inclui as ocultas, marcadas em is_hidden)"""
+    run(cursor, db_type, 'categories.merged', (user_id, user_id))
+    return [{
+        'id': int(row['id']),
+        'type': row['type'],
+        'name': row['name'],
+        'color': row['color'],
+        'icon': row['icon'],
+        'budget_limit_cents': int(row['budget_limit_cents'] or 0),
+        'is_hidden': bool(row['is_hidden']),
+        'is_default': bool(row['is_default']),
+    } for row in cursor.fetchall()]
+
+
+def customize_category(cursor, db_type, user_id, category_id, changes):
+    """Aplica `changes` (subconjunto de EDITABLE_FIELDS) sem commit
+
+    Categoria própria é alterada no lugar; padrão ganha (ou atualiza) a
+    linha de personalização do usuário. Retorna False se a categoria não
+    for visível para o usuário.
+    """
+    p = placeholder(db_type)
+    changes = {key: value for key, value in changes.items() if key in EDITABLE_FIELDS}
+
+    cursor.execute(f'''
+        SELECT id, user_id, type FROM categories
+        WHERE id = {p} AND user_id IN ({GLOBAL_USER_ID}, {p}) AND overrides_id IS NULL
+    ''', (category_id, user_id))
+    category = cursor.fetchone()
+    if category is None:
+        return False
+    if not changes:
+        return True
+
+    if int(category['user_id']) != GLOBAL_USER_ID:
+        target = category_id
+    else:
+        cursor.execute(f'SELECT id FROM categories WHERE user_id = {p} AND overrides_id = {p}',
+                       (user_id, category_id))
+        override = cursor.fetchone()
+        if override is None:
+            # Campos nulos seguem a padrão; só o que está em `changes` é gravado abaixo
+            cursor.execute(f'''
+                INSERT INTO categories (user_id, type, overrides_id, name, color, icon, budget_limit_cents, is_hidden)
+                VALUES ({p}, {p}, {p}, NULL, NULL, NULL, NULL, NULL)
+            ''', (user_id, category['type'], category_id))
+            cursor.execute(f'SELECT id FROM categories WHERE user_id = {p} AND overrides_id = {p}',
+                           (user_id, category_id))
+            override = cursor.fetchone()
+        target = override['id']
+
+    assignments = ', '.join(f'{key} = {p}' for key in changes)
+    cursor.execute(f'UPDATE categories SET {assignments} WHERE id = {p}',
+                   list(changes.values()) + [target])
+    return True
@@ -0,0 +1,141 @@
+"""
+Comparação entre períodos (MoM, QoQ, YoY) a partir dos agregados mensais
+
+Tudo sai de transaction_rollups (uma linha por mês, tipo e categoria), nunca
+da tabela de transações: comparar cinco anos lê 60 meses de agregados, o
+mesmo custo de ordem de grandeza de comparar um mês. Os meses são somados
+no período (trimestre, ano) em Python, então a consulta é a mesma nos dois
+bancos.
+
+O período mais recente é o que contém `end` (padrão: hoje) e pode estar em
+andamento.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Tuple
+
+from core.agregados import NO_CATEGORY
+from core.consultas import register, run
+from core.dinheiro import from_cents
+from core.periodos import bucket_start, range_params, shift_bucket
+from core.series import MAX_PERIODS, bucket_label
+
+# Tipo de comparação -> granularidade dos períodos
+COMPARISONS = {'mom': 'month', 'qoq': 'quarter', 'yoy': 'year'}
+
+# Períodos padrão de /api/trend
+DEFAULT_PERIODS = {'mom': 12, 'qoq': 8, 'yoy': 5}
+
+TYPES = ('income', 'expense')
+
+
+register({
+    'rollups.range': '''
+        SELECT month, type, category_id, total_cents, tx_count
+        FROM transaction_rollups
+        WHERE user_id = {p} AND month >= {p} AND month < {p}
+    ''',
+})
+
+
+def growth_rate(current, previous):
+    """Variação percentual (None quando o período anterior é zero)"""
+    if not previous:
+        return None
+    return round((current - previous) * 100 / abs(previous), 1)
+
+
+def _changes(values):
+    """Bloco de uma série em centavos: valores em reais, deltas e crescimento"""
+    return {
+        'values': [from_cents(value) for value in values],
+        'delta': [None] + [from_cents(cur - prev) for prev, cur in zip(values, values[1:])],
+        'growth': [None] + [growth_rate(cur, prev) for prev, cur in zip(values, values[1:])],
+    }
+
+
+def _last_change(values):
+    current, previous = values[-1], values[-2]
+    return {
+        'current': from_cents(current),
+        'previous': from_cents(previous),
+        'delta': from_cents(current - previous),
+        'growth': growth_rate(current, previous),
+    }
+
+
+@dataclass
+class Comparison:
+    """Totais por tipo e por categoria em períodos consecutivos
+
+    As listas seguem `buckets` (do mais antigo ao atual) e ficam em
+    centavos; to_dict() devolve reais, deltas e taxas de crescimento.
+    """
+    kind: str
+    granularity: str
+    buckets: List[date] = field(default_factory=list)
+    totals: Dict[str, List[int]] = field(default_factory=dict)
+    counts: List[int] = field(default_factory=list)
+    categories: Dict[Tuple[str, int], List[int]] = field(default_factory=dict)
+
+    def balance(self) -> List[int]:
+        return [i - e for i, e in zip(self.totals['income'], self.totals['expense'])]
+
+    def to_dict(self) -> dict:
+        categories = [
+            dict(category_id=category_id, type=trans_type, **_last_change(values),
+                 values=[from_cents(value) for value in values])
+            for (trans_type, category_id), values in self.categories.items()
+        ]
+        categories.sort(key=lambda item: abs(item['delta']), reverse=True)
+        return {
+            'compare': self.kind,
+            'granularity': self.granularity,
+            'buckets': [start.isoformat() for start in self.buckets],
+            'labels': [bucket_label(start, self.granularity) for start in self.buckets],
+            'series': {
+                'income': _changes(self.totals['income']),
+                'expense': _changes(self.totals['expense']),
+                'balance': _changes(self.balance()),
+                'transactions': self.counts,
+            },
+            'current': {
+                'income': _last_change(self.totals['income']),
+                'expense': _last_change(self.totals['expense']),
+                'balance': _last_change(self.balance()),
+            },
+            'categories': categories,
+        }
+
+
+def compare_periods(cursor, db_type, user_id, kind='mom', periods=2, end=None):
+    """Compara os últimos `periods` períodos (MoM, QoQ ou YoY) até o que contém `end`"""
+    if kind not in COMPARISONS:
+        raise ValueError(f'Comparação inválida: {kind} (use {", ".join(COMPARISONS)})')
+    granularity = COMPARISONS[kind]
+    periods = max(2, min(int(periods), MAX_PERIODS[granularity]))
+
+    last = bucket_start(end, granularity)
+    first = shift_bucket(last, granularity, -(periods - 1))
+    buckets = [shift_bucket(first, granularity, i) for i in range(periods)]
+    index = {start: i for i, start in enumerate(buckets)}
+
+    run(cursor, db_type, 'rollups.range', (user_id, *range_params(first, shift_bucket(last, granularity, 1))))
+
+    comparison = Comparison(kind=kind, granularity=granularity, buckets=buckets,
+                            totals={trans_type: [0] * periods for trans_type in TYPES},
+                            counts=[0] * periods)
+    categories = defaultdict(lambda: [0] * periods)
+    for row in cursor.fetchall():
+        i = index[bucket_start(row['month'], granularity)]
+        cents = int(row['total_cents'])
+        comparison.counts[i] += int(row['tx_count'])
+        if row['type'] in comparison.totals:
+            comparison.totals[row['type']][i] += cents
+        categories[(row['type'], int(row['category_id'] or NO_CATEGORY))][i] += cents
+
+    # Categorias sem movimento na janela não entram
+    comparison.categories = {key: values for key, values in categories.items() if any(values)}
+    return comparison
@@ -0,0 +1,165 @@
+"""
+Compressão das respostas dinâmicas (HTML, JSON, CSV)
+
+O ResponseCompressor roda no after_request: escolhe br ou gzip pelo
+Accept-Encoding (respeitando q=0) e comprime o corpo inteiro ou, em
+respostas de gerador, bloco a bloco com flush — cada bloco chega ao
+cliente assim que é produzido.
+
+Ficam de fora: respostas pequenas (abaixo de min_size), 304/204/206,
+corpos que já têm Content-Encoding (variantes pré-comprimidas de
+static/dist, exportação ?gzip=1), arquivos servidos por send_file, tipos
+não textuais e Server-Sent Events. A taxa de compressão é contabilizada
+por rota (endpoint do Flask).
+"""
+
+import threading
+import zlib
+
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # opcional: sem ele só há gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset({
+    'text/html', 'text/plain', 'text/csv', 'text/css', 'text/javascript',
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+})
+
+SKIP_STATUS = frozenset({204, 206, 304})
+
+
+class ResponseCompressor:
+    """Compressão negociada por Accept-Encoding com estatísticas por rota
+
+    `level` é o nível do gzip; `brotli_quality` o do brotli (4-5 é o ponto
+    de equilíbrio para conteúdo gerado a cada requisição). `stream=False`
+    deixa respostas de gerador sem compressão.
+    """
+
+    def __init__(self, min_size=500, level=6, brotli_quality=4, stream=True):
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.stream = stream
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._skipped = {}
+
+    def choose(self, accept_encoding):
+        """Melhor codificação aceita pelo cliente (None = sem compressão)"""
+        if not accept_encoding:
+            return None
+        return parse_accept_header(accept_encoding).best_match(self.encodings)
+
+    def _skip_reason(self, response):
+        if response.status_code < 200 or response.status_code in SKIP_STATUS:
+            return 'status'
+        if 'Content-Encoding' in response.headers:
+            return 'encoded'
+        if response.direct_passthrough:
+            return 'file'
+        if response.mimetype not in COMPRESSIBLE_TYPES:
+            return 'type'
+        if 'no-transform' in response.headers.get('Cache-Control', ''):
+            return 'no-transform'
+        return None
+
+    def compress(self, response, accept_encoding, route):
+        """Comprime a resposta no lugar, se valer a pena; sempre a retorna"""
+        reason = self._skip_reason(response)
+        if reason is not None:
+            return self._skip(response, reason)
+
+        # Daqui em diante o corpo depende do Accept-Encoding
+        response.vary.add('Accept-Encoding')
+        encoding = self.choose(accept_encoding)
+        if encoding is None:
+            return self._skip(response, 'identity')
+
+        if response.is_streamed:
+            if not self.stream:
+                return self._skip(response, 'stream')
+            response.response = self._compress_stream(response.iter_encoded(), response.response,
+                                                      encoding, route)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return self._skip(response, 'small')
+            compressed = self._compress_bytes(body, encoding)
+            if len(compressed) >= len(body):
+                return self._skip(response, 'incompressible')
+            response.set_data(compressed)
+            self._record(route, len(body), len(compressed))
+
+        response.headers['Content-Encoding'] = encoding
+        # Mesmo recurso em outra codificação: a ETag deixa de ser byte a byte
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _compress_bytes(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def _compress_stream(self, chunks, original, encoding, route):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            process, flush, finish = compressor.process, compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+            process, finish = compressor.compress, compressor.flush
+            flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        size_in = size_out = 0
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                size_in += len(chunk)
+                block = process(chunk) + flush()
+                size_out += len(block)
+                yield block
+            block = finish()
+            size_out += len(block)
+            yield block
+        finally:
+            if hasattr(original, 'close'):
+                original.close()
+            self._record(route, size_in, size_out)
+
+    def _skip(self, response, reason):
+        with self._lock:
+            self._skipped[reason] = self._skipped.get(reason, 0) + 1
+        return response
+
+    def _record(self, route, size_in, size_out):
+        with self._lock:
+            stats = self._routes.setdefault(route, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0})
+            stats['responses'] += 1
+            stats['bytes_in'] += size_in
+            stats['bytes_out'] += size_out
+
+    def stats(self):
+        with self._lock:
+            routes = {route: dict(values) for route, values in self._routes.items()}
+            skipped = dict(self._skipped)
+        for values in routes.values():
+            values['ratio'] = round(values['bytes_in'] / values['bytes_out'], 2) if values['bytes_out'] else 0.0
+        return {
+            'encodings': list(self.encodings),
+            'min_size': self.min_size,
+            'level': self.level,
+            'stream': self.stream,
+            'compressed': sum(values['responses'] for values in routes.values()),
+            'skipped': skipped,
+            'routes': routes,
+        }
@@ -0,0 +1,235 @@
+"""
+Gerenciador de conexões com pool para SQLite e PostgreSQL
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+
+class PoolTimeout(RuntimeError):
+    """Nenhuma conexão ficou livre dentro do tempo limite"""
+
+
+class PooledConnection:
+    """Conexão emprestada do pool; close() devolve ao pool em vez de fechar"""
+
+    def __init__(self, manager, raw):
+        self._manager = manager
+        self._raw = raw
+        self._released = False
+
+    @property
+    def raw(self):
+        return self._raw
+
+    @property
+    def released(self):
+        return self._released
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        """Devolve a conexão ao pool"""
+        if not self._released:
+            self._released = True
+            self._manager.release(self._raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionManager:
+    """Pool de conexões thread-safe com estatísticas de uso
+
+    PostgreSQL usa um ThreadedConnectionPool do psycopg2 limitado a
+    `maxconn` conexões por processo; quando todas estão em uso a thread
+    espera até `timeout` segundos. SQLite reaproveita uma conexão por thread.
+    """
+
+    def __init__(self, db_type, database, minconn=1, maxconn=4, timeout=30.0):
+        self.db_type = db_type
+        self.database = database
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._slots = None
+        self._local = threading.local()
+        self._stats = {
+            'checkouts': 0,
+            'releases': 0,
+            'in_use': 0,
+            'peak_in_use': 0,
+            'opened': 0,
+            'discarded': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+
+    # ===== POSTGRESQL =====
+
+    def _get_pool(self):
+        """Cria o pool sob demanda (e de novo após fork do gunicorn)"""
+        pid = os.getpid()
+        if self._pool is None or self._pid != pid:
+            with self._lock:
+                if self._pool is None or self._pid != pid:
+                    from psycopg2.pool import ThreadedConnectionPool
+                    from psycopg2.extras import DictCursor
+
+                    # Conexões herdadas do processo pai não são reutilizadas
+                    self._pool = ThreadedConnectionPool(
+                        self.minconn, self.maxconn, self.database,
+                        sslmode='require', cursor_factory=DictCursor
+                    )
+                    self._slots = threading.BoundedSemaphore(self.maxconn)
+                    self._pid = pid
+                    self._stats['opened'] += self.minconn
+        return self._pool
+
+    def _checkout_postgresql(self):
+        pool = self._get_pool()
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise PoolTimeout(f'Nenhuma conexão livre após {self.timeout}s')
+        waited = time.perf_counter() - started
+
+        try:
+            opened_before = len(pool._pool) + len(pool._used)
+            raw = pool.getconn()
+            opened = (len(pool._pool) + len(pool._used)) > opened_before
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._record_checkout(waited, opened)
+        return raw
+
+    def _release_postgresql(self, raw):
+        pool = self._pool
+        discard = bool(raw.closed)
+        if not discard:
+            try:
+                # Descarta qualquer transação que o chamador não finalizou
+                raw.rollback()
+            except Exception:
+                discard = True
+
+        try:
+            if pool is not None and self._pid == os.getpid():
+                pool.putconn(raw, close=discard)
+        finally:
+            self._slots.release()
+            self._record_release(discard)
+
+    # ===== SQLITE =====
+
+    def _checkout_sqlite(self):
+        local = self._local
+        opened = False
+        if getattr(local, 'conn', None) is None or getattr(local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.database, timeout=self.timeout)
+            conn.row_factory = sqlite3.Row
+            local.conn = conn
+            local.pid = os.getpid()
+            local.depth = 0
+            opened = True
+
+        local.depth += 1
+        self._record_checkout(0.0, opened)
+        return local.conn
+
+    def _release_sqlite(self, raw):
+        local = self._local
+        local.depth = max(getattr(local, 'depth', 1) - 1, 0)
+        discard = False
+        if local.depth == 0:
+            try:
+                raw.rollback()
+            except sqlite3.Error:
+                discard = True
+                local.conn = None
+                try:
+                    raw.close()
+                except sqlite3.Error:
+                    pass
+        self._record_release(discard)
+
+    # ===== API PÚBLICA =====
+
+    def connection(self):
+        """Empresta uma conexão do pool"""
+        if self.db_type == 'postgresql':
+            raw = self._checkout_postgresql()
+        else:
+            raw = self._checkout_sqlite()
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        """Devolve uma conexão crua ao pool"""
+        if self.db_type == 'postgresql':
+            self._release_postgresql(raw)
+        else:
+            self._release_sqlite(raw)
+
+    def close_all(self):
+        """Fecha todas as conexões do processo atual"""
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.closeall()
+            self._pool = None
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def reset_peak(self):
+        """Recomeça o pico de conexões simultâneas a partir das que estão em uso"""
+        with self._lock:
+            self._stats['peak_in_use'] = self._stats['in_use']
+
+    def stats(self):
+        """Retorna estatísticas do pool para monitoramento"""
+        with self._lock:
+            stats = dict(self._stats)
+        checkouts = stats['checkouts']
+        stats['wait_time_avg'] = stats['wait_time_total'] / checkouts if checkouts else 0.0
+        stats['wait_time_total'] = round(stats['wait_time_total'], 6)
+        stats['wait_time_max'] = round(stats['wait_time_max'], 6)
+        stats['wait_time_avg'] = round(stats['wait_time_avg'], 6)
+        stats['db_type'] = self.db_type
+        stats['maxconn'] = self.maxconn if self.db_type == 'postgresql' else None
+        stats['pid'] = os.getpid()
+        return stats
+
+    def _record_checkout(self, waited, opened):
+        with self._lock:
+            stats = self._stats
+            stats['checkouts'] += 1
+            stats['in_use'] += 1
+            stats['peak_in_use'] = max(stats['peak_in_use'], stats['in_use'])
+            stats['wait_time_total'] += waited
+            stats['wait_time_max'] = max(stats['wait_time_max'], waited)
+            if opened:
+                stats['opened'] += 1
+
+    def _record_release(self, discarded):
+        with self._lock:
+            stats = self._stats
+            stats['releases'] += 1
+            stats['in_use'] = max(stats['in_use'] - 1, 0)
+            if discarded:
+                stats['discarded'] += 1
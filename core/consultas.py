@@ -0,0 +1,243 @@
+"""
+Registro central das consultas SQL das rotas
+
+Cada instrução tem um nome e um único texto com `{p}` nos parâmetros e
+fragmentos por banco (`{returning_id}`). Na importação do módulo todas são
+compiladas para SQLite e PostgreSQL; no PostgreSQL são executadas como
+prepared statements (PREPARE uma vez por conexão, depois EXECUTE). O tempo
+de cada instrução é acumulado para /api/metrics.
+
+As consultas de forma fixa dos módulos de core (resumo, agregados, séries,
+notificações, categorias) ficam junto de cada módulo e entram no registro
+com register(); o texto pode ser um só ou um por banco. Só as montadas
+conforme filtros (listagem de transações, confirmação por ids) são
+executadas direto, com placeholder() do banco.
+"""
+
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+
+PLACEHOLDERS = {'sqlite': '?', 'postgresql': '%s'}
+
+
+def placeholder(db_type):
+    """Marcador de parâmetro do driver ('?' no SQLite, '%s' no psycopg2)"""
+    return PLACEHOLDERS[db_type]
+
+# Fragmentos que mudam entre os bancos
+FRAGMENTS = {
+    'sqlite': {'returning_id': ''},
+    'postgresql': {'returning_id': 'RETURNING id'},
+}
+
+STATEMENTS = {
+    # Usuários
+    'users.by_username': 'SELECT * FROM users WHERE username = {p}',
+    'users.by_login': 'SELECT * FROM users WHERE username = {p} OR email = {p}',
+    'users.by_id': 'SELECT * FROM users WHERE id = {p}',
+    'users.insert': '''
+        INSERT INTO users (username, email, password, full_name, theme)
+        VALUES ({p}, {p}, {p}, {p}, {p})
+        {returning_id}
+    ''',
+    'users.update_password': 'UPDATE users SET password = {p} WHERE id = {p}',
+
+    # Transações
+    'transactions.insert': '''
+        INSERT INTO transactions (user_id, type, category_id, amount_cents, description, transaction_date)
+        VALUES ({p}, {p}, {p}, {p}, {p}, {p})
+    ''',
+    'transactions.recent': '''
+        SELECT t.*, COALESCE(o.name, c.name) as category_name, COALESCE(o.color, c.color) as category_color
+        FROM transactions t
+        LEFT JOIN categories c ON t.category_id = c.id
+        LEFT JOIN categories o ON o.overrides_id = t.category_id AND o.user_id = t.user_id
+        WHERE t.user_id = {p}
+        ORDER BY t.transaction_date DESC, t.created_at DESC
+        LIMIT 10
+    ''',
+
+    # Metas
+    'goals.by_user': 'SELECT * FROM goals WHERE user_id = {p} ORDER BY deadline ASC',
+    'goals.active': '''
+        SELECT * FROM goals
+        WHERE user_id = {p} AND is_completed = FALSE
+        ORDER BY deadline ASC
+        LIMIT 5
+    ''',
+
+    # Agregados mensais
+    'rollups.user_totals': '''
+        SELECT
+            COALESCE(SUM(tx_count), 0) as total_transactions,
+            COALESCE(SUM(CASE WHEN type = 'income' THEN total_cents ELSE 0 END), 0) as total_income_cents,
+            COALESCE(SUM(CASE WHEN type = 'expense' THEN total_cents ELSE 0 END), 0) as total_expense_cents
+        FROM transaction_rollups
+        WHERE user_id = {p}
+    ''',
+    'rollups.top_expense_categories': '''
+        SELECT r.category_id, SUM(r.total_cents) as total_cents
+        FROM transaction_rollups r
+        WHERE r.user_id = {p} AND r.type = 'expense'
+        AND r.month = {p} AND r.category_id <> 0
+        GROUP BY r.category_id
+        ORDER BY total_cents DESC
+        LIMIT 5
+    ''',
+}
+
+
+@dataclass(frozen=True)
+class Statement:
+    """Instrução compilada para um banco"""
+    name: str
+    sql: str
+    param_count: int
+    prepare_sql: str = None
+    execute_sql: str = None
+
+
+def compile_statement(name, template, db_type):
+    """Substitui fragmentos e placeholders do banco; no PostgreSQL gera PREPARE/EXECUTE
+
+    `template` é um texto único ou um dict {banco: texto}.
+    """
+    if isinstance(template, dict):
+        template = template[db_type]
+    parts = template.split('{p}')
+    param_count = len(parts) - 1
+    fragments = FRAGMENTS[db_type]
+    parts = [part.format(**fragments) for part in parts]
+    sql = placeholder(db_type).join(parts).strip()
+
+    if db_type != 'postgresql':
+        return Statement(name, sql, param_count)
+
+    prepared_name = 'cs_' + name.replace('.', '_')
+    numbered = parts[0] + ''.join(f'${i}{part}' for i, part in enumerate(parts[1:], start=1))
+    args = f" ({', '.join(['%s'] * param_count)})" if param_count else ''
+    return Statement(name, sql, param_count,
+                     prepare_sql=f'PREPARE {prepared_name} AS {numbered.strip()}',
+                     execute_sql=f'EXECUTE {prepared_name}{args}')
+
+
+COMPILED = {
+    db_type: {name: compile_statement(name, template, db_type) for name, template in STATEMENTS.items()}
+    for db_type in PLACEHOLDERS
+}
+
+
+def register(statements):
+    """Compila e registra instruções {nome: texto} de outro módulo (na importação dele)"""
+    for name, template in statements.items():
+        if name in STATEMENTS and STATEMENTS[name] != template:
+            raise ValueError(f'Instrução {name} já registrada com outro texto')
+        STATEMENTS[name] = template
+        for db_type in PLACEHOLDERS:
+            COMPILED[db_type][name] = compile_statement(name, template, db_type)
+
+
+class QueryRegistry:
+    """Executa instruções pelo nome e mede o tempo de cada uma"""
+
+    def __init__(self, db_type, prepare=True):
+        self.db_type = db_type
+        self.statements = COMPILED[db_type]
+        self.prepare = prepare and db_type == 'postgresql'
+        # Instruções já preparadas em cada conexão (somem junto com ela)
+        self._prepared = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._timings = {}
+
+    def execute(self, cursor, name, params=()):
+        """Executa a instrução `name` com os parâmetros na ordem dos placeholders"""
+        statement = self.statements[name]
+        params = tuple(params or ())
+        if len(params) != statement.param_count:
+            raise ValueError(f'{name}: esperados {statement.param_count} parâmetros, recebidos {len(params)}')
+
+        started = time.perf_counter()
+        if self.prepare:
+            self._ensure_prepared(cursor, statement)
+            cursor.execute(statement.execute_sql, params)
+        else:
+            cursor.execute(statement.sql, params)
+        self._record(name, time.perf_counter() - started)
+        return cursor
+
+    def executemany(self, cursor, name, rows):
+        """Executa a instrução `name` uma vez para cada tupla de `rows`"""
+        statement = self.statements[name]
+        rows = [tuple(row) for row in rows]
+        if not rows:
+            return cursor
+        if len(rows[0]) != statement.param_count:
+            raise ValueError(f'{name}: esperados {statement.param_count} parâmetros, recebidos {len(rows[0])}')
+
+        started = time.perf_counter()
+        if self.prepare:
+            self._ensure_prepared(cursor, statement)
+            cursor.executemany(statement.execute_sql, rows)
+        else:
+            cursor.executemany(statement.sql, rows)
+        self._record(name, time.perf_counter() - started)
+        return cursor
+
+    def _ensure_prepared(self, cursor, statement):
+        conn = cursor.connection
+        with self._lock:
+            prepared = self._prepared.setdefault(conn, set())
+        if statement.name not in prepared:
+            cursor.execute(statement.prepare_sql)
+            prepared.add(statement.name)
+
+    def _record(self, name, elapsed):
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+            timing['calls'] += 1
+            timing['total_ms'] += elapsed * 1000
+            timing['max_ms'] = max(timing['max_ms'], elapsed * 1000)
+
+    def stats(self):
+        """Tempo por instrução (chamadas, total, média e máximo em ms)"""
+        with self._lock:
+            timings = {name: dict(timing) for name, timing in self._timings.items()}
+        for timing in timings.values():
+            timing['avg_ms'] = round(timing['total_ms'] / timing['calls'], 3)
+            timing['total_ms'] = round(timing['total_ms'], 3)
+            timing['max_ms'] = round(timing['max_ms'], 3)
+        return {'db_type': self.db_type, 'prepared': self.prepare, 'statements': timings}
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def registry(db_type, prepare=None):
+    """QueryRegistry do processo para o banco
+
+    O primeiro chamador (app.py) define `prepare`; sem ele vale DB_PREPARED
+    (0 para poolers em modo transação, ex.: PgBouncer).
+    """
+    with _registries_lock:
+        queries = _registries.get(db_type)
+        if queries is None:
+            if prepare is None:
+                prepare = os.environ.get('DB_PREPARED', '1') != '0'
+            queries = _registries[db_type] = QueryRegistry(db_type, prepare=prepare)
+        return queries
+
+
+def run(cursor, db_type, name, params=()):
+    """Executa a instrução registrada `name` pelo registro do processo"""
+    return registry(db_type).execute(cursor, name, params)
+
+
+def run_many(cursor, db_type, name, rows):
+    """executemany da instrução registrada `name` pelo registro do processo"""
+    return registry(db_type).executemany(cursor, name, rows)
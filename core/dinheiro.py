@@ -0,0 +1,37 @@
+"""
+Valores monetários em centavos (inteiros)
+
+O banco guarda e soma centavos em colunas BIGINT (`*_cents`), então as
+somas são exatas nos dois bancos e não há Decimal/float no caminho. A
+conversão para reais acontece só na borda: respostas da API e templates.
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CENT = Decimal('0.01')
+
+
+def to_cents(value):
+    """Converte reais (int, float, str ou Decimal) em centavos inteiros"""
+    if isinstance(value, bool):
+        raise ValueError(f'valor inválido: {value}')
+    try:
+        amount = Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        raise ValueError(f'valor inválido: {value}')
+    if not amount.is_finite():
+        raise ValueError(f'valor inválido: {value}')
+    return int(amount.quantize(CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def from_cents(cents):
+    """Centavos em reais para JSON e templates"""
+    return int(cents or 0) / 100
+
+
+def with_reais(row, *fields):
+    """Copia a linha trocando cada `<campo>_cents` por `<campo>` em reais"""
+    data = dict(row)
+    for name in fields:
+        data[name] = from_cents(data.pop(f'{name}_cents', 0))
+    return data
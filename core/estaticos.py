@@ -0,0 +1,240 @@
+"""
+Pipeline de arquivos estáticos: bundle, minificação, hash e pré-compressão
+
+build() lê static/css e static/js e escreve em static/dist:
+
+- cada arquivo minificado com o hash do conteúdo no nome
+  (js/main.3f2a9c1b7e.js) e os bundles declarados em BUNDLES;
+- variantes .gz (e .br, se o módulo brotli estiver instalado);
+- manifest.json mapeando o nome original para o nome com hash.
+
+O app lê o manifesto (asset_url nos templates) e serve os arquivos de
+static/dist com cache imutável, escolhendo a variante comprimida conforme
+o Accept-Encoding (com os pesos q). Sem manifesto tudo continua saindo de
+static/.
+
+Das páginas servidas pelas rotas (*_executivo.html), só o dashboard carrega
+um arquivo local (js/realtime-updates.js); o resto do CSS e do JavaScript
+delas é inline e o Chart.js vem de CDN. Os demais templates com asset_url
+(layout.html, insights.html, ANALYTICS.html) não são renderizados hoje.
+
+A minificação é conservadora (comentários e espaços), sem reescrever
+código: o JavaScript mantém as quebras de linha por causa do ASI.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # opcional: sem ele só há .gz
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+SOURCE_DIRS = ('css', 'js')
+
+# Bundles: nome de saída -> arquivos na ordem em que as páginas os carregavam
+BUNDLES = {
+    'js/layout.bundle.js': ['js/main.js', 'js/api.js'],
+}
+
+COMPRESSIBLE = ('.css', '.js', '.json', '.svg', '.html', '.txt')
+
+# Variantes pré-comprimidas em ordem de preferência
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def minify_css(text):
+    """Remove comentários e espaços que não mudam o significado do CSS"""
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    text = re.sub(r'([{;]\s*[-\w]+)\s*:\s*', r'\1:', text)
+    text = text.replace(';}', '}')
+    return text.strip()
+
+
+# Caracteres após os quais uma barra abre uma regex literal (e não uma divisão)
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^') | {''}
+
+
+def minify_js(text):
+    """Remove comentários e indentação fora de strings e regex, mantendo as quebras de linha"""
+    out = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch in '\'"`':
+            end = _skip_literal(text, i, ch)
+            out.append(text[i:end])
+            i = end
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+        elif text.startswith('//', i):
+            end = text.find('\n', i)
+            i = n if end < 0 else end
+        elif ch == '/' and _last_significant(out) in REGEX_PRECEDERS:
+            end = _skip_regex(text, i)
+            out.append(text[i:end])
+            i = end
+        else:
+            out.append(ch)
+            i += 1
+
+    lines = (line.strip() for line in ''.join(out).splitlines())
+    return '\n'.join(line for line in lines if line) + '\n'
+
+
+def _skip_literal(text, start, quote):
+    i = start + 1
+    while i < len(text):
+        if text[i] == '\\':
+            i += 2
+            continue
+        if text[i] == quote:
+            return i + 1
+        i += 1
+    return len(text)
+
+
+def _skip_regex(text, start):
+    i, in_class = start + 1, False
+    while i < len(text) and text[i] != '\n':
+        ch = text[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == '[':
+            in_class = True
+        elif ch == ']':
+            in_class = False
+        elif ch == '/' and not in_class:
+            return i + 1
+        i += 1
+    return i
+
+
+def _last_significant(out):
+    for chunk in reversed(out):
+        stripped = chunk.strip()
+        if stripped:
+            return stripped[-1]
+    return ''
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def fingerprint(name, content):
+    """js/main.js -> js/main.<hash>.js"""
+    digest = hashlib.sha256(content).hexdigest()[:10]
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{digest}{ext}'
+
+
+def _read(static_dir, name):
+    with open(os.path.join(static_dir, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _emit(dist, name, content):
+    """Grava o arquivo com hash e suas variantes comprimidas; retorna o nome com hash"""
+    hashed = fingerprint(name, content)
+    path = os.path.join(dist, hashed)
+    _write(path, content)
+    if name.endswith(COMPRESSIBLE):
+        _write(path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write(path + '.br', brotli.compress(content, quality=11))
+    return hashed
+
+
+def build(static_dir='static'):
+    """Gera static/dist e o manifesto; retorna (manifesto, estatísticas)"""
+    dist = os.path.join(static_dir, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+    manifest = {}
+    stats = {'files': 0, 'source_bytes': 0, 'minified_bytes': 0, 'gzip_bytes': 0}
+
+    sources = {}
+    for folder in SOURCE_DIRS:
+        for filename in sorted(os.listdir(os.path.join(static_dir, folder))):
+            name = f'{folder}/{filename}'
+            ext = os.path.splitext(name)[1]
+            if ext in MINIFIERS:
+                sources[name] = _read(static_dir, name)
+
+    outputs = {name: MINIFIERS[os.path.splitext(name)[1]](text) for name, text in sources.items()}
+    for bundle, members in BUNDLES.items():
+        parts = [outputs[member] for member in members if member in outputs]
+        separator = '\n' if bundle.endswith('.css') else ';\n'
+        outputs[bundle] = separator.join(parts)
+
+    for name, text in outputs.items():
+        content = text.encode('utf-8')
+        manifest[name] = f'{DIST_DIR}/{_emit(dist, name, content)}'
+        stats['files'] += 1
+        stats['minified_bytes'] += len(content)
+        stats['gzip_bytes'] += len(gzip.compress(content, compresslevel=9, mtime=0))
+        if name in sources:
+            stats['source_bytes'] += len(sources[name].encode('utf-8'))
+
+    _write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    stats['brotli'] = brotli is not None
+    return manifest, stats
+
+
+def load_manifest(static_dir='static'):
+    """Manifesto do último build ({} se não houver)"""
+    try:
+        with open(os.path.join(static_dir, DIST_DIR, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_paths(manifest, name):
+    """Arquivos (relativos a static/) para um nome lógico
+
+    Com manifesto: o arquivo com hash. Sem build: o próprio arquivo ou,
+    para um bundle, seus membros na ordem.
+    """
+    if name in manifest:
+        return [manifest[name]]
+    return list(BUNDLES.get(name, [name]))
+
+
+def negotiate(static_dir, filename, accept_encoding):
+    """Escolhe a variante pré-comprimida aceita pelo cliente
+
+    Retorna (caminho relativo a static_dir, Content-Encoding ou None).
+    """
+    if not accept_encoding:
+        return filename, None
+    # Só as variantes que existem; q=0 exclui a codificação e empates seguem ENCODINGS
+    available = {encoding: filename + suffix for encoding, suffix in ENCODINGS
+                 if os.path.isfile(os.path.join(static_dir, DIST_DIR, filename + suffix))}
+    encoding = parse_accept_header(accept_encoding).best_match(list(available))
+    if encoding is None:
+        return filename, None
+    return available[encoding], encoding
+
+
+if __name__ == '__main__':
+    manifest, stats = build()
+    print(f"📦 {stats['files']} arquivos em static/{DIST_DIR} "
+          f"({stats['source_bytes']} → {stats['minified_bytes']} bytes, gzip {stats['gzip_bytes']})")
@@ -0,0 +1,83 @@
+"""
+Pub/sub em processo para o stream de eventos (Server-Sent Events)
+
+Cada conexão /api/stream assina os eventos do seu usuário e recebe por uma
+fila própria. As rotas de escrita publicam depois do commit. Com workers
+gthread cada stream ocupa uma thread, por isso o número de assinantes por
+processo é limitado; acima do limite o cliente volta ao polling.
+"""
+
+import json
+import queue
+import threading
+
+
+class StreamLimitReached(RuntimeError):
+    """Limite de streams simultâneos do processo atingido"""
+
+
+class Subscription:
+    """Fila de eventos de uma conexão"""
+
+    def __init__(self, user_id, maxsize=100):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def get(self, timeout):
+        """Próximo evento (nome, dados); levanta queue.Empty no timeout"""
+        return self.queue.get(timeout=timeout)
+
+
+class EventBroker:
+    """Distribui eventos por usuário para as conexões abertas"""
+
+    def __init__(self, max_subscribers=2):
+        self.max_subscribers = max_subscribers
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._stats = {'published': 0, 'delivered': 0, 'dropped': 0, 'rejected': 0}
+
+    def subscribe(self, user_id):
+        with self._lock:
+            total = sum(len(subs) for subs in self._subscribers.values())
+            if total >= self.max_subscribers:
+                self._stats['rejected'] += 1
+                raise StreamLimitReached('Limite de streams atingido')
+            subscription = Subscription(user_id)
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subs = self._subscribers.get(subscription.user_id)
+            if subs is not None:
+                subs.discard(subscription)
+                if not subs:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id, event, data=None):
+        """Entrega o evento às conexões do usuário (nunca bloqueia quem escreve)"""
+        with self._lock:
+            subs = list(self._subscribers.get(user_id, ()))
+            self._stats['published'] += 1
+        for subscription in subs:
+            try:
+                subscription.queue.put_nowait((event, data))
+                delivered = 'delivered'
+            except queue.Full:
+                delivered = 'dropped'
+            with self._lock:
+                self._stats[delivered] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['subscribers'] = sum(len(subs) for subs in self._subscribers.values())
+        stats['max_subscribers'] = self.max_subscribers
+        return stats
+
+
+def format_sse(event, data):
+    """Serializa um evento no formato text/event-stream"""
+    payload = json.dumps(data, default=str, separators=(',', ':'))
+    return f'event: {event}\ndata: {payload}\n\n'
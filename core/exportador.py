@@ -4,9 +4,11 @@ Autor: Sistema de Contabilidade
 """
 
 import csv
+import io
 import json
 import os
-from datetime import datetime
+import zlib
+from datetime import date, datetime
 
 
 class ExportadorCSV:
@@ -286,6 +288,83 @@ class GerenciadorDownloads:
             return 0
 
 
+class ExportadorStream:
+    """Gera CSV em pedaços a partir de um iterador de linhas (memória constante)"""
+    
+    TAMANHO_BLOCO = 64 * 1024
+    
+    COLUNAS_TRANSACOES = [
+        ('id', 'ID'),
+        ('transaction_date', 'Data'),
+        ('type', 'Tipo'),
+        ('category_name', 'Categoria'),
+        ('amount_cents', 'Valor'),
+        ('description', 'Descrição'),
+        ('created_at', 'Criado em'),
+    ]
+    
+    @staticmethod
+    def _texto(valor):
+        """Formata um valor para célula CSV"""
+        if valor is None:
+            return ''
+        if isinstance(valor, datetime):
+            return valor.isoformat(sep=' ', timespec='seconds')
+        if isinstance(valor, date):
+            return valor.isoformat()
+        if isinstance(valor, float):
+            return f"{valor:.2f}"
+        return str(valor)
+    
+    @staticmethod
+    def _reais(centavos):
+        """Formata centavos inteiros como reais ('1234.50')"""
+        if centavos is None:
+            return ''
+        sinal = '-' if centavos < 0 else ''
+        inteiro, resto = divmod(abs(int(centavos)), 100)
+        return f"{sinal}{inteiro}.{resto:02d}"
+    
+    @staticmethod
+    def gerar_csv(linhas, colunas, compactar=False):
+        """
+        Gera o CSV em blocos de bytes
+        
+        Args:
+            linhas: Iterável de linhas (dict/Row) vindas do cursor
+            colunas: Lista de (chave, cabeçalho); chaves `*_cents` saem em reais
+            compactar: Se True, os blocos formam um arquivo gzip
+        
+        Yields:
+            Blocos de bytes de até ~TAMANHO_BLOCO
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compactar else None
+        formatos = [ExportadorStream._reais if chave.endswith('_cents') else ExportadorStream._texto
+                    for chave, _ in colunas]
+        
+        def esvaziar():
+            dados = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            return gzip.compress(dados) if gzip else dados
+        
+        writer.writerow([cabecalho for _, cabecalho in colunas])
+        for linha in linhas:
+            writer.writerow([formato(linha[chave]) for formato, (chave, _) in zip(formatos, colunas)])
+            if buffer.tell() >= ExportadorStream.TAMANHO_BLOCO:
+                bloco = esvaziar()
+                if bloco:
+                    yield bloco
+        
+        bloco = esvaziar()
+        if gzip:
+            bloco += gzip.flush()
+        if bloco:
+            yield bloco
+
+
 # Teste rápido do módulo
 if __name__ == "__main__":
     print("🧪 Testando módulo de exportação...")
@@ -0,0 +1,63 @@
+"""
+Cache de fragmentos de template e cache de bytecode do Jinja
+
+A tag {% cache 'nome', var1, var2 %}...{% endcache %} guarda o HTML do
+bloco renderizado. Quem decide onde guardar é `environment.fragment_cache`
+(uma função nome, variações, render); sem ela o bloco é renderizado
+normalmente. No app a chave é o usuário mais as variações: tudo o que o
+bloco mostra precisa entrar nas variações, porque escritas nos dados não
+descartam fragmentos.
+
+O bytecode compilado dos templates vai para um diretório compartilhado:
+workers novos do gunicorn carregam os templates sem recompilar.
+"""
+
+import os
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+
+class FragmentCacheExtension(Extension):
+    """Tag {% cache %} para blocos caros que mudam pouco"""
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(args)]),
+                               [], [], body).set_lineno(lineno)
+
+    def _render(self, args, caller):
+        store = self.environment.fragment_cache
+        if store is None:
+            return caller()
+        name, vary = args[0], args[1:]
+        return Markup(store(name, vary, lambda: str(caller())))
+
+
+def bytecode_cache(directory):
+    """Cache de bytecode em disco (criando o diretório se preciso)"""
+    os.makedirs(directory, exist_ok=True)
+    return FileSystemBytecodeCache(directory)
+
+
+def warm_templates(environment, names):
+    """Compila (ou carrega do bytecode) os templates antes da primeira requisição"""
+    loaded = 0
+    for name in names:
+        try:
+            environment.get_template(name)
+            loaded += 1
+        except Exception as e:
+            print(f"⚠️  Template {name} não carregado: {e}")
+    return loaded
@@ -0,0 +1,221 @@
+"""
+Importação de transações em lote (JSON ou CSV)
+
+As linhas são validadas em blocos de CHUNK_SIZE e cada bloco válido é
+gravado de uma vez: executemany no SQLite e COPY no PostgreSQL. Tudo
+acontece em uma única transação do chamador, junto com os agregados
+mensais; linhas inválidas são relatadas com o número da linha e não
+interrompem as demais (a não ser no modo estrito).
+"""
+
+import csv
+import io
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import islice
+
+from core.agregados import apply_deltas, collect_deltas
+from core.categorias import merged_categories
+from core.consultas import run_many
+from core.dinheiro import from_cents, to_cents
+from core.periodos import to_date
+
+MAX_ROWS = 50000
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+COLUMNS = ('user_id', 'type', 'category_id', 'amount_cents', 'description', 'transaction_date')
+
+TYPE_ALIASES = {
+    'income': 'income', 'receita': 'income', 'entrada': 'income',
+    'expense': 'expense', 'despesa': 'expense', 'saida': 'expense', 'saída': 'expense',
+}
+
+# Cabeçalhos aceitos no CSV além dos nomes das colunas
+FIELD_ALIASES = {
+    'tipo': 'type', 'valor': 'amount', 'descricao': 'description', 'descrição': 'description',
+    'categoria': 'category', 'data': 'transaction_date',
+}
+
+
+class TooManyRows(ValueError):
+    """Lote acima de MAX_ROWS linhas"""
+
+
+@dataclass
+class ImportResult:
+    """Resumo da importação devolvido pela API (somas em centavos)"""
+    received: int = 0
+    inserted: int = 0
+    income_cents: int = 0
+    expense_cents: int = 0
+    errors: list = field(default_factory=list)
+    error_count: int = 0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def to_dict(self):
+        return {
+            'received': self.received,
+            'inserted': self.inserted,
+            'rejected': self.error_count,
+            'income': from_cents(self.income_cents),
+            'expense': from_cents(self.expense_cents),
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors),
+        }
+
+
+def parse_amount(value):
+    """Aceita 1234.56, '1234,56' e '1.234,56'; retorna centavos"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        text = value
+    else:
+        text = str(value or '').strip().replace('R$', '').replace(' ', '')
+        if ',' in text:
+            text = text.replace('.', '').replace(',', '.')
+    cents = to_cents(text)
+    if cents <= 0:
+        raise ValueError('valor deve ser maior que zero')
+    return cents
+
+
+def parse_date(value):
+    """Aceita 'YYYY-MM-DD' e 'DD/MM/YYYY'; vazio é hoje"""
+    if value in (None, ''):
+        return date.today().isoformat()
+    text = str(value).strip()
+    try:
+        if '/' in text:
+            return datetime.strptime(text, '%d/%m/%Y').date().isoformat()
+        if len(text) < 10:
+            raise ValueError(text)
+        return to_date(text).isoformat()
+    except ValueError:
+        raise ValueError(f'data inválida: {value}')
+
+
+def validate_row(raw, user_id, categories):
+    """Normaliza uma linha; `categories` mapeia id e nome (minúsculo) para (id, tipo)"""
+    if not isinstance(raw, dict):
+        raise ValueError('linha deve ser um objeto')
+
+    trans_type = TYPE_ALIASES.get(str(raw.get('type') or '').strip().lower())
+    if trans_type is None:
+        raise ValueError('tipo deve ser income ou expense')
+
+    amount_cents = parse_amount(raw.get('amount'))
+
+    category_id = None
+    category = raw.get('category_id') or raw.get('category')
+    if category not in (None, ''):
+        key = int(category) if str(category).strip().isdigit() else str(category).strip().lower()
+        if key not in categories:
+            raise ValueError(f'categoria desconhecida: {category}')
+        category_id, category_type = categories[key]
+        if category_type != trans_type:
+            raise ValueError('categoria não corresponde ao tipo')
+
+    transaction_date = parse_date(raw.get('transaction_date') or raw.get('date'))
+
+    description = str(raw.get('description') or '').strip()[:500]
+    return (user_id, trans_type, category_id, amount_cents, description, transaction_date)
+
+
+def load_categories(cursor, db_type, user_id):
+    """Categorias visíveis ao usuário (padrão e próprias) indexadas por id e por nome"""
+    categories = {}
+    for category in merged_categories(cursor, db_type, user_id):
+        categories[category['id']] = (category['id'], category['type'])
+        categories.setdefault(category['name'].strip().lower(), (category['id'], category['type']))
+    return categories
+
+
+def iter_csv(stream, encoding='utf-8-sig'):
+    """Lê CSV (separador , ou ;) de um stream binário sem carregar tudo na memória
+
+    UTF-8 é lido como utf-8-sig: o BOM que o Excel grava no início não
+    entra no nome da primeira coluna.
+    """
+    if encoding.lower().replace('_', '-') in ('utf-8', 'utf8'):
+        encoding = 'utf-8-sig'
+    text = io.TextIOWrapper(stream, encoding=encoding, newline='')
+    first = text.readline()
+    delimiter = ';' if first.count(';') > first.count(',') else ','
+    header = next(csv.reader([first], delimiter=delimiter), [])
+    fields = [FIELD_ALIASES.get(name.strip().lower(), name.strip().lower()) for name in header]
+    for values in csv.reader(text, delimiter=delimiter):
+        if any(value.strip() for value in values):
+            yield dict(zip(fields, values))
+
+
+def insert_rows(cursor, db_type, rows):
+    """Grava um bloco de linhas já validadas"""
+    if db_type == 'postgresql':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY transactions ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    else:
+        # Mesmas colunas, na mesma ordem, de COLUMNS
+        run_many(cursor, db_type, 'transactions.insert', rows)
+
+
+def import_transactions(cursor, db_type, user_id, rows, strict=False):
+    """Valida e grava as linhas no cursor do chamador (sem commit)
+
+    `rows` é qualquer iterável de dicts. Levanta TooManyRows acima de
+    MAX_ROWS; no modo estrito nada é gravado se houver linha inválida.
+    """
+    result = ImportResult()
+    categories = load_categories(cursor, db_type, user_id)
+    rows = iter(rows)
+    pending = []
+    deltas = {}
+
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        if result.received + len(chunk) > MAX_ROWS:
+            raise TooManyRows(f'Máximo de {MAX_ROWS} linhas por requisição')
+
+        valid = []
+        for offset, raw in enumerate(chunk, start=result.received + 1):
+            try:
+                valid.append(validate_row(raw, user_id, categories))
+            except (ValueError, TypeError) as e:
+                result.add_error(offset, str(e))
+        result.received += len(chunk)
+
+        # No modo estrito só grava depois de validar tudo
+        if strict:
+            pending.extend(valid)
+        elif valid:
+            insert_rows(cursor, db_type, valid)
+            _accumulate(result, deltas, valid)
+
+    if strict and not result.error_count:
+        for start in range(0, len(pending), CHUNK_SIZE):
+            insert_rows(cursor, db_type, pending[start:start + CHUNK_SIZE])
+        _accumulate(result, deltas, pending)
+
+    apply_deltas(cursor, db_type, deltas)
+    return result
+
+
+def _accumulate(result, deltas, rows):
+    result.inserted += len(rows)
+    for key, (amount, count) in collect_deltas(dict(zip(COLUMNS, row)) for row in rows).items():
+        total, n = deltas.get(key, (0, 0))
+        deltas[key] = (total + amount, n + count)
+    for row in rows:
+        if row[1] == 'income':
+            result.income_cents += row[3]
+        else:
+            result.expense_cents += row[3]
@@ -0,0 +1,474 @@
+"""
+Migrações versionadas do esquema (SQLite e PostgreSQL)
+
+Cada migração tem um número, um nome e uma lista de passos: SQL com
+fragmentos por banco ({pk}), ForDialect (SQL próprio de cada banco),
+AddColumn (só adiciona se a coluna não existir) ou Call (função Python
+que recebe cursor e db_type). A tabela
+schema_version guarda o que já foi aplicado e o checksum dos passos; uma
+migração aplicada que mudou de conteúdo interrompe a inicialização.
+
+Com o esquema em dia, migrate() faz duas consultas e retorna.
+"""
+
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+
+from core.agregados import rebuild_rollups
+from core.consultas import placeholder
+from core.notificacoes import rebuild_counters
+
+FRAGMENTS = {
+    'sqlite': {'pk': 'INTEGER PRIMARY KEY AUTOINCREMENT'},
+    'postgresql': {'pk': 'SERIAL PRIMARY KEY'},
+}
+
+# Chave do advisory lock que serializa workers migrando ao mesmo tempo
+LOCK_KEY = 7291015
+
+
+class MigrationError(RuntimeError):
+    """Migração aplicada difere da versão do código"""
+
+
+@dataclass(frozen=True)
+class AddColumn:
+    table: str
+    column: str
+    definition: str
+
+    def describe(self, db_type):
+        return f'ADD COLUMN {self.table}.{self.column} {self.definition}'
+
+    def apply(self, cursor, db_type):
+        if db_type == 'postgresql':
+            cursor.execute(f'ALTER TABLE {self.table} ADD COLUMN IF NOT EXISTS {self.column} {self.definition}')
+            return
+        cursor.execute(f'PRAGMA table_info({self.table})')
+        if self.column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {self.table} ADD COLUMN {self.column} {self.definition}')
+
+
+@dataclass(frozen=True)
+class ForDialect:
+    """SQL próprio de cada banco; None pula o passo naquele banco"""
+    sqlite: str = None
+    postgresql: str = None
+
+
+@dataclass(frozen=True)
+class Call:
+    """Função Python no passo; o checksum usa só o nome de `function`
+
+    `frozen` executa no lugar de `function` uma cópia fiel ao esquema
+    daquela versão, quando a função viva já não roda sobre ele.
+    """
+    function: object
+    frozen: object = None
+
+    def describe(self, db_type):
+        return f'CALL {self.function.__module__}.{self.function.__qualname__}'
+
+    def apply(self, cursor, db_type):
+        (self.frozen or self.function)(cursor, db_type)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    steps: tuple
+
+    def compiled(self, db_type):
+        """Passos com os fragmentos do banco aplicados"""
+        steps = []
+        for step in self.steps:
+            if isinstance(step, ForDialect):
+                step = getattr(step, db_type)
+                if step is None:
+                    continue
+            steps.append(step.format(**FRAGMENTS[db_type]).strip() if isinstance(step, str) else step)
+        return steps
+
+    def checksum(self, db_type):
+        text = '\n;\n'.join(step if isinstance(step, str) else step.describe(db_type)
+                            for step in self.compiled(db_type))
+        return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def _to_cents(table, column):
+    """Passos que convertem `column` (reais) em `<column>_cents` (centavos inteiros) no lugar"""
+    return (
+        ForDialect(
+            sqlite=f'UPDATE {table} SET {column} = CAST(ROUND({column} * 100) AS INTEGER) WHERE {column} IS NOT NULL',
+            postgresql=f'ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT',
+        ),
+        ForDialect(
+            postgresql=f'ALTER TABLE {table} ALTER COLUMN {column} TYPE BIGINT USING ROUND({column} * 100)::BIGINT',
+        ),
+        f'ALTER TABLE {table} RENAME COLUMN {column} TO {column}_cents',
+        ForDialect(
+            postgresql=f'ALTER TABLE {table} ALTER COLUMN {column}_cents SET DEFAULT 0',
+        ),
+    )
+
+
+def _rollups_in_reais(cursor, db_type):
+    """rebuild_rollups como era na migração 3: colunas em reais (antes da 5)"""
+    month = {
+        'sqlite': "strftime('%Y-%m-01', transaction_date)",
+        'postgresql': "DATE_TRUNC('month', transaction_date)::date",
+    }[db_type]
+    cursor.execute('DELETE FROM transaction_rollups')
+    cursor.execute(f'''
+        INSERT INTO transaction_rollups (user_id, month, type, category_id, total, tx_count)
+        SELECT user_id, {month}, type, COALESCE(category_id, 0), SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY 1, 2, 3, 4
+    ''')
+
+
+def _category_name_nullable(cursor, db_type):
+    """Tira o NOT NULL de categories.name (personalização sem nome próprio)
+
+    O SQLite não altera restrições de coluna: a tabela é recriada a partir
+    do próprio DDL guardado (que já inclui as colunas adicionadas depois),
+    com os mesmos dados, índices e sequência de ids.
+    """
+    if db_type == 'postgresql':
+        cursor.execute('ALTER TABLE categories ALTER COLUMN name DROP NOT NULL')
+        return
+
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'categories'")
+    ddl = cursor.fetchone()[0]
+    ddl = re.sub(r'(\bname\s+\w+(?:\s*\(\d+\))?)\s+NOT NULL', r'\1', ddl, count=1, flags=re.IGNORECASE)
+    ddl = re.sub(r'^CREATE TABLE\s+(?:IF NOT EXISTS\s+)?["`]?categories["`]?', 'CREATE TABLE categories_new',
+                 ddl, count=1, flags=re.IGNORECASE)
+
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'categories' AND sql IS NOT NULL")
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'categories'")
+    sequence = cursor.fetchone()
+    cursor.execute('PRAGMA table_info(categories)')
+    columns = ', '.join(row[1] for row in cursor.fetchall())
+
+    cursor.execute(ddl)
+    cursor.execute(f'INSERT INTO categories_new ({columns}) SELECT {columns} FROM categories')
+    cursor.execute('DROP TABLE categories')
+    cursor.execute('ALTER TABLE categories_new RENAME TO categories')
+    for index in indexes:
+        cursor.execute(index)
+    if sequence is not None:
+        cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'categories'", (sequence[0],))
+
+
+MIGRATIONS = [
+    Migration(1, 'tabelas base', (
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id {pk},
+            username VARCHAR(100) UNIQUE NOT NULL,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            full_name VARCHAR(255),
+            avatar VARCHAR(255) DEFAULT 'default.png',
+            theme VARCHAR(50) DEFAULT 'executive',
+            currency VARCHAR(10) DEFAULT 'BRL',
+            language VARCHAR(10) DEFAULT 'pt_BR',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS categories (
+            id {pk},
+            user_id INTEGER NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            type VARCHAR(10) CHECK(type IN ('income', 'expense')) NOT NULL,
+            color VARCHAR(20) DEFAULT '#0066ff',
+            icon VARCHAR(50) DEFAULT 'fas fa-tag',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id {pk},
+            user_id INTEGER NOT NULL,
+            type VARCHAR(10) CHECK(type IN ('income', 'expense')) NOT NULL,
+            category_id INTEGER,
+            amount DECIMAL(10, 2) NOT NULL,
+            description TEXT,
+            transaction_date DATE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS goals (
+            id {pk},
+            user_id INTEGER NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            description TEXT,
+            target_amount DECIMAL(10, 2) NOT NULL,
+            current_amount DECIMAL(10, 2) DEFAULT 0,
+            deadline DATE,
+            priority VARCHAR(10) CHECK(priority IN ('low', 'medium', 'high')),
+            is_completed BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS notifications (
+            id {pk},
+            user_id INTEGER NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            message TEXT,
+            type VARCHAR(20) DEFAULT 'info',
+            is_read BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    )),
+
+    # Colunas que existiam só nos scripts fix_*/reset_*
+    Migration(2, 'colunas conciliadas dos scripts de manutenção', (
+        AddColumn('users', 'updated_at', 'TIMESTAMP'),
+        AddColumn('categories', 'parent_id', 'INTEGER DEFAULT NULL'),
+        AddColumn('categories', 'budget_limit', 'DECIMAL(10, 2) DEFAULT 0'),
+        AddColumn('categories', 'is_default', 'BOOLEAN DEFAULT FALSE'),
+        AddColumn('transactions', 'due_date', 'DATE'),
+        AddColumn('transactions', 'is_paid', 'BOOLEAN DEFAULT TRUE'),
+        AddColumn('transactions', 'notes', 'TEXT'),
+    )),
+
+    Migration(3, 'agregados mensais e contadores de notificações', (
+        '''
+        CREATE TABLE IF NOT EXISTS transaction_rollups (
+            user_id INTEGER NOT NULL,
+            month DATE NOT NULL,
+            type VARCHAR(10) NOT NULL,
+            category_id INTEGER NOT NULL DEFAULT 0,
+            total DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            tx_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, month, type, category_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS notification_counters (
+            user_id INTEGER PRIMARY KEY,
+            unread INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        Call(rebuild_rollups, frozen=_rollups_in_reais),
+        Call(rebuild_counters),
+    )),
+
+    Migration(4, 'índices das consultas frequentes', (
+        # Filtros por período e listagem paginada (transaction_date DESC, id DESC)
+        'CREATE INDEX IF NOT EXISTS idx_transactions_user_date_type ON transactions (user_id, transaction_date, type)',
+        'CREATE INDEX IF NOT EXISTS idx_transactions_user_date_id ON transactions (user_id, transaction_date, id)',
+        'CREATE INDEX IF NOT EXISTS idx_transactions_user_category ON transactions (user_id, category_id, transaction_date)',
+        'CREATE INDEX IF NOT EXISTS idx_notifications_user_read_created ON notifications (user_id, is_read, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_goals_user_completed_deadline ON goals (user_id, is_completed, deadline)',
+        'CREATE INDEX IF NOT EXISTS idx_categories_user_type_name ON categories (user_id, type, name)',
+    )),
+
+    # SQLite não muda o tipo declarado; a afinidade NUMERIC guarda os inteiros como INTEGER
+    Migration(5, 'valores monetários em centavos', (
+        *_to_cents('transactions', 'amount'),
+        *_to_cents('goals', 'target_amount'),
+        *_to_cents('goals', 'current_amount'),
+        *_to_cents('categories', 'budget_limit'),
+        *_to_cents('transaction_rollups', 'total'),
+    )),
+
+    # Categorias padrão globais (user_id = 0); cópias por usuário viram referência ou personalização
+    Migration(6, 'categorias padrão globais', (
+        AddColumn('categories', 'overrides_id', 'INTEGER DEFAULT NULL'),
+        AddColumn('categories', 'is_hidden', 'BOOLEAN DEFAULT FALSE'),
+        '''
+        INSERT INTO categories (user_id, name, type, color, icon, is_default) VALUES
+            (0, 'Salário', 'income', '#00ff88', 'fas fa-money-check-alt', TRUE),
+            (0, 'Freelance', 'income', '#00ffff', 'fas fa-laptop-code', TRUE),
+            (0, 'Investimentos', 'income', '#9d00ff', 'fas fa-chart-line', TRUE),
+            (0, 'Alimentação', 'expense', '#ff3366', 'fas fa-utensils', TRUE),
+            (0, 'Transporte', 'expense', '#ff9900', 'fas fa-car', TRUE),
+            (0, 'Moradia', 'expense', '#ff0066', 'fas fa-home', TRUE),
+            (0, 'Lazer', 'expense', '#00ccff', 'fas fa-gamepad', TRUE)
+        ''',
+        # Transações das cópias passam a apontar para a padrão de mesmo nome e tipo
+        '''
+        UPDATE transactions SET category_id = (
+            SELECT g.id FROM categories u
+            JOIN categories g ON g.user_id = 0 AND g.name = u.name AND g.type = u.type
+            WHERE u.id = transactions.category_id
+        )
+        WHERE category_id IN (
+            SELECT u.id FROM categories u
+            JOIN categories g ON g.user_id = 0 AND g.name = u.name AND g.type = u.type
+            WHERE u.user_id <> 0
+        )
+        ''',
+        # Cópias com cor, ícone ou orçamento diferentes viram personalização
+        '''
+        UPDATE categories SET overrides_id = (
+            SELECT g.id FROM categories g
+            WHERE g.user_id = 0 AND g.name = categories.name AND g.type = categories.type
+        )
+        WHERE user_id <> 0 AND EXISTS (
+            SELECT 1 FROM categories g
+            WHERE g.user_id = 0 AND g.name = categories.name AND g.type = categories.type
+            AND (COALESCE(g.color, '') <> COALESCE(categories.color, '')
+                 OR COALESCE(g.icon, '') <> COALESCE(categories.icon, '')
+                 OR COALESCE(categories.budget_limit_cents, 0) <> 0)
+        )
+        ''',
+        '''
+        DELETE FROM categories
+        WHERE user_id <> 0 AND overrides_id IS NULL AND EXISTS (
+            SELECT 1 FROM categories g
+            WHERE g.user_id = 0 AND g.name = categories.name AND g.type = categories.type
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_categories_user_overrides ON categories (user_id, overrides_id)',
+        # Os agregados são por categoria: recarga com o SQL desta versão
+        'DELETE FROM transaction_rollups',
+        ForDialect(
+            sqlite='''
+                INSERT INTO transaction_rollups (user_id, month, type, category_id, total_cents, tx_count)
+                SELECT user_id, strftime('%Y-%m-01', transaction_date), type, COALESCE(category_id, 0),
+                       SUM(amount_cents), COUNT(*)
+                FROM transactions
+                GROUP BY 1, 2, 3, 4
+            ''',
+            postgresql='''
+                INSERT INTO transaction_rollups (user_id, month, type, category_id, total_cents, tx_count)
+                SELECT user_id, DATE_TRUNC('month', transaction_date)::date, type, COALESCE(category_id, 0),
+                       SUM(amount_cents), COUNT(*)
+                FROM transactions
+                GROUP BY 1, 2, 3, 4
+            ''',
+        ),
+    )),
+
+    # Personalização guarda só o que o usuário mudou; o resto segue a padrão
+    Migration(7, 'personalização de categorias só com os campos alterados', (
+        Call(_category_name_nullable),
+        '''
+        UPDATE categories SET
+            name = CASE WHEN name = (SELECT g.name FROM categories g WHERE g.id = categories.overrides_id)
+                        THEN NULL ELSE name END,
+            color = CASE WHEN color = (SELECT g.color FROM categories g WHERE g.id = categories.overrides_id)
+                         THEN NULL ELSE color END,
+            icon = CASE WHEN icon = (SELECT g.icon FROM categories g WHERE g.id = categories.overrides_id)
+                        THEN NULL ELSE icon END,
+            budget_limit_cents = CASE WHEN COALESCE(budget_limit_cents, 0) = (
+                                          SELECT COALESCE(g.budget_limit_cents, 0) FROM categories g
+                                          WHERE g.id = categories.overrides_id)
+                                      THEN NULL ELSE budget_limit_cents END,
+            is_hidden = CASE WHEN COALESCE(is_hidden, FALSE) = (
+                                 SELECT COALESCE(g.is_hidden, FALSE) FROM categories g
+                                 WHERE g.id = categories.overrides_id)
+                             THEN NULL ELSE is_hidden END
+        WHERE overrides_id IS NOT NULL
+        ''',
+    )),
+
+    # Versão dos dados por usuário (ETags e cache), incrementada na transação da escrita
+    Migration(8, 'versões dos dados por usuário', (
+        '''
+        CREATE TABLE IF NOT EXISTS user_data_versions (
+            user_id INTEGER PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+        ''',
+    )),
+
+    # Listagem de notificações (ORDER BY id, com ou sem ?since e ?unread=1)
+    Migration(9, 'índices da listagem incremental de notificações', (
+        'CREATE INDEX IF NOT EXISTS idx_notifications_user_id ON notifications (user_id, id)',
+        'CREATE INDEX IF NOT EXISTS idx_notifications_unread ON notifications (user_id, id) WHERE is_read = FALSE',
+    )),
+]
+
+
+def _table_exists(cursor, db_type):
+    if db_type == 'postgresql':
+        cursor.execute("SELECT to_regclass('schema_version') IS NOT NULL")
+    else:
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'")
+    return bool(cursor.fetchone()[0])
+
+
+def applied_migrations(cursor, db_type):
+    """{versão: checksum} das migrações já aplicadas"""
+    if not _table_exists(cursor, db_type):
+        return {}
+    cursor.execute('SELECT version, checksum FROM schema_version')
+    return {int(row[0]): row[1] for row in cursor.fetchall()}
+
+
+def pending_migrations(applied, db_type):
+    """Migrações a aplicar; levanta MigrationError se alguma aplicada mudou"""
+    pending = []
+    for migration in MIGRATIONS:
+        checksum = applied.get(migration.version)
+        if checksum is None:
+            pending.append(migration)
+        elif checksum != migration.checksum(db_type):
+            raise MigrationError(
+                f'Migração {migration.version} ({migration.name}) foi alterada depois de aplicada'
+            )
+    return pending
+
+
+def migrate(conn, db_type):
+    """Aplica as migrações pendentes, cada uma em sua transação
+
+    Retorna a lista de (versão, nome, duração em ms) aplicadas.
+    """
+    cursor = conn.cursor()
+    if not pending_migrations(applied_migrations(cursor, db_type), db_type):
+        conn.rollback()
+        return []
+
+    done = []
+    while True:
+        # Trava e relê: outro worker pode ter aplicado enquanto esperávamos
+        if db_type == 'postgresql':
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', (LOCK_KEY,))
+        else:
+            cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                checksum VARCHAR(64) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                duration_ms INTEGER
+            )
+        ''')
+        pending = pending_migrations(applied_migrations(cursor, db_type), db_type)
+        if not pending:
+            conn.commit()
+            return done
+
+        migration = pending[0]
+        started = time.perf_counter()
+        try:
+            for step in migration.compiled(db_type):
+                if isinstance(step, str):
+                    cursor.execute(step)
+                else:
+                    step.apply(cursor, db_type)
+            duration = int((time.perf_counter() - started) * 1000)
+            p = placeholder(db_type)
+            cursor.execute(
+                f'INSERT INTO schema_version (version, name, checksum, duration_ms) VALUES ({p}, {p}, {p}, {p})',
+                (migration.version, migration.name, migration.checksum(db_type), duration)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        done.append((migration.version, migration.name, duration))
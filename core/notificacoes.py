@@ -0,0 +1,259 @@
+"""
+Gravação e leitura de notificações
+
+As rotas que já têm uma transação aberta inserem a notificação no mesmo
+cursor (um único commit). As demais (ex.: login) enfileiram a notificação
+para o NotificationWriter, que grava em lote com executemany em segundo
+plano e só então avisa quem está interessado (cache, stream SSE).
+
+O total de não lidas fica em notification_counters, mantido na inserção e
+na confirmação de leitura; a listagem é incremental por id ("since").
+"""
+
+import atexit
+import os
+import queue
+import threading
+
+from core.consultas import placeholder, register, run, run_many
+from core.serializacao import columnar, cursor_columns
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_ACK_IDS = 500
+
+# Ids por execução da confirmação; lotes menores repetem o último id
+ACK_BATCH = 50
+
+_LIST = '''
+    SELECT * FROM notifications
+    WHERE user_id = {{p}} {where}
+    ORDER BY id {order}
+    LIMIT {{p}}
+'''
+
+register({
+    'notifications.insert': '''
+        INSERT INTO notifications (user_id, title, message, type) VALUES ({p}, {p}, {p}, {p})
+        {returning_id}
+    ''',
+    'notifications.bump_counter': '''
+        INSERT INTO notification_counters (user_id, unread) VALUES ({p}, {p})
+        ON CONFLICT (user_id) DO UPDATE SET unread = notification_counters.unread + excluded.unread
+    ''',
+    'notifications.unread': 'SELECT unread FROM notification_counters WHERE user_id = {p}',
+    # Listagem: mais recentes primeiro, ou incremental a partir de um id
+    'notifications.latest': _LIST.format(where='', order='DESC'),
+    'notifications.latest_unread': _LIST.format(where='AND is_read = FALSE', order='DESC'),
+    'notifications.since': _LIST.format(where='AND id > {p}', order='ASC'),
+    'notifications.since_unread': _LIST.format(where='AND id > {p} AND is_read = FALSE', order='ASC'),
+    'notifications.ack_all': 'UPDATE notifications SET is_read = TRUE WHERE user_id = {p} AND is_read = FALSE',
+    'notifications.ack_ids': f'''
+        UPDATE notifications SET is_read = TRUE
+        WHERE user_id = {{p}} AND is_read = FALSE AND id IN ({', '.join(['{p}'] * ACK_BATCH)})
+    ''',
+    'notifications.decrement': 'UPDATE notification_counters SET unread = unread - {p} WHERE user_id = {p}',
+})
+
+
+def insert_notification(cursor, db_type, user_id, title, message, type='info'):
+    """Insere no cursor do chamador (sem commit); retorna o payload do evento"""
+    run(cursor, db_type, 'notifications.insert', (user_id, title, message, type))
+    if db_type == 'postgresql':
+        notification_id = cursor.fetchone()['id']
+    else:
+        notification_id = cursor.lastrowid
+    bump_counters(cursor, db_type, {user_id: 1})
+    return {'id': notification_id, 'user_id': user_id, 'title': title, 'message': message, 'type': type}
+
+
+def insert_notifications(cursor, db_type, rows):
+    """Insere várias notificações (user_id, title, message, type) de uma vez
+
+    Retorna os payloads com os ids atribuídos pelo banco.
+    """
+    if not rows:
+        return []
+    if db_type == 'postgresql':
+        from psycopg2.extras import execute_values
+        p = placeholder(db_type)
+        returned = execute_values(
+            cursor,
+            'INSERT INTO notifications (user_id, title, message, type) VALUES %s RETURNING id',
+            rows, template=f'({p}, {p}, {p}, {p})', fetch=True
+        )
+        ids = [row[0] for row in returned]
+    else:
+        run_many(cursor, db_type, 'notifications.insert', rows)
+        # SQLite serializa escritores: os rowids do lote são consecutivos
+        cursor.execute('SELECT last_insert_rowid()')
+        last = cursor.fetchone()[0]
+        ids = range(last - len(rows) + 1, last + 1)
+
+    counts = {}
+    for row in rows:
+        counts[row[0]] = counts.get(row[0], 0) + 1
+    bump_counters(cursor, db_type, counts)
+
+    return [
+        {'id': notification_id, 'user_id': user_id, 'title': title, 'message': message, 'type': type}
+        for notification_id, (user_id, title, message, type) in zip(ids, rows)
+    ]
+
+
+def bump_counters(cursor, db_type, counts):
+    """Soma `counts` ({user_id: n}) ao contador de não lidas"""
+    run_many(cursor, db_type, 'notifications.bump_counter', counts.items())
+
+
+def unread_count(cursor, db_type, user_id):
+    run(cursor, db_type, 'notifications.unread', (user_id,))
+    row = cursor.fetchone()
+    return int(row['unread']) if row else 0
+
+
+def fetch_notifications(cursor, db_type, user_id, since=None, limit=DEFAULT_LIMIT, unread_only=False):
+    """Lista notificações; retorna ({columns, data}, há mais)
+
+    Sem `since`: as mais recentes primeiro. Com `since`: apenas as de id
+    maior, em ordem crescente, para o cliente avançar pelo último id visto.
+    As linhas saem em colunas direto do cursor, sem dict por linha.
+    """
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    name = 'notifications.since' if since is not None else 'notifications.latest'
+    params = [user_id] + ([int(since)] if since is not None else []) + [limit + 1]
+    run(cursor, db_type, name + ('_unread' if unread_only else ''), params)
+    rows = cursor.fetchall()
+    return columnar(rows[:limit], cursor_columns(cursor)), len(rows) > limit
+
+
+def acknowledge(cursor, db_type, user_id, ids=None):
+    """Marca como lidas as notificações `ids` (todas se None); retorna quantas mudaram"""
+    if ids is None:
+        run(cursor, db_type, 'notifications.ack_all', (user_id,))
+        marked = cursor.rowcount
+    else:
+        ids = [int(i) for i in ids][:MAX_ACK_IDS]
+        if not ids:
+            return 0
+        marked = 0
+        for start in range(0, len(ids), ACK_BATCH):
+            batch = ids[start:start + ACK_BATCH]
+            batch += batch[-1:] * (ACK_BATCH - len(batch))
+            run(cursor, db_type, 'notifications.ack_ids', [user_id] + batch)
+            marked += cursor.rowcount
+
+    if marked > 0:
+        run(cursor, db_type, 'notifications.decrement', (marked, user_id))
+    return marked
+
+
+def rebuild_counters(cursor, db_type):
+    """Recalcula os contadores de não lidas a partir da tabela de notificações"""
+    cursor.execute('DELETE FROM notification_counters')
+    cursor.execute('''
+        INSERT INTO notification_counters (user_id, unread)
+        SELECT user_id, COUNT(*) FROM notifications
+        WHERE is_read = FALSE
+        GROUP BY user_id
+    ''')
+
+
+def ensure_counters(cursor, db_type):
+    """Popula os contadores na primeira execução sobre uma base existente"""
+    cursor.execute('SELECT COUNT(*) AS total FROM notification_counters')
+    if cursor.fetchone()['total']:
+        return False
+    rebuild_counters(cursor, db_type)
+    return True
+
+
+class NotificationWriter:
+    """Fila de notificações gravadas em lote por uma thread em segundo plano
+
+    `connect` devolve uma conexão do pool; `on_flushed(notifications)` é
+    chamado depois do commit de cada lote.
+    """
+
+    def __init__(self, db_type, connect, on_flushed=None, batch_size=100, interval=1.0):
+        self.db_type = db_type
+        self.connect = connect
+        self.on_flushed = on_flushed
+        self.batch_size = batch_size
+        self.interval = interval
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stats = {'queued': 0, 'written': 0, 'batches': 0, 'failed': 0}
+        atexit.register(self.flush)
+
+    def _ensure_thread(self):
+        # A thread não sobrevive ao fork dos workers do gunicorn
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='notification-writer', daemon=True)
+                self._thread.start()
+
+    def enqueue(self, user_id, title, message, type='info'):
+        """Agenda a notificação; retorna imediatamente"""
+        self._queue.put((user_id, title, message, type))
+        with self._lock:
+            self._stats['queued'] += 1
+        self._ensure_thread()
+
+    def _drain(self, block):
+        rows = []
+        try:
+            rows.append(self._queue.get(timeout=self.interval) if block else self._queue.get_nowait())
+            while len(rows) < self.batch_size:
+                rows.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return rows
+
+    def _write(self, rows):
+        conn = self.connect()
+        try:
+            notifications = insert_notifications(conn.cursor(), self.db_type, rows)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            with self._lock:
+                self._stats['failed'] += len(rows)
+            print(f"❌ Erro ao gravar notificações em lote: {e}")
+            return
+        finally:
+            conn.close()
+
+        with self._lock:
+            self._stats['written'] += len(rows)
+            self._stats['batches'] += 1
+        if self.on_flushed is not None:
+            self.on_flushed(notifications)
+
+    def _run(self):
+        while True:
+            rows = self._drain(block=True)
+            if rows:
+                self._write(rows)
+
+    def flush(self):
+        """Grava imediatamente o que estiver na fila (testes, scripts e saída)"""
+        while True:
+            rows = self._drain(block=False)
+            if not rows:
+                return
+            self._write(rows)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pending'] = self._queue.qsize()
+        stats['batch_size'] = self.batch_size
+        stats['interval'] = self.interval
+        return stats
@@ -0,0 +1,70 @@
+"""
+Períodos de datas como intervalos semiabertos [início, fim)
+
+Filtrar por `transaction_date >= início AND transaction_date < fim` mantém a
+coluna crua na cláusula WHERE, permitindo varredura por faixa no índice
+(user_id, transaction_date, type) nos dois bancos.
+"""
+
+from datetime import date, datetime, timedelta
+
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+
+
+def to_date(value=None):
+    """Converte date/datetime/'YYYY-MM-DD'/'YYYY-MM' em date (padrão: hoje)"""
+    if value is None:
+        return date.today()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    if len(text) == 7:
+        return datetime.strptime(text, '%Y-%m').date()
+    return datetime.strptime(text[:10], '%Y-%m-%d').date()
+
+
+def bucket_start(value, granularity='month'):
+    """Primeiro dia do período que contém a data"""
+    d = to_date(value)
+    if granularity == 'day':
+        return d
+    if granularity == 'week':
+        return d - timedelta(days=d.weekday())
+    if granularity == 'month':
+        return d.replace(day=1)
+    if granularity == 'quarter':
+        return date(d.year, 3 * ((d.month - 1) // 3) + 1, 1)
+    if granularity == 'year':
+        return date(d.year, 1, 1)
+    raise ValueError(f'Granularidade inválida: {granularity}')
+
+
+def shift_bucket(start, granularity='month', steps=1):
+    """Desloca o início de um período em `steps` períodos (negativo volta)"""
+    if granularity == 'day':
+        return start + timedelta(days=steps)
+    if granularity == 'week':
+        return start + timedelta(weeks=steps)
+    months = {'month': 1, 'quarter': 3, 'year': 12}.get(granularity)
+    if months is None:
+        raise ValueError(f'Granularidade inválida: {granularity}')
+    index = start.year * 12 + (start.month - 1) + months * steps
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def period_range(value=None, granularity='month'):
+    """Intervalo semiaberto [início, fim) do período que contém a data"""
+    start = bucket_start(value, granularity)
+    return start, shift_bucket(start, granularity, 1)
+
+
+def month_range(value=None):
+    """Intervalo [primeiro dia do mês, primeiro dia do mês seguinte)"""
+    return period_range(value, 'month')
+
+
+def range_params(start, end):
+    """Parâmetros SQL ('YYYY-MM-DD') para um intervalo semiaberto"""
+    return start.isoformat(), end.isoformat()
@@ -0,0 +1,98 @@
+"""
+Resumo financeiro por usuário em uma única consulta
+"""
+
+from dataclasses import dataclass
+
+from core.consultas import register, run
+from core.dinheiro import from_cents
+from core.periodos import bucket_start
+
+
+@dataclass
+class UserSummary:
+    """Totais do usuário usados pelo dashboard e pelas estatísticas rápidas
+
+    Os valores ficam em centavos; as propriedades devolvem reais.
+    """
+    total_income_cents: int = 0
+    total_expense_cents: int = 0
+    month_income_cents: int = 0
+    month_expense_cents: int = 0
+    transaction_count: int = 0
+    active_goals: int = 0
+    unread_notifications: int = 0
+
+    @property
+    def total_income(self) -> float:
+        return from_cents(self.total_income_cents)
+
+    @property
+    def total_expense(self) -> float:
+        return from_cents(self.total_expense_cents)
+
+    @property
+    def month_income(self) -> float:
+        return from_cents(self.month_income_cents)
+
+    @property
+    def month_expense(self) -> float:
+        return from_cents(self.month_expense_cents)
+
+    @property
+    def balance(self) -> float:
+        return from_cents(self.total_income_cents - self.total_expense_cents)
+
+    @property
+    def month_balance(self) -> float:
+        return from_cents(self.month_income_cents - self.month_expense_cents)
+
+    def to_dict(self) -> dict:
+        return {
+            'total_income': self.total_income,
+            'total_expense': self.total_expense,
+            'month_income': self.month_income,
+            'month_expense': self.month_expense,
+            'transaction_count': self.transaction_count,
+            'active_goals': self.active_goals,
+            'unread_notifications': self.unread_notifications,
+            'balance': self.balance,
+            'month_balance': self.month_balance,
+        }
+
+
+# Agregação condicional sobre os agregados mensais: todos os totais em uma ida ao banco
+register({
+    'summary.by_user': '''
+        SELECT
+            COALESCE(SUM(CASE WHEN type = 'income' THEN total_cents END), 0) AS total_income_cents,
+            COALESCE(SUM(CASE WHEN type = 'expense' THEN total_cents END), 0) AS total_expense_cents,
+            COALESCE(SUM(CASE WHEN type = 'income' AND month = {p} THEN total_cents END), 0) AS month_income_cents,
+            COALESCE(SUM(CASE WHEN type = 'expense' AND month = {p} THEN total_cents END), 0) AS month_expense_cents,
+            COALESCE(SUM(tx_count), 0) AS transaction_count,
+            (SELECT COUNT(*) FROM goals WHERE user_id = {p} AND is_completed = FALSE) AS active_goals,
+            COALESCE((SELECT unread FROM notification_counters WHERE user_id = {p}), 0) AS unread_notifications
+        FROM transaction_rollups
+        WHERE user_id = {p}
+    ''',
+})
+
+
+def get_user_summary(cursor, db_type, user_id, month=None):
+    """Busca o resumo do usuário para o mês informado (YYYY-MM, padrão: atual)"""
+    month_start = bucket_start(month, 'month').isoformat()
+
+    run(cursor, db_type, 'summary.by_user', (month_start, month_start, user_id, user_id, user_id))
+    row = cursor.fetchone()
+    if not row:
+        return UserSummary()
+
+    return UserSummary(
+        total_income_cents=int(row['total_income_cents']),
+        total_expense_cents=int(row['total_expense_cents']),
+        month_income_cents=int(row['month_income_cents']),
+        month_expense_cents=int(row['month_expense_cents']),
+        transaction_count=int(row['transaction_count']),
+        active_goals=int(row['active_goals']),
+        unread_notifications=int(row['unread_notifications']),
+    )
@@ -0,0 +1,138 @@
+"""
+Hash de senhas com custo configurável e executor limitado
+
+O método segue a sintaxe do werkzeug ('scrypt:32768:8:1',
+'pbkdf2:sha256:600000'). Hashes gravados com outro método ou custo são
+refeitos no próximo login bem-sucedido (needs_rehash).
+
+As verificações rodam em um pool pequeno de threads com fila limitada.
+scrypt e pbkdf2 liberam o GIL, então o pool limita quantos núcleos o login
+ocupa ao mesmo tempo. Quando a fila enche, a requisição recebe AuthBusy em
+vez de esperar e prender uma thread do gunicorn.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class AuthBusy(RuntimeError):
+    """Fila de verificações de senha cheia"""
+
+
+class PasswordHasher:
+    """Gera e verifica hashes no executor limitado
+
+    `max_workers` threads fazem o trabalho; até `max_pending` chamadas
+    podem aguardar vaga por no máximo `wait` segundos.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, max_workers=2, max_pending=16, wait=5.0):
+        # Forma canônica do método (o werkzeug completa parâmetros omitidos)
+        self.method = generate_password_hash('', method=method).split('$', 1)[0]
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.wait = wait
+
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._stats = {'hashed': 0, 'verified': 0, 'failed': 0, 'outdated': 0, 'rejected': 0, 'total_ms': 0.0}
+
+    def _pool(self):
+        # O executor não sobrevive ao fork dos workers do gunicorn
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='password-hasher')
+            return self._executor
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(timeout=self.wait):
+            self._count('rejected')
+            raise AuthBusy('Muitas autenticações simultâneas; tente novamente')
+        started = time.perf_counter()
+        try:
+            return self._pool().submit(function, *args).result()
+        finally:
+            self._slots.release()
+            with self._lock:
+                self._stats['total_ms'] += (time.perf_counter() - started) * 1000
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def hash(self, password):
+        """Hash com o método configurado"""
+        hashed = self._run(generate_password_hash, password, self.method)
+        self._count('hashed')
+        return hashed
+
+    def needs_rehash(self, stored):
+        return stored.split('$', 1)[0] != self.method
+
+    def verify(self, stored, password):
+        """Retorna (senha confere, hash deve ser refeito)"""
+        if not stored:
+            return False, False
+        ok = self._run(check_password_hash, stored, password)
+        self._count('verified' if ok else 'failed')
+        rehash = ok and self.needs_rehash(stored)
+        if rehash:
+            self._count('outdated')
+        return ok, rehash
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        calls = stats['hashed'] + stats['verified'] + stats['failed']
+        stats['avg_ms'] = round(stats['total_ms'] / calls, 2) if calls else 0.0
+        stats['total_ms'] = round(stats['total_ms'], 2)
+        stats.update(method=self.method, max_workers=self.max_workers, max_pending=self.max_pending)
+        return stats
+
+
+def benchmark(methods, seconds=2.0, threads=1):
+    """Logins por segundo de um worker para cada método/custo
+
+    `threads` verificações concorrentes simulam as threads do gunicorn
+    disputando o mesmo executor (max_workers=threads).
+    """
+    results = []
+    for method in methods:
+        hasher = PasswordHasher(method, max_workers=threads, max_pending=threads)
+        stored = hasher.hash('senha-de-benchmark')
+        done = [0]
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def loop():
+            while time.perf_counter() < deadline:
+                hasher.verify(stored, 'senha-de-benchmark')
+                with lock:
+                    done[0] += 1
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=loop) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        results.append({
+            'method': hasher.method,
+            'threads': threads,
+            'logins': done[0],
+            'logins_per_sec': round(done[0] / elapsed, 1),
+            'ms_per_login': round(elapsed * 1000 * threads / max(done[0], 1), 1),
+        })
+    return results
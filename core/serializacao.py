@@ -0,0 +1,209 @@
+"""
+Serialização JSON das respostas da API
+
+FastJSONProvider substitui o provider padrão do Flask: usa orjson quando
+instalado e o json da biblioteca padrão caso contrário, com as mesmas
+regras nos dois caminhos:
+
+- Decimal (SUM/NUMERIC do psycopg2) sai como número;
+- date/datetime/time saem em ISO ('2026-10-05', '2026-10-05 14:30:00'),
+  o mesmo texto que o SQLite devolve;
+- linhas do cursor não viram dict: columnar() transpõe as sequências
+  do cursor (sqlite3.Row ou DictRow do psycopg2) em listas por coluna,
+  que os codificadores escrevem de forma nativa;
+- objetos com to_dict() (UserSummary, TimeSeries, ImportResult) e
+  dataclasses viram objetos JSON.
+
+columnar() transpõe uma lista de linhas para {columns, data} — o formato
+?format=columnar das listagens, que não repete as chaves em cada linha.
+
+As chaves não são ordenadas e o texto sai em UTF-8 (sem escapes \\uXXXX).
+"""
+
+import dataclasses
+import json
+import sqlite3
+import time
+from datetime import date, datetime, time as dtime
+from decimal import Decimal
+from operator import itemgetter
+
+from flask.json.provider import DefaultJSONProvider
+
+from core.dinheiro import from_cents
+
+try:
+    import orjson
+except ImportError:  # opcional: sem ele vale o json padrão
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+
+def iso(value):
+    """Data/hora no formato usado pelo banco (datetime com espaço, sem micros)"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    if isinstance(value, (date, dtime)):
+        return value.isoformat()
+    return str(value)
+
+
+def default(value):
+    """Tipos que os codificadores não conhecem"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (date, dtime)):
+        return iso(value)
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def cursor_columns(cursor):
+    """Nomes das colunas do último SELECT, na ordem do cursor"""
+    return [column[0] for column in cursor.description]
+
+
+def columnar(rows, columns=None, money=()):
+    """Linhas -> {'columns': [...], 'data': {coluna: [valores]}}
+
+    As sequências do cursor (sqlite3.Row, DictRow) são transpostas de uma
+    vez (zip), sem montar um dict por linha; `columns` vem de
+    cursor_columns() para listar as colunas mesmo sem linhas. Para cada
+    `campo` em `money`, a coluna `campo_cents` sai como `campo` em reais.
+    """
+    keys = list(rows[0].keys()) if rows else []
+    if columns is None:
+        columns = keys
+    if not rows:
+        values = [[] for _ in columns]
+    elif not isinstance(rows[0], dict) and keys == columns:
+        values = [list(column) for column in zip(*rows)]
+    elif len(columns) == 1:
+        values = [[row[columns[0]] for row in rows]]
+    else:
+        values = [list(column) for column in zip(*map(itemgetter(*columns), rows))]
+
+    data = dict(zip(columns, values))
+    for field in money:
+        key = f'{field}_cents'
+        if key in data:
+            columns = [field if name == key else name for name in columns]
+            data[field] = [from_cents(value) for value in data.pop(key)]
+    return {'columns': columns, 'data': {name: data[name] for name in columns}}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Provider do Flask com orjson (se houver) e fallback no json padrão
+
+    `encoder='stdlib'` força a biblioteca padrão; 'auto' e 'orjson' usam
+    orjson quando o módulo está instalado.
+    """
+
+    default = staticmethod(default)
+    ensure_ascii = False
+    sort_keys = False
+
+    def __init__(self, app, encoder='auto'):
+        super().__init__(app)
+        self.encoder = 'orjson' if encoder != 'stdlib' and orjson is not None else 'stdlib'
+        if encoder == 'orjson' and orjson is None:
+            print("⚠️  orjson não instalado: usando json padrão")
+
+    def _orjson_option(self, kwargs):
+        """Opções do orjson equivalentes aos kwargs (None = exige json padrão)"""
+        if self.encoder != 'orjson':
+            return None
+        option = ORJSON_OPTIONS
+        for key, value in kwargs.items():
+            if key == 'indent' and value == 2:
+                option |= orjson.OPT_INDENT_2
+            elif key == 'separators' and tuple(value) == (',', ':'):
+                continue
+            elif key == 'sort_keys' and value:
+                option |= orjson.OPT_SORT_KEYS
+            else:
+                return None
+        return option
+
+    def dumps(self, obj, **kwargs):
+        option = self._orjson_option(kwargs)
+        if option is not None:
+            return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.encoder == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        """Resposta JSON montada direto dos bytes do codificador"""
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        dump_args = {'indent': 2} if pretty else {'separators': (',', ':')}
+
+        option = self._orjson_option(dump_args)
+        if option is not None:
+            body = orjson.dumps(obj, default=self.default, option=option) + b'\n'
+        else:
+            body = f'{super().dumps(obj, **dump_args)}\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def benchmark(rows=10000, repeat=5):
+    """Tempo para serializar `rows` linhas de transação com cada codificador
+
+    As linhas vêm de um cursor SQLite em memória (sqlite3.Row) e levam um
+    Decimal e uma data, como as do PostgreSQL. O caminho antigo monta
+    dict(row) em cada linha e usa o json padrão ordenando as chaves; os
+    demais transpõem as linhas em colunas e codificam com cada provider.
+    """
+    from flask import Flask
+    from flask.json.provider import _default as flask_default
+
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute('''CREATE TABLE t (id INTEGER, transaction_date TEXT, type TEXT,
+                    category_name TEXT, color TEXT, amount_cents INTEGER, description TEXT)''')
+    conn.executemany('INSERT INTO t VALUES (?, ?, ?, ?, ?, ?, ?)', [
+        (i, f'2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}', 'expense' if i % 3 else 'income',
+         'Alimentação', '#e17055', 1000 + i * 7, f'Transação de teste nº {i}')
+        for i in range(rows)
+    ])
+    data = conn.execute('SELECT * FROM t').fetchall()
+    conn.close()
+    extra = {'total': Decimal('12345.67'), 'month': date(2026, 10, 1)}
+
+    app = Flask(__name__)
+    candidates = [('dict(row) + json padrão (antigo)',
+                   lambda: json.dumps({'transactions': [dict(row) for row in data], **extra},
+                                      default=flask_default, sort_keys=True, separators=(',', ':')))]
+    for encoder in ('stdlib', 'orjson'):
+        if encoder == 'orjson' and orjson is None:
+            continue
+        provider = FastJSONProvider(app, encoder=encoder)
+        candidates.append((f'columnar ({encoder})',
+                           lambda provider=provider: provider.dumps({'transactions': columnar(data), **extra},
+                                                                    separators=(',', ':'))))
+
+    results = []
+    for name, encode in candidates:
+        size = len(encode().encode('utf-8'))
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            encode()
+            timings.append((time.perf_counter() - started) * 1000)
+        results.append({'encoder': name, 'rows': rows, 'bytes': size, 'ms': round(min(timings), 2)})
+    baseline = results[0]['ms']
+    for result in results:
+        result['speedup'] = round(baseline / result['ms'], 1) if result['ms'] else 0.0
+    return results
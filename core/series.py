@@ -0,0 +1,135 @@
+"""
+Séries temporais de receitas e despesas agrupadas no banco
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List
+
+from core.consultas import register, run
+from core.dinheiro import from_cents
+from core.periodos import bucket_start, shift_bucket, range_params
+
+# Janela máxima por granularidade (vários anos em todas elas)
+MAX_PERIODS = {
+    'day': 366,
+    'week': 260,
+    'month': 120,
+    'quarter': 40,
+    'year': 20,
+}
+
+# Expressão que leva a data ao início do seu período ('YYYY-MM-DD')
+BUCKET_EXPRESSIONS = {
+    'sqlite': {
+        'day': "date({column})",
+        'week': "date({column}, 'weekday 0', '-6 days')",
+        'month': "strftime('%Y-%m-01', {column})",
+        'quarter': "printf('%s-%02d-01', strftime('%Y', {column}), "
+                   "((CAST(strftime('%m', {column}) AS INTEGER) - 1) / 3) * 3 + 1)",
+        'year': "strftime('%Y-01-01', {column})",
+    },
+    'postgresql': {
+        granularity: f"TO_CHAR(DATE_TRUNC('{granularity}', {{column}}), 'YYYY-MM-DD')"
+        for granularity in MAX_PERIODS
+    },
+}
+
+# Períodos alinhados a meses saem dos agregados mensais; os demais da tabela crua
+ROLLUP_GRANULARITIES = ('month', 'quarter', 'year')
+
+
+def bucket_label(start, granularity):
+    """Rótulo curto de um período ('Oct', 'T4/2026', '2026', '05/10')"""
+    if granularity == 'month':
+        return start.strftime('%b')
+    if granularity == 'quarter':
+        return f"T{(start.month - 1) // 3 + 1}/{start.year}"
+    if granularity == 'year':
+        return str(start.year)
+    return start.strftime('%d/%m')
+
+
+def series_sql(db_type, granularity):
+    """Consulta agrupada da granularidade (uma ida ao banco para toda a janela)"""
+    if granularity in ROLLUP_GRANULARITIES:
+        table, column, amount = 'transaction_rollups', 'month', 'total_cents'
+    else:
+        table, column, amount = 'transactions', 'transaction_date', 'amount_cents'
+    bucket = BUCKET_EXPRESSIONS[db_type][granularity].format(column=column)
+    return f'''
+        SELECT {bucket} AS bucket, type, COALESCE(SUM({amount}), 0) AS total_cents
+        FROM {table}
+        WHERE user_id = {{p}} AND {column} >= {{p}} AND {column} < {{p}}
+        GROUP BY 1, 2
+    '''
+
+
+# Uma instrução registrada por granularidade ('series.month' etc.)
+register({
+    f'series.{granularity}': {db_type: series_sql(db_type, granularity) for db_type in BUCKET_EXPRESSIONS}
+    for granularity in MAX_PERIODS
+})
+
+
+@dataclass
+class TimeSeries:
+    """Receitas e despesas por período, com períodos vazios preenchidos com zero
+
+    As somas ficam em centavos; income, expense e balance devolvem reais.
+    """
+    granularity: str
+    buckets: List[date] = field(default_factory=list)
+    income_cents: List[int] = field(default_factory=list)
+    expense_cents: List[int] = field(default_factory=list)
+
+    @property
+    def income(self) -> List[float]:
+        return [from_cents(value) for value in self.income_cents]
+
+    @property
+    def expense(self) -> List[float]:
+        return [from_cents(value) for value in self.expense_cents]
+
+    @property
+    def balance(self) -> List[float]:
+        return [from_cents(i - e) for i, e in zip(self.income_cents, self.expense_cents)]
+
+    def labels(self) -> List[str]:
+        """Rótulos curtos para os gráficos"""
+        return [bucket_label(start, self.granularity) for start in self.buckets]
+
+    def to_dict(self) -> dict:
+        return {
+            'granularity': self.granularity,
+            'buckets': [start.isoformat() for start in self.buckets],
+            'labels': self.labels(),
+            'income': self.income,
+            'expense': self.expense,
+            'balance': self.balance,
+        }
+
+
+def get_time_series(cursor, db_type, user_id, granularity='month', periods=6, end=None):
+    """Busca a série dos últimos `periods` períodos até o que contém `end`"""
+    if granularity not in MAX_PERIODS:
+        raise ValueError(f'Granularidade inválida: {granularity}')
+    periods = max(1, min(int(periods), MAX_PERIODS[granularity]))
+
+    last = bucket_start(end, granularity)
+    first = shift_bucket(last, granularity, -(periods - 1))
+    buckets = [shift_bucket(first, granularity, i) for i in range(periods)]
+    start, stop = range_params(first, shift_bucket(last, granularity, 1))
+
+    run(cursor, db_type, f'series.{granularity}', (user_id, start, stop))
+
+    totals = {}
+    for row in cursor.fetchall():
+        totals[(str(row['bucket']), row['type'])] = int(row['total_cents'])
+
+    series = TimeSeries(granularity=granularity, buckets=buckets)
+    for bucket in buckets:
+        key = bucket.isoformat()
+        series.income_cents.append(totals.get((key, 'income'), 0))
+        series.expense_cents.append(totals.get((key, 'expense'), 0))
+    return series
@@ -0,0 +1,178 @@
+"""
+Listagem de transações paginada por cursor (keyset)
+
+A ordem é (transaction_date DESC, id DESC) e o cursor guarda a última
+posição lida, então cada página é uma varredura curta no índice
+(user_id, transaction_date, id) — o custo não cresce com o número da página.
+"""
+
+import base64
+from datetime import timedelta
+
+from core.consultas import placeholder
+from core.dinheiro import from_cents
+from core.periodos import month_range, to_date
+from core.serializacao import columnar as to_columnar, iso as _iso
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Categoria da transação com a personalização do usuário (core.categorias)
+CATEGORY_JOIN = '''LEFT JOIN categories c ON t.category_id = c.id
+        LEFT JOIN categories o ON o.overrides_id = t.category_id AND o.user_id = t.user_id'''
+
+
+class InvalidCursor(ValueError):
+    """Cursor de paginação malformado"""
+
+
+def encode_cursor(transaction_date, transaction_id):
+    """Cursor opaco a partir da última linha da página"""
+    raw = f'{_iso(transaction_date)}|{int(transaction_id)}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Retorna (data ISO, id) do cursor"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        day, transaction_id = raw.split('|')
+        to_date(day)
+        return day, int(transaction_id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor('Cursor inválido')
+
+
+def parse_filters(args):
+    """Extrai filtros (tipo, categoria, período) dos parâmetros da requisição"""
+    filters = {}
+
+    trans_type = args.get('type')
+    if trans_type in ('income', 'expense'):
+        filters['type'] = trans_type
+
+    category_id = args.get('category_id') or args.get('category')
+    if category_id:
+        filters['category_id'] = int(category_id)
+
+    # Intervalo semiaberto [date_from, date_to + 1 dia) ou um mês inteiro
+    if args.get('month'):
+        start, end = month_range(args['month'])
+        filters['start'], filters['end'] = start.isoformat(), end.isoformat()
+    if args.get('date_from'):
+        filters['start'] = to_date(args['date_from']).isoformat()
+    if args.get('date_to'):
+        filters['end'] = (to_date(args['date_to']) + timedelta(days=1)).isoformat()
+
+    return filters
+
+
+def filter_clause(db_type, filters, after=False):
+    """Condições WHERE para os filtros (mesma ordem de filter_params)"""
+    p = placeholder(db_type)
+    where = [f't.user_id = {p}']
+    if 'type' in filters:
+        where.append(f't.type = {p}')
+    if 'category_id' in filters:
+        where.append(f't.category_id = {p}')
+    if 'start' in filters:
+        where.append(f't.transaction_date >= {p}')
+    if 'end' in filters:
+        where.append(f't.transaction_date < {p}')
+    if after:
+        where.append(f'(t.transaction_date, t.id) < ({p}, {p})')
+    return ' AND '.join(where)
+
+
+def filter_params(user_id, filters):
+    params = [user_id]
+    for key in ('type', 'category_id', 'start', 'end'):
+        if key in filters:
+            params.append(filters[key])
+    return params
+
+
+def page_sql(db_type, filters, after=False):
+    """Monta a consulta de uma página com os filtros informados"""
+    p = placeholder(db_type)
+    return f'''
+        SELECT t.*, COALESCE(o.name, c.name) as category_name,
+               COALESCE(o.color, c.color) as category_color, COALESCE(o.icon, c.icon) as category_icon
+        FROM transactions t
+        {CATEGORY_JOIN}
+        WHERE {filter_clause(db_type, filters, after)}
+        ORDER BY t.transaction_date DESC, t.id DESC
+        LIMIT {p}
+    '''
+
+
+def fetch_transactions_page(cursor, db_type, user_id, filters=None, after=None,
+                            limit=DEFAULT_PAGE_SIZE, columnar=False):
+    """Busca uma página de transações; retorna (linhas, próximo cursor ou None)
+
+    Com `columnar=True` as linhas saem transpostas (core.serializacao.columnar).
+    """
+    filters = filters or {}
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    params = filter_params(user_id, filters)
+    if after:
+        params.extend(decode_cursor(after))
+    # Uma linha extra indica se existe próxima página
+    params.append(limit + 1)
+
+    cursor.execute(page_sql(db_type, filters, after=bool(after)), params)
+    rows = cursor.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last['transaction_date'], last['id'])
+    if columnar:
+        columns = [column[0] for column in cursor.description]
+        return to_columnar(rows, columns, money=('amount',)), next_cursor
+    return [serialize_transaction(row) for row in rows], next_cursor
+
+
+def iter_transactions(conn, db_type, user_id, filters=None, batch_size=2000):
+    """Percorre todas as transações filtradas com memória constante
+
+    PostgreSQL usa um cursor nomeado (do lado do servidor) que traz
+    `batch_size` linhas por ida ao banco; SQLite lê com fetchmany.
+    """
+    filters = filters or {}
+    sql = f'''
+        SELECT t.id, t.transaction_date, t.type, COALESCE(o.name, c.name) as category_name,
+               t.amount_cents, t.description, t.created_at
+        FROM transactions t
+        {CATEGORY_JOIN}
+        WHERE {filter_clause(db_type, filters)}
+        ORDER BY t.transaction_date DESC, t.id DESC
+    '''
+
+    if db_type == 'postgresql':
+        cursor = conn.cursor(name=f'export_{user_id}_{id(conn):x}')
+    else:
+        cursor = conn.cursor()
+    try:
+        cursor.execute(sql, filter_params(user_id, filters))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def serialize_transaction(row):
+    """Linha (sqlite3.Row ou DictRow do psycopg2) em dict com datas ISO e o valor em reais"""
+    data = dict(row)
+    data['amount'] = from_cents(data.pop('amount_cents', 0))
+    for key in ('transaction_date', 'due_date', 'created_at'):
+        value = data.get(key)
+        if value is not None and not isinstance(value, str):
+            data[key] = _iso(value)
+    return data
@@ -0,0 +1,131 @@
+"""
+Versão dos dados por usuário
+
+Número monotonicamente crescente que muda a cada escrita nos dados do
+usuário. Fica na tabela user_data_versions do banco principal e a rota
+que escreve a incrementa no próprio cursor, antes do commit: a versão
+nova fica visível junto com os dados, para todos os workers de todos os
+hosts. ETags e chaves de cache derivam dela, então revalidar custa uma
+leitura por chave primária em vez da consulta da rota.
+
+A linha de user_id = 0 guarda a época (aleatória, criada no primeiro
+uso): um banco recriado começa outra época e ETags antigos nunca colidem.
+
+Sem `connect` as versões ficam só na memória do processo (testes, scripts).
+
+`memo` devolve um dicionário com a vida de uma requisição (ou None fora
+dela): a versão é lida uma vez por requisição e reaproveitada por ETag,
+chaves de cache e fragmentos; bump atualiza a entrada.
+"""
+
+import hashlib
+import secrets
+import threading
+
+from core.consultas import register, run
+
+EPOCH_USER_ID = 0
+
+register({
+    'versions.get': 'SELECT version FROM user_data_versions WHERE user_id = {p}',
+    'versions.bump': '''
+        INSERT INTO user_data_versions (user_id, version) VALUES ({p}, 1)
+        ON CONFLICT (user_id) DO UPDATE SET version = user_data_versions.version + 1
+    ''',
+    'versions.init_epoch': '''
+        INSERT INTO user_data_versions (user_id, version) VALUES ({p}, {p})
+        ON CONFLICT (user_id) DO NOTHING
+    ''',
+})
+
+
+class DataVersions:
+    """Versões por usuário no banco (`connect` devolve uma conexão do pool)"""
+
+    def __init__(self, db_type=None, connect=None, memo=None):
+        self.db_type = db_type
+        self.connect = connect
+        self.memo = memo
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._epoch = None
+
+    def _read(self, cursor, user_id):
+        run(cursor, self.db_type, 'versions.get', (user_id,))
+        row = cursor.fetchone()
+        return int(row[0]) if row else 0
+
+    def _memo(self):
+        return self.memo() if self.memo is not None else None
+
+    def get(self, user_id, cursor=None, fresh=False):
+        """Versão atual dos dados do usuário
+
+        Dentro de uma requisição a primeira leitura fica memorizada; `fresh`
+        ignora a memória (SSE, que acompanha mudanças ao longo da conexão).
+        """
+        if self.connect is None:
+            return self._memory.get(user_id, 0)
+        memo = self._memo()
+        if memo is not None and not fresh and user_id in memo:
+            return memo[user_id]
+        if cursor is not None:
+            version = self._read(cursor, user_id)
+        else:
+            conn = self.connect()
+            try:
+                version = self._read(conn.cursor(), user_id)
+            finally:
+                conn.close()
+        if memo is not None:
+            memo[user_id] = version
+        return version
+
+    def bump(self, user_id, cursor=None):
+        """Incrementa a versão; com `cursor`, na transação do chamador (sem commit)
+
+        Sem cursor usa uma conexão própria e confirma na hora: só para
+        escritas já confirmadas por outro caminho (fila de notificações).
+        """
+        if self.connect is None:
+            with self._lock:
+                self._memory[user_id] = self._memory.get(user_id, 0) + 1
+            return
+        memo = self._memo()
+        if memo is not None:
+            memo.pop(user_id, None)
+        if cursor is not None:
+            run(cursor, self.db_type, 'versions.bump', (user_id,))
+            return
+        conn = self.connect()
+        try:
+            run(conn.cursor(), self.db_type, 'versions.bump', (user_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    @property
+    def epoch(self):
+        """Identificador deste banco nas ETags"""
+        if self._epoch is None:
+            if self.connect is None:
+                self._epoch = secrets.token_hex(4)
+            else:
+                conn = self.connect()
+                try:
+                    cursor = conn.cursor()
+                    run(cursor, self.db_type, 'versions.init_epoch',
+                        (EPOCH_USER_ID, secrets.randbelow(2 ** 31)))
+                    conn.commit()
+                    self._epoch = format(self._read(cursor, EPOCH_USER_ID), 'x')
+                finally:
+                    conn.close()
+        return self._epoch
+
+    def etag(self, user_id, resource=''):
+        """ETag de um recurso do usuário na versão atual"""
+        digest = hashlib.sha1(resource.encode()).hexdigest()[:10]
+        return f'{self.epoch}-{int(user_id)}-{self.get(user_id)}-{digest}'
+
+    def stats(self):
+        return {'storage': 'database' if self.connect is not None else 'memory', 'epoch': self._epoch}
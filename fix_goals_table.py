@@ -5,6 +5,8 @@ Script para criar a tabela goals faltante
 import sqlite3
 import os
 
+from core.migracoes import migrate
+
 def create_goals_table():
     print("🔧 Corrigindo erro: Criando tabela 'goals'...")
     
@@ -25,33 +27,10 @@ def create_goals_table():
         print("✅ Tabela 'goals' já existe")
     else:
         print("📝 Criando tabela 'goals'...")
-        
-        # Criar tabela goals
-        cursor.execute('''
-            CREATE TABLE goals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT,
-                target_amount DECIMAL(10, 2) NOT NULL,
-                current_amount DECIMAL(10, 2) DEFAULT 0,
-                deadline DATE,
-                priority TEXT CHECK(priority IN ('low', 'medium', 'high')) DEFAULT 'medium',
-                is_completed BOOLEAN DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        ''')
-        
-        print("✅ Tabela 'goals' criada com sucesso!")
-        
-        # Verificar outras tabelas importantes
-        tables_to_check = ['users', 'categories', 'transactions']
-        
-        for table in tables_to_check:
-            cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'")
-            if not cursor.fetchone():
-                print(f"⚠️  Tabela '{table}' não existe!")
+    
+    # A tabela (e as demais) vêm das mesmas migrações do app
+    for version, name, duration in migrate(conn, 'sqlite'):
+        print(f"✅ Migração {version} aplicada: {name}")
     
     conn.commit()
     conn.close()
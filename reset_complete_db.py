@@ -6,6 +6,8 @@ import os
 import sqlite3
 from werkzeug.security import generate_password_hash
 
+from core.migracoes import migrate
+
 def reset_database():
     print("🔄 Resetando banco de dados completo...")
     
@@ -24,79 +26,9 @@ def reset_database():
     
     print("📋 Criando tabelas...")
     
-    # 1. Tabela users
-    cursor.execute('''
-        CREATE TABLE users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            full_name TEXT,
-            avatar TEXT DEFAULT 'default.png',
-            theme TEXT DEFAULT 'light',
-            currency TEXT DEFAULT 'BRL',
-            language TEXT DEFAULT 'pt_BR',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    print("✅ Tabela 'users' criada")
-    
-    # 2. Tabela categories
-    cursor.execute('''
-        CREATE TABLE categories (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            name TEXT NOT NULL,
-            type TEXT CHECK(type IN ('income', 'expense')) NOT NULL,
-            color TEXT DEFAULT '#3498db',
-            icon TEXT DEFAULT 'fas fa-tag',
-            parent_id INTEGER DEFAULT NULL,
-            budget_limit DECIMAL(10, 2) DEFAULT 0,
-            is_default BOOLEAN DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-    ''')
-    print("✅ Tabela 'categories' criada")
-    
-    # 3. Tabela transactions
-    cursor.execute('''
-        CREATE TABLE transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            type TEXT CHECK(type IN ('income', 'expense')) NOT NULL,
-            category_id INTEGER,
-            amount DECIMAL(10, 2) NOT NULL,
-            description TEXT,
-            transaction_date DATE NOT NULL,
-            due_date DATE,
-            is_paid BOOLEAN DEFAULT 1,
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id),
-            FOREIGN KEY (category_id) REFERENCES categories(id)
-        )
-    ''')
-    print("✅ Tabela 'transactions' criada")
-    
-    # 4. Tabela goals (A TABELA FALTANTE!)
-    cursor.execute('''
-        CREATE TABLE goals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            description TEXT,
-            target_amount DECIMAL(10, 2) NOT NULL,
-            current_amount DECIMAL(10, 2) DEFAULT 0,
-            deadline DATE,
-            priority TEXT CHECK(priority IN ('low', 'medium', 'high')) DEFAULT 'medium',
-            is_completed BOOLEAN DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-    ''')
-    print("✅ Tabela 'goals' criada")
+    # Esquema único do sistema (mesmas migrações do app)
+    for version, name, duration in migrate(conn, 'sqlite'):
+        print(f"✅ Migração {version}: {name}")
     
     # Criar usuário admin
     hashed_password = generate_password_hash('admin2026')
@@ -109,7 +41,7 @@ def reset_database():
     # Obter ID do admin
     admin_id = cursor.execute('SELECT id FROM users WHERE username = ?', ('admin',)).fetchone()[0]
     
-    # Criar categorias padrão para o admin
+    # Categorias do admin que não existem entre as padrão globais (migração 6)
     default_categories = [
         # Receitas
         ('Salário', 'income', '#2ecc71', 'fas fa-money-check-alt'),
@@ -131,12 +63,13 @@ def reset_database():
     ]
     
     for cat in default_categories:
-        cursor.execute(
-            'INSERT INTO categories (user_id, name, type, color, icon) VALUES (?, ?, ?, ?, ?)',
-            (admin_id, cat[0], cat[1], cat[2], cat[3])
-        )
+        cursor.execute('''
+            INSERT INTO categories (user_id, name, type, color, icon)
+            SELECT ?, ?, ?, ?, ?
+            WHERE NOT EXISTS (SELECT 1 FROM categories WHERE user_id = 0 AND name = ? AND type = ?)
+        ''', (admin_id, cat[0], cat[1], cat[2], cat[3], cat[0], cat[1]))
     
-    print("✅ Categorias padrão criadas")
+    print("✅ Categorias criadas")
     
     # Adicionar algumas transações de exemplo
     import random
@@ -144,34 +77,34 @@ def reset_database():
     
     for i in range(15):
         category_type = 'income' if i % 3 == 0 else 'expense'
-        amount = random.uniform(50, 2000) if category_type == 'income' else random.uniform(10, 500)
+        amount_cents = random.randint(5000, 200000) if category_type == 'income' else random.randint(1000, 50000)
         date = datetime.now() - timedelta(days=random.randint(0, 90))
         
         # Obter uma categoria do tipo correto
         cat = cursor.execute(
-            'SELECT id FROM categories WHERE user_id = ? AND type = ? ORDER BY RANDOM() LIMIT 1',
+            'SELECT id FROM categories WHERE user_id IN (0, ?) AND type = ? AND overrides_id IS NULL ORDER BY RANDOM() LIMIT 1',
             (admin_id, category_type)
         ).fetchone()
         
         if cat:
             cursor.execute('''
-                INSERT INTO transactions (user_id, type, category_id, amount, description, transaction_date)
+                INSERT INTO transactions (user_id, type, category_id, amount_cents, description, transaction_date)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', (admin_id, category_type, cat[0], amount, f'Transação exemplo {i+1}', date.strftime('%Y-%m-%d')))
+            ''', (admin_id, category_type, cat[0], amount_cents, f'Transação exemplo {i+1}', date.strftime('%Y-%m-%d')))
     
     print("✅ Transações de exemplo criadas")
     
-    # Adicionar metas de exemplo
+    # Adicionar metas de exemplo (valores em centavos)
     metas_exemplo = [
-        ('Viagem às Maldivas', 'Economizar para viagem dos sonhos', 15000, 3000, '2024-12-31', 'high'),
-        ('Notebook novo', 'Comprar notebook para trabalho', 5000, 1200, '2024-06-30', 'medium'),
-        ('Reserva de emergência', 'Criar reserva para 6 meses', 18000, 5000, '2024-12-31', 'high'),
-        ('Curso de inglês', 'Investir em educação', 2000, 800, '2024-04-30', 'low'),
+        ('Viagem às Maldivas', 'Economizar para viagem dos sonhos', 1500000, 300000, '2024-12-31', 'high'),
+        ('Notebook novo', 'Comprar notebook para trabalho', 500000, 120000, '2024-06-30', 'medium'),
+        ('Reserva de emergência', 'Criar reserva para 6 meses', 1800000, 500000, '2024-12-31', 'high'),
+        ('Curso de inglês', 'Investir em educação', 200000, 80000, '2024-04-30', 'low'),
     ]
     
     for meta in metas_exemplo:
         cursor.execute('''
-            INSERT INTO goals (user_id, title, description, target_amount, current_amount, deadline, priority)
+            INSERT INTO goals (user_id, title, description, target_amount_cents, current_amount_cents, deadline, priority)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (admin_id, meta[0], meta[1], meta[2], meta[3], meta[4], meta[5]))
     
@@ -6,6 +6,8 @@ import os
 import sqlite3
 from werkzeug.security import generate_password_hash
 
+from core.migracoes import migrate
+
 # Remover banco existente
 if os.path.exists('database/contasmart.db'):
     os.remove('database/contasmart.db')
@@ -19,64 +21,8 @@ if not os.path.exists('database'):
 conn = sqlite3.connect('database/contasmart.db')
 cursor = conn.cursor()
 
-# Criar tabelas
-cursor.execute('''
-    CREATE TABLE users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        email TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        full_name TEXT,
-        avatar TEXT DEFAULT 'default.png',
-        theme TEXT DEFAULT 'light',
-        currency TEXT DEFAULT 'BRL',
-        language TEXT DEFAULT 'pt_BR',
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-''')
-
-cursor.execute('''
-    CREATE TABLE categories (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        name TEXT NOT NULL,
-        type TEXT CHECK(type IN ('income', 'expense')) NOT NULL,
-        color TEXT DEFAULT '#3498db',
-        icon TEXT DEFAULT 'fas fa-tag',
-        parent_id INTEGER DEFAULT NULL,
-        budget_limit DECIMAL(10, 2) DEFAULT 0,
-        is_default BOOLEAN DEFAULT 0,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id),
-        FOREIGN KEY (parent_id) REFERENCES categories(id)
-    )
-''')
-
-cursor.execute('''
-    CREATE TABLE transactions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        type TEXT CHECK(type IN ('income', 'expense', 'transfer', 'investment')) NOT NULL,
-        category_id INTEGER,
-        amount DECIMAL(10, 2) NOT NULL,
-        tax_amount DECIMAL(10, 2) DEFAULT 0,
-        net_amount DECIMAL(10, 2) DEFAULT 0,
-        description TEXT,
-        transaction_date DATE NOT NULL,
-        due_date DATE,
-        payment_method TEXT,
-        is_recurring BOOLEAN DEFAULT 0,
-        recurring_frequency TEXT,
-        is_paid BOOLEAN DEFAULT 1,
-        tags TEXT,
-        attachment TEXT,
-        notes TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id),
-        FOREIGN KEY (category_id) REFERENCES categories(id)
-    )
-''')
+# Criar tabelas (mesmas migrações do app)
+migrate(conn, 'sqlite')
 
 # Criar usuário admin com senha correta
 hashed_password = generate_password_hash('admin2026')
@@ -84,13 +30,14 @@ cursor.execute(
     'INSERT INTO users (username, email, password, full_name) VALUES (?, ?, ?, ?)',
     ('admin', 'admin@contasmart.com', hashed_password, 'Administrador')
 )
+admin_id = cursor.lastrowid
 
 print("✅ Usuário admin criado com sucesso!")
 print("👤 Username: admin")
 print("🔑 Password: admin2026")
 print("📧 Email: admin@contasmart.com")
 
-# Criar categorias padrão
+# Categorias do admin que não existem entre as padrão globais (migração 6)
 default_categories = [
     # Receitas
     ('Salário', 'income', '#2ecc71', 'fas fa-money-check-alt'),
@@ -112,10 +59,11 @@ default_categories = [
 ]
 
 for cat in default_categories:
-    cursor.execute(
-        'INSERT INTO categories (name, type, color, icon, is_default) VALUES (?, ?, ?, ?, 1)',
-        cat
-    )
+    cursor.execute('''
+        INSERT INTO categories (user_id, name, type, color, icon)
+        SELECT ?, ?, ?, ?, ?
+        WHERE NOT EXISTS (SELECT 1 FROM categories WHERE user_id = 0 AND name = ? AND type = ?)
+    ''', (admin_id,) + cat + cat[:2])
 
 conn.commit()
 conn.close()
@@ -12,6 +12,7 @@ Comandos disponíveis:
   python start.py --backup      # Cria backup do banco
   python start.py --restore     # Restaura backup
   python start.py --update      # Atualiza sistema
+  python start.py --rebuild-rollups  # Reconstrói agregados e contadores
   python start.py --help        # Mostra ajuda
 """
 
@@ -115,6 +116,30 @@ def reset_database():
     # Criar novo banco
     return init_database()
 
+def rebuild_rollups():
+    """Reconstruir agregados mensais e contadores de notificações"""
+    print("\n📊 Reconstruindo agregados mensais...")
+    
+    try:
+        from app import get_db_connection, DB_TYPE
+        from core.agregados import rebuild_rollups as rebuild
+        from core.notificacoes import rebuild_counters
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            rebuild(cursor, DB_TYPE)
+            rebuild_counters(cursor, DB_TYPE)
+            conn.commit()
+        finally:
+            conn.close()
+        
+        print("✅ Agregados mensais reconstruídos!")
+        return True
+    except Exception as e:
+        print(f"❌ Erro ao reconstruir agregados: {e}")
+        return False
+
 def load_demo_data():
     """Carregar dados de demonstração"""
     print("\n🎮 Carregando dados de demonstração...")
@@ -156,20 +181,23 @@ def load_demo_data():
                 
                 for i in range(15):
                     trans_type = 'income' if random.random() > 0.6 else 'expense'
-                    amount = random.uniform(100, 5000) if trans_type == 'income' else random.uniform(50, 2000)
+                    amount_cents = random.randint(10000, 500000) if trans_type == 'income' else random.randint(5000, 200000)
                     days_ago = random.randint(0, 90)
                     date = (datetime.now() - timedelta(days=days_ago)).strftime('%Y-%m-%d')
                     
                     cursor.execute('''
-                        INSERT INTO transactions (user_id, type, amount, description, transaction_date)
+                        INSERT INTO transactions (user_id, type, amount_cents, description, transaction_date)
                         VALUES (?, ?, ?, ?, ?)
-                    ''', (user_id, trans_type, amount, f'Transação demo {i+1}', date))
+                    ''', (user_id, trans_type, amount_cents, f'Transação demo {i+1}', date))
                 
                 print(f"  ✅ Usuário demo: {name} ({role})")
         
         conn.commit()
         conn.close()
         
+        # Transações inseridas diretamente: reconciliar agregados
+        rebuild_rollups()
+        
         print("✅ Dados de demonstração carregados com sucesso!")
         print("\n👥 Usuários de demonstração disponíveis:")
         print("   👑 admin / admin2026 (Administrador)")
@@ -611,6 +639,55 @@ def start_server(port=5000, host='0.0.0.0'):
         print(f"❌ Erro ao iniciar servidor: {e}")
         return False
 
+# Custos comparados pelo benchmark de autenticação (sintaxe do werkzeug)
+BENCH_AUTH_METHODS = [
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:600000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+]
+
+def bench_auth(seconds=2.0):
+    """Medir logins/s por worker em cada custo de hash"""
+    from core.senhas import benchmark
+    
+    threads = int(os.environ.get('AUTH_MAX_WORKERS', 2))
+    methods = os.environ.get('BENCH_AUTH_METHODS', '').split(',') if os.environ.get('BENCH_AUTH_METHODS') else BENCH_AUTH_METHODS
+    configured = os.environ.get('PASSWORD_HASH_METHOD')
+    if configured and configured not in methods:
+        methods.append(configured)
+    
+    print(f"\n🔐 Benchmark de autenticação ({seconds:.0f}s por custo, 1 e {threads} threads)")
+    print(f"  {'método':<24} {'threads':>7} {'logins/s':>10} {'ms/login':>10}")
+    for count in sorted({1, threads}):
+        for result in benchmark(methods, seconds=seconds, threads=count):
+            print(f"  {result['method']:<24} {result['threads']:>7} "
+                  f"{result['logins_per_sec']:>10} {result['ms_per_login']:>10}")
+    return True
+
+def bench_json(rows=10000):
+    """Comparar a serialização JSON de uma lista de transações"""
+    from core.serializacao import benchmark
+    
+    print(f"\n🧾 Benchmark de serialização JSON ({rows:,} linhas)")
+    print(f"  {'codificador':<34} {'ms':>8} {'bytes':>10} {'ganho':>7}")
+    for result in benchmark(rows):
+        print(f"  {result['encoder']:<34} {result['ms']:>8} {result['bytes']:>10,} {result['speedup']:>6}x")
+    return True
+
+def build_static():
+    """Gera static/dist: CSS/JS minificados, com hash e pré-comprimidos"""
+    from core.estaticos import build, DIST_DIR
+    
+    print("\n📦 Gerando arquivos estáticos...")
+    manifest, stats = build('static')
+    print(f"   {stats['files']} arquivos em static/{DIST_DIR}")
+    print(f"   Fonte: {stats['source_bytes']:,} bytes → minificado: {stats['minified_bytes']:,} bytes "
+          f"→ gzip: {stats['gzip_bytes']:,} bytes")
+    if not stats['brotli']:
+        print("   ⚠️  Módulo brotli ausente: apenas variantes .gz")
+    print("✅ Manifesto atualizado (reinicie o servidor para usar)")
+
 def show_help():
     """Mostrar ajuda"""
     print_banner()
@@ -621,6 +698,9 @@ def show_help():
     print("  python start.py --init --demo      # Inicia com dados demo")
     print("  python start.py --test --health    # Testa e verifica saúde")
     print("  python start.py --backup --update  # Backup e atualiza")
+    print("  python start.py --bench-auth       # Logins/s por custo de hash")
+    print("  python start.py --build-static     # Minifica e comprime CSS/JS")
+    print("  python start.py --bench-json       # Serialização JSON de 10k linhas")
     
     print("\n🔧 Opções avançadas:")
     print("  --port PORT      # Especificar porta (padrão: 5000)")
@@ -629,7 +709,8 @@ def show_help():
 
 def main():
     """Função principal"""
-    parser = argparse.ArgumentParser(description='ContaSmart Pro Executive - Sistema de Gestão Financeira')
+    parser = argparse.ArgumentParser(description='ContaSmart Pro Executive - Sistema de Gestão Financeira',
+                                     add_help=False)
     
     # Opções principais
     parser.add_argument('--init', action='store_true', help='Inicializar banco de dados')
@@ -640,6 +721,10 @@ def main():
     parser.add_argument('--restore', action='store_true', help='Restaurar backup do banco')
     parser.add_argument('--update', action='store_true', help='Atualizar sistema')
     parser.add_argument('--health', action='store_true', help='Verificar saúde do sistema')
+    parser.add_argument('--rebuild-rollups', action='store_true', help='Reconstruir agregados mensais e contadores')
+    parser.add_argument('--bench-auth', action='store_true', help='Medir logins/s por custo de hash de senha')
+    parser.add_argument('--bench-json', action='store_true', help='Medir a serialização JSON de 10 mil linhas')
+    parser.add_argument('--build-static', action='store_true', help='Gerar CSS/JS minificados e pré-comprimidos')
     parser.add_argument('--help', action='store_true', help='Mostrar esta mensagem de ajuda')
     
     # Opções do servidor
@@ -687,10 +772,23 @@ def main():
     if args.health:
         check_system_health()
     
+    if args.rebuild_rollups:
+        rebuild_rollups()
+    
+    if args.bench_auth:
+        bench_auth()
+    
+    if args.build_static:
+        build_static()
+    
+    if args.bench_json:
+        bench_json()
+    
     # CORREÇÃO DA LINHA 701: Quebrar linha longa
     if not any([
         args.init, args.reset, args.demo, args.test,
-        args.backup, args.restore, args.update, args.health
+        args.backup, args.restore, args.update, args.health,
+        args.rebuild_rollups, args.bench_auth, args.build_static, args.bench_json
     ]):
         start_server(port=args.port, host=args.host)
 
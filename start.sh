@@ -16,4 +16,4 @@ fi
 # flask db upgrade
 
 # Inicia a aplicação com Gunicorn
-exec gunicorn --bind 0.0.0.0:$PORT wsgi:app --workers 2 --threads 4 --timeout 120
\ No newline at end of file
+exec gunicorn --bind 0.0.0.0:$PORT wsgi:app --workers ${WEB_CONCURRENCY:-2} --threads ${GUNICORN_THREADS:-4} --timeout 120
\ No newline at end of file
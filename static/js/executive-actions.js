@@ -373,10 +373,20 @@ class ExecutiveActions {
 
     async checkNewNotifications() {
         try {
-            const response = await fetch('/api/notifications/unread');
-            const notifications = await response.json();
+            // Primeira consulta só registra o último id; depois busca apenas as novas
+            const first = this.lastNotificationId === undefined;
+            const url = first ? '/api/notifications?limit=1' :
+                `/api/notifications?since=${this.lastNotificationId || 0}&unread=1`;
+            const response = await fetch(url);
+            const data = await response.json();
+            if (!data.success) return;
+            this.lastNotificationId = data.last_id;
+            if (first) return;
             
-            notifications.forEach(notification => {
+            // A API responde em colunas ({columns, data}): um objeto por índice
+            const { columns, data: values } = data.notifications;
+            values.id.forEach((_, i) => {
+                const notification = Object.fromEntries(columns.map(column => [column, values[column][i]]));
                 if (!this.notifications.includes(notification.id)) {
                     this.showNotification(notification);
                     this.notifications.push(notification.id);
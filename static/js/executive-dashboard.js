@@ -754,7 +754,12 @@ class ExecutiveDashboard {
     async loadNotifications() {
         try {
             const response = await fetch('/api/notifications');
-            const notifications = await response.json();
+            const data = await response.json();
+            
+            // A API responde em colunas ({columns, data}): um objeto por índice
+            const { columns, data: values } = data.notifications;
+            const notifications = values.id.map((_, i) =>
+                Object.fromEntries(columns.map(column => [column, values[column][i]])));
             
             const container = document.querySelector('.notification-list');
             if (container) {
@@ -295,8 +295,8 @@ function showComparativeAnalysis() {
         .then(data => {
             const modalContent = `
                 <div class="comparative-analysis">
-                    <h6 class="mb-3">📊 Comparativo com Média da Sua Faixa</h6>
-                    ${renderComparativeData(data)}
+                    <h6 class="mb-3">📊 ${data.current_period} x ${data.previous_period}</h6>
+                    ${renderComparativeData(data.rows || [])}
                 </div>
             `;
             
@@ -311,8 +311,8 @@ function renderComparativeData(data) {
             <thead>
                 <tr>
                     <th>Indicador</th>
-                    <th>Você</th>
-                    <th>Média</th>
+                    <th>Atual</th>
+                    <th>Anterior</th>
                     <th>Diferença</th>
                 </tr>
             </thead>
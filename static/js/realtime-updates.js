@@ -0,0 +1,56 @@
+/**
+ * ContaSmart Pro - Atualizações em tempo real
+ * Conexão SSE única (/api/stream) compartilhada pelos scripts da página
+ */
+
+class RealtimeStream {
+    constructor(url = '/api/stream') {
+        this.url = url;
+        this.handlers = {};
+        this.available = true;
+        this.source = null;
+        this.connect();
+    }
+
+    connect() {
+        this.source = new EventSource(this.url);
+
+        ['stats', 'notification'].forEach(event => {
+            this.source.addEventListener(event, (e) => {
+                this.emit(event, JSON.parse(e.data));
+            });
+        });
+
+        // O servidor encerra o stream periodicamente para liberar a thread
+        this.source.addEventListener('reconnect', () => {
+            this.source.close();
+            this.connect();
+        });
+
+        this.source.onerror = () => {
+            // CLOSED: resposta diferente de 200 (ex.: 503 por limite de streams)
+            if (this.source.readyState === EventSource.CLOSED) {
+                this.available = false;
+                this.emit('unavailable');
+            }
+        };
+    }
+
+    on(event, handler) {
+        (this.handlers[event] = this.handlers[event] || []).push(handler);
+        if (event === 'unavailable' && !this.available) handler();
+    }
+
+    emit(event, data) {
+        (this.handlers[event] || []).forEach(handler => {
+            try {
+                handler(data);
+            } catch (error) {
+                console.error(`Error handling ${event} event:`, error);
+            }
+        });
+    }
+}
+
+// Disponível para executive-dashboard.js e executive-actions.js
+window.realtimeStream = window.EventSource ? new RealtimeStream() : null;
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Os testes importam os módulos de core/ a partir da raiz do projeto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.migracoes import migrate  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Banco SQLite em memória com todas as migrações aplicadas"""
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    migrate(conn, 'sqlite')
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope='session')
+def flask_app(tmp_path_factory):
+    """app.py sobre um SQLite novo em diretório temporário
+
+    O caminho do banco é relativo (database/contasmart.db): o app é importado
+    e usado com o diretório de trabalho no temporário, nunca no projeto.
+    """
+    if os.environ.get('DATABASE_URL'):
+        pytest.skip('testes do app usam SQLite')
+    root = tmp_path_factory.mktemp('app')
+    (root / 'database').mkdir()
+    previous = os.getcwd()
+    environ = {
+        'JINJA_CACHE_DIR': str(root / 'jinja'),
+        'TEMPLATE_WARMUP': '0',
+    }
+    saved = {key: os.environ.get(key) for key in environ}
+    os.environ.update(environ)
+    os.chdir(root)
+    try:
+        import app as module
+        module.init_db()
+        yield module
+        module.db_pool.close_all()
+    finally:
+        os.chdir(previous)
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+@pytest.fixture
+def client(flask_app):
+    """Cliente de teste já autenticado como o admin criado pelo init_db"""
+    client = flask_app.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 1
+        session['username'] = 'admin'
+    return client
@@ -0,0 +1,79 @@
+from core.agregados import apply_deltas, apply_transaction, collect_deltas, rebuild_rollups
+
+TRANSACTIONS = [
+    # user_id, type, category_id, amount_cents, transaction_date
+    (1, 'income', 16, 500000, '2026-09-05'),
+    (1, 'expense', 19, 12345, '2026-09-10'),
+    (1, 'expense', 19, 6655, '2026-09-30'),
+    (1, 'expense', None, 990, '2026-10-01'),
+    (1, 'expense', 20, 4000, '2026-10-15'),
+    (2, 'expense', 19, 777, '2026-10-02'),
+]
+
+
+def insert(cursor, rows):
+    cursor.executemany('''
+        INSERT INTO transactions (user_id, type, category_id, amount_cents, transaction_date)
+        VALUES (?, ?, ?, ?, ?)
+    ''', rows)
+
+
+def rollups(cursor):
+    cursor.execute('''
+        SELECT user_id, month, type, category_id, total_cents, tx_count FROM transaction_rollups
+        WHERE tx_count <> 0 ORDER BY 1, 2, 3, 4
+    ''')
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def raw_sums(cursor):
+    cursor.execute('''
+        SELECT user_id, strftime('%Y-%m-01', transaction_date), type, COALESCE(category_id, 0),
+               SUM(amount_cents), COUNT(*)
+        FROM transactions GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+    ''')
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def test_incremental_upsert_matches_raw_sums(db):
+    cursor = db.cursor()
+    for user_id, trans_type, category_id, amount_cents, day in TRANSACTIONS:
+        insert(cursor, [(user_id, trans_type, category_id, amount_cents, day)])
+        apply_transaction(cursor, 'sqlite', user_id, trans_type, category_id, amount_cents, day)
+
+    assert rollups(cursor) == raw_sums(cursor)
+    assert (1, '2026-09-01', 'expense', 19, 19000, 2) in rollups(cursor)
+    assert (1, '2026-10-01', 'expense', 0, 990, 1) in rollups(cursor)
+
+
+def test_removal_subtracts_from_rollup(db):
+    cursor = db.cursor()
+    insert(cursor, TRANSACTIONS)
+    rebuild_rollups(cursor, 'sqlite')
+
+    cursor.execute('DELETE FROM transactions WHERE amount_cents = 12345')
+    apply_transaction(cursor, 'sqlite', 1, 'expense', 19, 12345, '2026-09-10', sign=-1)
+
+    assert rollups(cursor) == raw_sums(cursor)
+
+
+def test_batched_deltas_match_rebuild(db):
+    cursor = db.cursor()
+    insert(cursor, TRANSACTIONS)
+    columns = ('user_id', 'type', 'category_id', 'amount_cents', 'transaction_date')
+    apply_deltas(cursor, 'sqlite', collect_deltas(dict(zip(columns, row)) for row in TRANSACTIONS))
+    incremental = rollups(cursor)
+
+    rebuild_rollups(cursor, 'sqlite')
+    assert rollups(cursor) == incremental == raw_sums(cursor)
+
+
+def test_rebuild_of_one_user_keeps_the_others(db):
+    cursor = db.cursor()
+    insert(cursor, TRANSACTIONS)
+    rebuild_rollups(cursor, 'sqlite')
+    cursor.execute('UPDATE transaction_rollups SET total_cents = 0')
+
+    rebuild_rollups(cursor, 'sqlite', user_id=2)
+    cursor.execute('SELECT user_id, SUM(total_cents) AS total FROM transaction_rollups GROUP BY user_id')
+    assert {row['user_id']: row['total'] for row in cursor.fetchall()} == {1: 0, 2: 777}
@@ -0,0 +1,89 @@
+import sqlite3
+
+import core.migracoes as migracoes
+from core.categorias import customize_category, merged_categories
+
+
+def merged(db, user_id=1):
+    return {category['id']: category for category in merged_categories(db.cursor(), 'sqlite', user_id)}
+
+
+def default_id(db, name):
+    return db.execute('SELECT id FROM categories WHERE user_id = 0 AND name = ?', (name,)).fetchone()['id']
+
+
+def test_override_keeps_following_the_default(db):
+    lazer = default_id(db, 'Lazer')
+    assert customize_category(db.cursor(), 'sqlite', 1, lazer, {'color': '#123456'})
+
+    override = db.execute('SELECT * FROM categories WHERE overrides_id = ?', (lazer,)).fetchone()
+    assert (override['name'], override['color'], override['budget_limit_cents'], override['is_hidden']) == \
+        (None, '#123456', None, None)
+
+    # Mudanças posteriores na padrão chegam ao usuário nos campos que ele não alterou
+    db.execute("UPDATE categories SET name = 'Diversão', budget_limit_cents = 30000 WHERE id = ?", (lazer,))
+    category = merged(db)[lazer]
+    assert (category['name'], category['color'], category['budget_limit_cents']) == ('Diversão', '#123456', 30000)
+    assert category['is_default'] and not category['is_hidden']
+    # Outro usuário continua vendo a padrão
+    assert merged(db, user_id=2)[lazer]['color'] != '#123456'
+
+
+def test_second_change_updates_the_same_override(db):
+    lazer = default_id(db, 'Lazer')
+    customize_category(db.cursor(), 'sqlite', 1, lazer, {'color': '#123456'})
+    customize_category(db.cursor(), 'sqlite', 1, lazer, {'is_hidden': True, 'budget_limit_cents': 5000})
+
+    assert db.execute('SELECT COUNT(*) FROM categories WHERE overrides_id = ?', (lazer,)).fetchone()[0] == 1
+    category = merged(db)[lazer]
+    assert (category['color'], category['is_hidden'], category['budget_limit_cents']) == ('#123456', True, 5000)
+
+
+def test_own_category_is_changed_in_place(db):
+    db.execute("INSERT INTO categories (user_id, name, type) VALUES (1, 'Pets', 'expense')")
+    own = db.execute("SELECT id FROM categories WHERE name = 'Pets'").fetchone()['id']
+
+    assert customize_category(db.cursor(), 'sqlite', 1, own, {'name': 'Animais'})
+    assert merged(db)[own]['name'] == 'Animais'
+    assert not merged(db)[own]['is_default']
+    # Categoria de outro usuário não é visível
+    assert not customize_category(db.cursor(), 'sqlite', 2, own, {'name': 'x'})
+    assert own not in merged(db, user_id=2)
+
+
+def test_migration_6_repoints_user_copies(monkeypatch):
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    all_migrations = migracoes.MIGRATIONS
+    monkeypatch.setattr(migracoes, 'MIGRATIONS', [m for m in all_migrations if m.version < 6])
+    migracoes.migrate(conn, 'sqlite')
+
+    # Cópias por usuário como o app antigo criava: uma idêntica, uma com cor própria
+    conn.executemany('INSERT INTO categories (id, user_id, name, type, color, icon) VALUES (?, ?, ?, ?, ?, ?)', [
+        (1, 1, 'Alimentação', 'expense', '#ff3366', 'fas fa-utensils'),
+        (2, 1, 'Lazer', 'expense', '#000000', 'fas fa-gamepad'),
+        (3, 1, 'Pets', 'expense', '#00ff00', 'fas fa-paw'),
+    ])
+    conn.executemany('''
+        INSERT INTO transactions (user_id, type, category_id, amount_cents, transaction_date)
+        VALUES (1, 'expense', ?, 1000, '2026-10-01')
+    ''', [(1,), (2,), (3,)])
+    conn.commit()
+
+    monkeypatch.setattr(migracoes, 'MIGRATIONS', all_migrations)
+    migracoes.migrate(conn, 'sqlite')
+
+    alimentacao, lazer = default_id(conn, 'Alimentação'), default_id(conn, 'Lazer')
+    assert [row[0] for row in conn.execute('SELECT category_id FROM transactions ORDER BY id')] == \
+        [alimentacao, lazer, 3]
+    # Cópia idêntica some; a diferente vira personalização só com a cor
+    assert conn.execute('SELECT COUNT(*) FROM categories WHERE id = 1').fetchone()[0] == 0
+    override = conn.execute('SELECT * FROM categories WHERE id = 2').fetchone()
+    assert (override['overrides_id'], override['name'], override['color'], override['icon']) == \
+        (lazer, None, '#000000', None)
+
+    categories = merged(conn)
+    assert categories[lazer]['color'] == '#000000' and categories[lazer]['name'] == 'Lazer'
+    assert categories[3]['name'] == 'Pets'
+    rollups = conn.execute('SELECT category_id, total_cents FROM transaction_rollups ORDER BY category_id')
+    assert sorted(tuple(row) for row in rollups) == sorted([(alimentacao, 1000), (lazer, 1000), (3, 1000)])
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+
+def test_dashboard_data_uses_one_connection(flask_app):
+    flask_app.user_cache.local.clear()
+    flask_app.db_pool.reset_peak()
+    before = flask_app.db_pool.stats()['checkouts']
+
+    payload = flask_app.build_dashboard_data(1, datetime.now().strftime('%Y-%m'))
+
+    stats = flask_app.db_pool.stats()
+    assert stats['peak_in_use'] == 1
+    assert stats['checkouts'] - before == 1
+    assert stats['in_use'] == 0
+    assert {'trend_data', 'category_data', 'recent_transactions', 'goals'} <= payload.keys()
@@ -0,0 +1,34 @@
+from decimal import Decimal
+
+import pytest
+
+from core.dinheiro import from_cents, to_cents, with_reais
+
+
+@pytest.mark.parametrize('value, cents', [
+    (10, 1000),
+    ('10.5', 1050),
+    (' 0.01 ', 1),
+    # Meio centavo arredonda para cima, inclusive em floats sem representação exata
+    (0.005, 1),
+    (1.005, 101),
+    (2.675, 268),
+    ('0.125', 13),
+    (-0.005, -1),
+    (Decimal('19.999'), 2000),
+    (0.1 + 0.2, 30),
+])
+def test_to_cents_rounds_half_up(value, cents):
+    assert to_cents(value) == cents
+
+
+@pytest.mark.parametrize('value', ['abc', '', None, True, 'nan', 'inf'])
+def test_to_cents_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        to_cents(value)
+
+
+def test_from_cents_and_with_reais():
+    assert from_cents(123456) == 1234.56
+    assert from_cents(None) == 0
+    assert with_reais({'id': 1, 'amount_cents': 990}, 'amount') == {'id': 1, 'amount': 9.9}
@@ -0,0 +1,97 @@
+import io
+
+import pytest
+
+import core.importador as importador
+from core.importador import TooManyRows, import_transactions, iter_csv, parse_amount
+
+
+def rows_of(db):
+    cursor = db.cursor()
+    cursor.execute('SELECT type, category_id, amount_cents, description, transaction_date FROM transactions '
+                   'ORDER BY id')
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def category_id(db, name):
+    return db.execute('SELECT id FROM categories WHERE user_id = 0 AND name = ?', (name,)).fetchone()['id']
+
+
+ROWS = [
+    {'type': 'receita', 'amount': '1.234,56', 'category': 'Salário', 'date': '05/10/2026'},
+    {'type': 'expense', 'amount': 0, 'description': 'zerada'},
+    {'type': 'despesa', 'amount': 19.9, 'category': 'alimentação', 'transaction_date': '2026-10-06'},
+    {'type': 'expense', 'amount': 10, 'category': 'Salário'},
+    {'type': 'transferência', 'amount': 10},
+]
+
+
+def test_non_strict_inserts_valid_rows_and_reports_the_rest(db):
+    result = import_transactions(db.cursor(), 'sqlite', 1, ROWS)
+
+    assert (result.received, result.inserted, result.error_count) == (5, 2, 3)
+    assert [error['line'] for error in result.errors] == [2, 4, 5]
+    assert result.income_cents == 123456 and result.expense_cents == 1990
+    assert rows_of(db) == [
+        ('income', category_id(db, 'Salário'), 123456, '', '2026-10-05'),
+        ('expense', category_id(db, 'Alimentação'), 1990, '', '2026-10-06'),
+    ]
+    rollups = db.execute('SELECT SUM(total_cents) AS total, SUM(tx_count) AS n FROM transaction_rollups').fetchone()
+    assert (rollups['total'], rollups['n']) == (125446, 2)
+
+
+def test_strict_writes_nothing_when_a_row_is_invalid(db):
+    result = import_transactions(db.cursor(), 'sqlite', 1, ROWS, strict=True)
+
+    assert (result.inserted, result.error_count) == (0, 3)
+    assert rows_of(db) == []
+    assert db.execute('SELECT COUNT(*) FROM transaction_rollups').fetchone()[0] == 0
+
+
+def test_strict_writes_everything_when_all_rows_are_valid(db, monkeypatch):
+    monkeypatch.setattr(importador, 'CHUNK_SIZE', 2)
+    rows = [{'type': 'expense', 'amount': i, 'date': '2026-10-01'} for i in range(1, 6)]
+
+    result = import_transactions(db.cursor(), 'sqlite', 1, rows, strict=True)
+
+    assert (result.inserted, result.error_count, result.expense_cents) == (5, 0, 1500)
+    assert len(rows_of(db)) == 5
+
+
+def test_too_many_rows(db, monkeypatch):
+    monkeypatch.setattr(importador, 'MAX_ROWS', 3)
+    with pytest.raises(TooManyRows):
+        import_transactions(db.cursor(), 'sqlite', 1, [{'type': 'expense', 'amount': 1}] * 4)
+
+
+def test_csv_with_semicolon_and_portuguese_headers():
+    data = 'tipo;valor;descrição;data\ndespesa;1.050,00;Aluguel;01/10/2026\n;;;\n'.encode('utf-8')
+    assert list(iter_csv(io.BytesIO(data))) == [
+        {'type': 'despesa', 'amount': '1.050,00', 'description': 'Aluguel', 'transaction_date': '01/10/2026'},
+    ]
+
+
+@pytest.mark.parametrize('encoding', ['utf-8-sig', 'utf-8', 'UTF8'])
+def test_csv_with_excel_bom(encoding):
+    data = '\ufefftype,amount\nexpense,10\n'.encode('utf-8')
+    assert list(iter_csv(io.BytesIO(data), encoding)) == [{'type': 'expense', 'amount': '10'}]
+
+
+@pytest.mark.parametrize('value, cents', [('R$ 1.234,56', 123456), (12.5, 1250), ('0,005', 1)])
+def test_parse_amount(value, cents):
+    assert parse_amount(value) == cents
+
+
+def test_bulk_route_rejects_oversized_json(client, flask_app, monkeypatch):
+    monkeypatch.setattr(flask_app, 'MAX_ROWS', 2)
+    response = client.post('/api/transactions/bulk', json=[{'type': 'expense', 'amount': 1}] * 3)
+    assert response.status_code == 413
+
+
+def test_bulk_route_rejects_oversized_csv(client, monkeypatch):
+    monkeypatch.setattr(importador, 'MAX_ROWS', 2)
+    monkeypatch.setattr(importador, 'CHUNK_SIZE', 2)
+    body = 'type,amount\n' + 'expense,1\n' * 3
+    response = client.post('/api/transactions/bulk', data=body, content_type='text/csv')
+    assert response.status_code == 413
+    assert client.get('/api/transactions').get_json()['transactions'] == []
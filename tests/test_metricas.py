@@ -0,0 +1,23 @@
+def test_metrics_refuses_anonymous_and_regular_users(flask_app):
+    client = flask_app.app.test_client()
+    assert client.get('/api/metrics').status_code == 403
+
+    with client.session_transaction() as session:
+        session['user_id'] = 2
+        session['username'] = 'maria'
+    assert client.get('/api/metrics').status_code == 403
+
+
+def test_metrics_for_admin_session(client):
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert 'pool' in response.get_json()
+
+
+def test_metrics_with_token(flask_app, monkeypatch):
+    client = flask_app.app.test_client()
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer segredo'}).status_code == 403
+
+    monkeypatch.setattr(flask_app, 'METRICS_TOKEN', 'segredo')
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer segredo'}).status_code == 200
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer outro'}).status_code == 403
@@ -0,0 +1,88 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from core.migracoes import MIGRATIONS, MigrationError, applied_migrations, migrate
+
+BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'database', 'contasmart.db')
+
+VERSIONS = [migration.version for migration in MIGRATIONS]
+
+# Checksums (SQLite) gravados pelos bancos já migrados: nunca mudam
+RELEASED = {
+    1: '78af5139cb889d9f',
+    2: '53a506b003c71670',
+    3: '68fb7417ccdfbabc',
+    4: '5613d61da79bfd3f',
+    5: '51e8d62d90f2b766',
+    6: '8edfc4297bdf8959',
+    7: 'c8a5f7dca0040a2f',
+    8: '7dda50ccee587c62',
+    9: '896f91eec665fc77',
+}
+
+
+def columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def test_fresh_database_gets_every_migration():
+    conn = sqlite3.connect(':memory:')
+    assert [version for version, _, _ in migrate(conn, 'sqlite')] == VERSIONS
+    assert sorted(applied_migrations(conn.cursor(), 'sqlite')) == VERSIONS
+
+    assert {'amount_cents', 'category_id'} <= columns(conn, 'transactions')
+    assert {'budget_limit_cents', 'overrides_id', 'is_hidden'} <= columns(conn, 'categories')
+    assert conn.execute('SELECT COUNT(*) FROM categories WHERE user_id = 0').fetchone()[0] == 7
+    # Sem pendências: nada a aplicar na segunda vez
+    assert migrate(conn, 'sqlite') == []
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    if not os.path.exists(BASELINE):
+        pytest.skip('banco de exemplo ausente')
+    path = tmp_path / 'contasmart.db'
+    shutil.copy(BASELINE, path)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def test_baseline_database_keeps_money_and_references(baseline):
+    before = baseline.execute('''
+        SELECT COUNT(*) AS n, SUM(CAST(ROUND(amount * 100) AS INTEGER)) AS cents FROM transactions
+    ''').fetchone()
+
+    assert [version for version, _, _ in migrate(baseline, 'sqlite')] == VERSIONS
+
+    after = baseline.execute('SELECT COUNT(*) AS n, SUM(amount_cents) AS cents FROM transactions').fetchone()
+    assert (after['n'], after['cents']) == (before['n'], before['cents'])
+    # Toda categoria referenciada existe e não é uma linha de personalização
+    orphans = baseline.execute('''
+        SELECT COUNT(*) FROM transactions t
+        LEFT JOIN categories c ON c.id = t.category_id AND c.overrides_id IS NULL
+        WHERE t.category_id IS NOT NULL AND t.category_id <> '' AND c.id IS NULL
+    ''').fetchone()[0]
+    assert orphans == 0
+    rollups = baseline.execute('SELECT SUM(total_cents), SUM(tx_count) FROM transaction_rollups').fetchone()
+    assert tuple(rollups) == (after['cents'], after['n'])
+
+
+def test_released_migrations_keep_their_checksum():
+    checksums = {migration.version: migration.checksum('sqlite') for migration in MIGRATIONS}
+    assert {version: checksums[version] for version in RELEASED} == RELEASED
+
+
+def test_changed_migration_stops_startup():
+    conn = sqlite3.connect(':memory:')
+    migrate(conn, 'sqlite')
+    conn.execute("UPDATE schema_version SET checksum = 'outro' WHERE version = 4")
+    conn.commit()
+
+    with pytest.raises(MigrationError, match='Migração 4'):
+        migrate(conn, 'sqlite')
@@ -0,0 +1,78 @@
+import json
+import sqlite3
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from core.serializacao import FastJSONProvider, columnar, orjson
+
+ENCODERS = ['stdlib'] + (['orjson'] if orjson is not None else [])
+
+
+def sqlite_rows():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute('CREATE TABLE n (id INTEGER, title TEXT, is_read INTEGER)')
+    conn.executemany('INSERT INTO n VALUES (?, ?, ?)', [(5, 'Olá', 0), (6, 'Meta', 1)])
+    rows = conn.execute('SELECT * FROM n ORDER BY id').fetchall()
+    conn.close()
+    return rows
+
+
+def dict_rows():
+    """Linhas do DictCursor do psycopg2 (listas com acesso por nome)"""
+    extras = pytest.importorskip('psycopg2.extras')
+
+    class Cursor:
+        index = OrderedDict(id=0, title=1, is_read=2)
+        description = [None] * 3
+
+    rows = []
+    for values in [(5, 'Olá', False), (6, 'Meta', True)]:
+        row = extras.DictRow(Cursor())
+        row[:] = values
+        rows.append(row)
+    return rows
+
+
+APP = Flask(__name__)
+
+
+def encode(encoder, obj):
+    provider = FastJSONProvider(APP, encoder=encoder)
+    return json.loads(provider.response(obj).get_data())
+
+
+@pytest.mark.parametrize('encoder', ENCODERS)
+@pytest.mark.parametrize('make_rows', [sqlite_rows, dict_rows])
+def test_rows_are_encoded_as_columns(encoder, make_rows):
+    data = encode(encoder, {'notifications': columnar(make_rows())})
+    assert data['notifications']['columns'] == ['id', 'title', 'is_read']
+    assert data['notifications']['data']['id'] == [5, 6]
+    assert data['notifications']['data']['title'] == ['Olá', 'Meta']
+
+
+@pytest.mark.parametrize('encoder', ENCODERS)
+def test_decimal_and_dates(encoder):
+    data = encode(encoder, {'total': Decimal('10.50'), 'count': Decimal('3'), 'day': date(2026, 10, 5)})
+    assert data == {'total': 10.5, 'count': 3, 'day': '2026-10-05'}
+
+
+@pytest.mark.parametrize('make_rows', [sqlite_rows, dict_rows])
+def test_columnar_from_both_row_types(make_rows):
+    table = columnar(make_rows())
+    assert table['columns'] == ['id', 'title', 'is_read']
+    assert table['data']['id'] == [5, 6]
+    assert table['data']['title'] == ['Olá', 'Meta']
+
+
+def test_columnar_money_and_empty():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute('SELECT 1 AS id, 12345 AS amount_cents').fetchall()
+    assert columnar(rows, money=('amount',)) == {'columns': ['id', 'amount'],
+                                                 'data': {'id': [1], 'amount': [123.45]}}
+    assert columnar([], columns=['id']) == {'columns': ['id'], 'data': {'id': []}}